@@ -1,31 +1,53 @@
 # -*- coding: utf-8 -*-
-from importlib.metadata import metadata
+import sys
+from functools import lru_cache
+
+# most names are defined by __getattr__
+__all__ = ['__package_name__', '__version__', '__title__', '__author__', '__email__', '__license__', '__copyright__', '__url__', '__help_url__']  # noqa
+
+
+# The package metadata is only read when one of these names is used, since that takes time.
+METADATA_FIELDS = {
+    '__package_name__': 'Name',
+    '__version__': 'Version',
+    '__title__': 'Summary',
+    '__author__': 'Author',
+    '__email__': 'Author-email',
+    '__license__': 'License',
+    '__help_url__': 'Home-page',
+}
+# Can not be set via metadata
+__copyright__ = "Copyright (c) 2021-2023 Gert-Jan Paulissen"
 
-__all__ = ['__package_name__', '__version__', '__title__', '__author__', '__email__', '__license__', '__copyright__', '__url__', '__help_url__']
 
+@lru_cache(maxsize=None)
+def pato_gui_metadata():
+    from importlib.metadata import metadata
 
-pato_gui_metadata = metadata('pato-gui')
-__package_name__ = pato_gui_metadata["Name"]
-__version__ = pato_gui_metadata["Version"]
-__title__ = pato_gui_metadata["Summary"]
-__author__ = pato_gui_metadata["Author"]
-__email__ = pato_gui_metadata["Author-email"]
-__license__ = pato_gui_metadata["License"]
-__url__ = pato_gui_metadata["Project-URL"][len("Repository, "):]
-__help_url__ = pato_gui_metadata["Home-page"]
-# Can not be set via metadata
-__copyright__ = "Copyright (c) 2021-2023 Gert-Jan Paulissen"
+    return metadata('pato-gui')
+
+
+def __getattr__(name):
+    if name in METADATA_FIELDS:
+        return pato_gui_metadata()[METADATA_FIELDS[name]]
+    if name == '__url__':
+        return pato_gui_metadata()["Project-URL"][len("Repository, "):]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
 
 def version():
-    print(__version__)
+    print(sys.modules[__name__].__version__)
 
 
 def main():
     for var in __all__:
         try:
-            print("%s: %s" % (var, eval(var)))
-        except NameError:
+            print("%s: %s" % (var, getattr(sys.modules[__name__], var)))
+        except AttributeError:
             pass
 
 
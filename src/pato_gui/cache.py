@@ -0,0 +1,126 @@
+"""
+A simple on-disk cache for results that are expensive to determine, like the Maven POM inquiry.
+
+The cache lives in $PATO_GUI_CACHE_DIR or else $XDG_CACHE_HOME/pato-gui (default ~/.cache/pato-gui).
+Every section (for instance 'pom') is a subdirectory with one JSON file per key.
+Hit and miss counts per section are kept in statistics.json.
+"""
+
+# Python modules
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+
+
+__all__ = ['cache_dir', 'digest', 'file_digest', 'load', 'store', 'remove', 'statistics']
+
+
+logger = logging.getLogger(__name__)
+
+
+def cache_dir():
+    """
+    Return the cache directory (it may not exist yet).
+
+    >>> os.environ['PATO_GUI_CACHE_DIR'] = '/tmp/pato-gui-doctest'
+    >>> str(cache_dir())
+    '/tmp/pato-gui-doctest'
+    >>> del os.environ['PATO_GUI_CACHE_DIR']
+    """
+    if os.environ.get('PATO_GUI_CACHE_DIR'):
+        return Path(os.environ['PATO_GUI_CACHE_DIR'])
+    return Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'pato-gui'
+
+
+def digest(*items):
+    """
+    Return a SHA-256 hex digest for a list of JSON serializable items.
+
+    >>> digest('a', 1) == digest('a', 1)
+    True
+    >>> digest('a', 1) == digest('a', 2)
+    False
+    """
+    return hashlib.sha256(json.dumps(items, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of the contents of a file."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as fd:
+        for chunk in iter(lambda: fd.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_json(path, value):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # write to a temporary file first so a concurrent reader never sees a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
+    except Exception:
+        os.unlink(tmp)
+        raise
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _count(section, hit):
+    path = cache_dir() / 'statistics.json'
+    stats = _read_json(path) or {}
+    counts = stats.setdefault(section, {'hits': 0, 'misses': 0})
+    counts['hits' if hit else 'misses'] += 1
+    try:
+        _write_json(path, stats)
+    except OSError as e:
+        logger.debug('Could not write cache statistics: %s' % (e))
+    return counts
+
+
+def load(section, key, validate=None, count=True):
+    """
+    Return the cached value for section and key or None when there is no (valid) entry.
+
+    When validate is supplied it is called with the value and the entry is only used when it returns True.
+    Unless count is False, every call counts as either a hit or a miss in the statistics of the section.
+    """
+    value = _read_json(cache_dir() / section / (key + '.json'))
+    hit = value is not None and (validate is None or validate(value))
+    if count:
+        counts = _count(section, hit)
+        logger.info('Cache %s for %s (hits: %d, misses: %d)' % ('hit' if hit else 'miss', section, counts['hits'], counts['misses']))
+    return value if hit else None
+
+
+def store(section, key, value):
+    """Store a JSON serializable value for section and key, ignoring (but logging) I/O errors."""
+    try:
+        _write_json(cache_dir() / section / (key + '.json'), value)
+    except OSError as e:
+        logger.warning('Could not write cache entry %s/%s: %s' % (section, key, e))
+
+
+def remove(section, key):
+    """Remove the entry for section and key (if any)."""
+    try:
+        (cache_dir() / section / (key + '.json')).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def statistics(section=None):
+    """Return the hit and miss counts of one section or a dictionary of them for all sections."""
+    stats = _read_json(cache_dir() / 'statistics.json') or {}
+    return stats.get(section, {'hits': 0, 'misses': 0}) if section else stats
@@ -0,0 +1,145 @@
+"""
+Rate-limited console output for huge builds.
+
+A console like the one of the GUI can not keep up with hundreds of thousands of lines.
+ConsoleOutput coalesces the lines into batches written every flush_interval seconds by a flusher thread
+and keeps at most max_lines per batch in a ring buffer: older lines of the batch are replaced by a note.
+So max_lines is a rate limit (at most max_lines / flush_interval lines per second), not a limit on the total
+number of lines shown.
+Every line is also written to a compressed log file (the spill file), that is shown at the end.
+"""
+
+# Python modules
+import sys
+import gzip
+import time
+import logging
+import threading
+import collections
+
+
+__all__ = ['ConsoleOutput', 'spill_file_name']
+
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 0.2
+# At most MAX_LINES / FLUSH_INTERVAL lines per second are written.
+MAX_LINES = 2000
+# Fast compression: the log must keep up with Maven.
+COMPRESSLEVEL = 1
+
+
+def spill_file_name(log_dir, action, db):
+    """
+    The name of a compressed log file for a run.
+
+    >>> spill_file_name('/tmp', 'db-info', 'bc_dev').startswith('/tmp/db-info-bc_dev-')
+    True
+    """
+    return '%s/%s-%s-%s.log.gz' % (log_dir, action, db, time.strftime('%Y%m%d-%H%M%S'))
+
+
+class ConsoleOutput:
+    """
+    A line handler writing lines to the console in timed batches of at most max_lines lines each
+    (the last lines of the batch) and to a compressed spill file (when supplied). Call close() at the end.
+
+    >>> console = ConsoleOutput(write=print, max_lines=2, flush_interval=3600)
+    >>> for i in range(5):
+    ...     console('line %d' % i)
+    >>> console.close()
+    [... 3 lines not shown ...]
+    line 3
+    line 4
+    <BLANKLINE>
+    """
+
+    def __init__(self, spill_file=None, write=None, flush_interval=FLUSH_INTERVAL, max_lines=MAX_LINES):
+        self.spill_file = spill_file
+        self.spill = gzip.open(spill_file, 'wt', encoding='utf-8', compresslevel=COMPRESSLEVEL) if spill_file else None
+        self.write_console = write or self._write_stdout
+        self.flush_interval = flush_interval
+        self.buffer = collections.deque(maxlen=max_lines)
+        self.dropped = 0
+        self.lines = 0
+        self.lock = threading.Lock()
+        # set when the buffer has lines to write, respectively at close()
+        self.pending = threading.Event()
+        self.stopped = threading.Event()
+        self.flusher = None
+
+    @staticmethod
+    def _write_stdout(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def log(self, line):
+        """Write a line to the spill file only."""
+        if self.spill:
+            self.spill.write(line + '\n')
+
+    def show(self, line):
+        """Write a line to the console (in the next batch)."""
+        with self.lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(line)
+            if not self.pending.is_set():
+                # the first line of a batch: the flusher writes the batch after the flush interval
+                self.pending.set()
+                if self.flusher is None:
+                    self.flusher = threading.Thread(target=self._flush_batches, daemon=True)
+                    self.flusher.start()
+
+    def _flush_batches(self):
+        while not self.stopped.is_set():
+            self.pending.wait()
+            if self.stopped.wait(self.flush_interval):
+                break
+            self.flush()
+
+    def write(self, text):
+        """Write text (lines with line endings), for instance the output of an OutputFilterEngine."""
+        for line in text.splitlines():
+            self.show(line)
+
+    def handler(self, line_filter=None):
+        """Return a line handler that logs every line and shows it, or passes it to line_filter to decide."""
+        log, show = self.log, line_filter or self.show
+
+        def handle(line):
+            log(line)
+            show(line)
+
+        return handle
+
+    def __call__(self, line):
+        self.log(line)
+        self.show(line)
+
+    def flush(self):
+        # the flusher thread flushes too: write under the lock so batches are not mixed up
+        with self.lock:
+            self.pending.clear()
+            lines = list(self.buffer)
+            self.buffer.clear()
+            if self.dropped:
+                lines.insert(0, '[... %d lines not shown%s ...]' % (self.dropped, ', see ' + str(self.spill_file) if self.spill_file else ''))
+                self.dropped = 0
+            if lines:
+                self.lines += len(lines)
+                self.write_console('\n'.join(lines) + '\n')
+
+    def close(self):
+        """Stop the flusher, write the last batch and close the spill file."""
+        self.stopped.set()
+        self.pending.set()
+        if self.flusher is not None:
+            self.flusher.join()
+            self.flusher = None
+        self.flush()
+        if self.spill:
+            self.spill.close()
+            self.spill = None
+            logger.info('The full log is in %s (view it with pato-gui-log)' % (self.spill_file))
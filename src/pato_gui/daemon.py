@@ -0,0 +1,126 @@
+"""
+The execution policy for the Maven daemon (mvnd) per action.
+
+Some actions are safe to run in a warm daemon, others only when the build is not parallel (mvnd -T1)
+and some (the parallel DDL generation) not at all. When the daemon is not healthy plain Maven is used.
+When the daemon fails during a run, the action is run again with plain Maven only when it can be
+repeated safely (IDEMPOTENT_ACTIONS): a db-install or apex-import may already have changed the database.
+"""
+
+# Python modules
+import re
+import logging
+import subprocess
+from shutil import which
+
+# local module(s)
+from pato_gui import cache
+
+
+__all__ = ['DAEMON', 'DAEMON_SERIAL', 'NO_DAEMON', 'ACTION_POLICY', 'IDEMPOTENT_ACTIONS', 'DaemonFailure', 'use_daemon', 'maven_executable', 'daemon_healthy', 'DaemonMonitor', 'tool', 'record_timing']
+
+
+logger = logging.getLogger(__name__)
+
+
+DAEMON = 'daemon'
+DAEMON_SERIAL = 'daemon-serial'
+NO_DAEMON = 'no-daemon'
+
+# Actions not listed do not use the daemon.
+ACTION_POLICY = {
+    'db-info': DAEMON,
+    'db-code-check': DAEMON,
+    'apex-export': DAEMON,
+    'db-install': DAEMON_SERIAL,
+    'db-test': DAEMON_SERIAL,
+    'apex-import': DAEMON_SERIAL,
+    'apex-seed-publish': DAEMON_SERIAL,
+    # GJP 2025-04-14 Generating DDL in parallel does not work with the daemon
+    'db-generate-ddl-full': NO_DAEMON,
+    'db-generate-ddl-incr': NO_DAEMON,
+}
+
+# Actions that can be run again after a daemon failure since they do not change the database.
+IDEMPOTENT_ACTIONS = {'db-info', 'db-code-check', 'apex-export'}
+
+# Output of the mvnd client telling the daemon (not the build) failed.
+DAEMON_FAILURE_EXPR = re.compile(r'DaemonException|Could not connect to (the )?daemon|daemon .*(stopped|crashed|died|disappeared)', re.IGNORECASE)
+
+HEALTH_CHECK_TIMEOUT = 10
+
+
+class DaemonFailure(Exception):
+    """The Maven daemon (not the build) failed."""
+
+
+def daemon_healthy():
+    """Is the mvnd client available and does it report the daemon status?"""
+    if which('mvnd') is None:
+        return False
+    try:
+        return subprocess.run(['mvnd', '--status'], capture_output=True, timeout=HEALTH_CHECK_TIMEOUT).returncode == 0
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.debug('mvnd --status: %s' % (e))
+        return False
+
+
+def use_daemon(action, mvnd):
+    """
+    Return the policy for an action: NO_DAEMON when the daemon is not wanted (mvnd False), not allowed or not healthy.
+    """
+    policy = ACTION_POLICY.get(action, NO_DAEMON) if mvnd else NO_DAEMON
+    if policy != NO_DAEMON and not daemon_healthy():
+        logger.warning('The Maven daemon is not healthy: using Maven instead')
+        policy = NO_DAEMON
+    logger.debug('Maven daemon policy for action %s: %s' % (action, policy))
+    return policy
+
+
+def maven_executable(policy):
+    """
+    The Maven executable (with options) for a policy.
+
+    >>> maven_executable(DAEMON_SERIAL)
+    'mvnd -T1'
+    """
+    return {DAEMON: 'mvnd', DAEMON_SERIAL: 'mvnd -T1'}.get(policy, 'mvn')
+
+
+class DaemonMonitor:
+    """A line handler that passes lines on and notices daemon failures."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.failed = False
+
+    def __call__(self, line):
+        if not self.failed and DAEMON_FAILURE_EXPR.search(line):
+            self.failed = True
+        self.handler(line)
+
+
+def tool(policy):
+    """
+    The Maven tool of a policy.
+
+    >>> tool(NO_DAEMON), tool(DAEMON_SERIAL)
+    ('mvn', 'mvnd')
+    """
+    return 'mvn' if policy == NO_DAEMON else 'mvnd'
+
+
+def record_timing(pom_file, action, policy, duration):
+    """
+    Record the duration of a run and return a message with the time saved by the daemon
+    compared to the last run of the same action with plain Maven (if any).
+    """
+    key = cache.digest(str(pom_file), action)
+    timings = cache.load('timings', key, count=False) or {}
+    name = tool(policy)
+    timings[name] = duration
+    cache.store('timings', key, timings)
+    message = 'Maven run of action %s with %s took %.1f seconds' % (action, name, duration)
+    if name == 'mvnd' and 'mvn' in timings:
+        message += ' (saving %.1f seconds compared to the last run with mvn)' % (timings['mvn'] - duration)
+    return message
@@ -0,0 +1,167 @@
+"""
+Run one action against several databases with a limited number of concurrent Maven runs.
+
+Every run has its own working directory, log file and environment (for the password),
+and the output goes to the log file only. Runs that must not share the build output (target) of
+their project run in a copy of the project in their working directory. The JVM of plain Maven is
+tuned for the action of a run (see the jvm module). At the end a summary per database is shown.
+"""
+
+# Python modules
+import os
+import shutil
+import time
+import asyncio
+import logging
+from pathlib import Path
+
+# local module(s)
+from pato_gui import daemon, jvm, runner
+from pato_gui.pom import db_order
+
+
+__all__ = ['DatabaseRun', 'copy_project', 'execute', 'fan_out', 'summary']
+
+
+logger = logging.getLogger(__name__)
+
+# the directory of the project copy in the working directory of a run
+PROJECT_COPY = 'project'
+# not copied: the build output and version control
+PROJECT_COPY_IGNORE = {'target', '.git', '.svn'}
+
+
+class DatabaseRun:
+    """
+    The command, environment and (after running) the result of a Maven run for one database.
+    The name (default the database) names the log file and working directory.
+    The POM file, action, Maven daemon policy and fingerprint are set by program.prepare_run.
+    When project_dir (the directory with the POM file and its local parents) is set, the run uses a copy of it.
+    """
+
+    def __init__(self, db, cmd, env=None, name=None):
+        self.db = db
+        self.name = name or db
+        self.cmd = cmd
+        self.env = env
+        self.pom_file = None
+        self.action = None
+        self.policy = daemon.NO_DAEMON
+        self.fingerprint = None
+        self.project_dir = None
+        self.skipped = False
+        self.log_file = None
+        self.returncode = None
+        self.error = None
+        self.duration = None
+
+    @property
+    def status(self):
+        if self.skipped:
+            return 'SKIPPED'
+        if self.error is not None:
+            return 'ERROR'
+        if self.returncode is None:
+            return 'NOT RUN'
+        return 'OK' if self.returncode == 0 else f'FAILED ({self.returncode})'
+
+    @property
+    def succeeded(self):
+        """Did the run succeed or was it skipped since nothing changed since its last successful run?"""
+        return self.status in ('OK', 'SKIPPED')
+
+
+def _link_or_copy(src, dst):
+    # Maven only reads the sources (it writes to target): a hard link is much faster than a copy
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def copy_project(run, work_dir, log_dir):
+    """
+    Copy the project directory of a run to work_dir (without the build output and log_dir)
+    and return the command of the run with the POM file of the copy.
+    """
+    project_dir = Path(run.project_dir).resolve()
+    copy_dir = work_dir / PROJECT_COPY
+    log_dir = log_dir.resolve()
+
+    def ignore(directory, names):
+        return [name for name in names if name in PROJECT_COPY_IGNORE or Path(directory, name) == log_dir]
+
+    shutil.copytree(project_dir, copy_dir, ignore=ignore, copy_function=_link_or_copy, dirs_exist_ok=True)
+    pom_file = str(copy_dir / Path(run.pom_file).resolve().relative_to(project_dir))
+    return [pom_file if arg == str(run.pom_file) else arg for arg in run.cmd]
+
+
+async def execute(run, log_dir):
+    """
+    Execute a run with its own working directory and log file in log_dir (a Path).
+    A run with a project directory uses a copy of it in the working directory.
+    """
+    work_dir = log_dir / run.name
+    work_dir.mkdir(parents=True, exist_ok=True)
+    run.log_file = log_dir / f'{run.name}.log'
+    env = dict(run.env if run.env is not None else os.environ)
+    # keep the temporary files of concurrent runs apart
+    env['TMPDIR'] = str(work_dir)
+    logger.info('%s: started, log file %s' % (run.name, run.log_file))
+    start = time.perf_counter()
+    with open(run.log_file, 'w', encoding='utf-8') as log, \
+            jvm.tuned_environment(run.action if run.policy == daemon.NO_DAEMON else None, env) as env:
+        def write(line):
+            log.write(line + '\n')
+
+        try:
+            cmd = run.cmd
+            if run.project_dir:
+                cmd = await asyncio.get_running_loop().run_in_executor(None, copy_project, run, work_dir, log_dir)
+            run.returncode = await runner.run_async(cmd, write, write, env=env, cwd=work_dir)
+        except Exception as e:
+            run.error = e
+            write(f'{type(e).__name__}: {e}')
+    run.duration = time.perf_counter() - start
+    logger.info('%s: %s in %.1f seconds' % (run.name, run.status, run.duration))
+
+
+async def _run(run, log_dir, semaphore):
+    async with semaphore:
+        await execute(run, log_dir)
+
+
+async def _fan_out(runs, jobs, log_dir):
+    semaphore = asyncio.Semaphore(jobs)
+    await asyncio.gather(*[_run(run, log_dir, semaphore) for run in runs])
+
+
+def fan_out(runs, jobs, log_dir):
+    """Execute the runs (DatabaseRun objects) with at most jobs at the same time and return them ordered by db_order."""
+    log_dir = Path(log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    runs = sorted(runs, key=lambda run: db_order(run.db))
+    asyncio.run(_fan_out(runs, max(1, jobs), log_dir))
+    return runs
+
+
+def summary(runs):
+    """
+    Return a table with the status and duration per database.
+
+    >>> run = DatabaseRun('bc_dev', ['mvn'])
+    >>> run.returncode, run.duration, run.log_file = 0, 12.34, 'bc_dev.log'
+    >>> print(summary([run]))
+    Database  Status  Duration  Log file
+    --------  ------  --------  ----------
+    bc_dev    OK        12.3 s  bc_dev.log
+    """
+    rows = [['Database', 'Status', 'Duration', 'Log file']]
+    for run in runs:
+        rows.append([run.db, run.status, '' if run.duration is None else '%.1f s' % (run.duration), str(run.log_file or '')])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    rows.insert(1, ['-' * width for width in widths])
+    lines = []
+    for row in rows:
+        lines.append('  '.join([row[0].ljust(widths[0]), row[1].ljust(widths[1]), row[2].rjust(widths[2]), row[3]]).rstrip())
+    return '\n'.join(lines)
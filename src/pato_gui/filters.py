@@ -0,0 +1,224 @@
+"""
+Filters to show only the most relevant part of the Maven output.
+
+An OutputFilterEngine passes every output line to a chain of filters (see ACTION_FILTERS for the chain per action).
+A filter recognizes the start of a section by a cheap prefix test before doing anything else.
+While a section is active, the lines are passed to that filter only, until it ends the section.
+The output lines kept are collected and written in batches.
+"""
+
+# Python modules
+import re
+import sys
+import time
+
+# local module(s)
+from pato_gui.flyway import FlywayInfoParser
+
+
+__all__ = ['OutputFilter', 'FlywayGoalFilter', 'FlywayInfoFilter', 'FlywayMigrateFilter', 'SummaryFilter',
+           'ProgressFilter', 'FindingsFilter', 'OutputFilterEngine', 'ACTION_FILTERS']
+
+
+class OutputFilter:
+    """
+    The base class for a filter: a section starts with a line starting with one of the prefixes.
+    A single line filter just shows the lines it starts with.
+    """
+    prefixes = ()
+    single_line = False
+
+    def start(self, line):
+        """Return the output for a line starting with one of the prefixes or None when it does not start a section."""
+        return line
+
+    def process(self, line):
+        """Return the output (or None) for a line in an active section and whether the section continues."""
+        return line, True
+
+
+class FlywayGoalFilter(OutputFilter):
+    """
+    Show the output of a flyway goal (for instance info) without the [INFO] prefix until the first empty line.
+
+    Should be able to parse output like this:
+
+    [INFO] --- flyway:10.12.0:info (default-cli) @ ORACLE_TOOLS ---
+    [INFO] 6 SQL migrations were detected but not run because they did not follow the filename convention.
+    [INFO] Set 'validateMigrationNaming' to true to fail fast and see a list of the invalid file names.
+    [INFO] Database: jdbc:oracle:thin:@bc_dev (Oracle 19.27)
+    [INFO] Schema version: 20210607094700
+    [INFO]
+    [INFO] +------------+----------------+------------------------------------------------------------+----------+---------------------+------------+----------+
+    ...
+    +------------+----------------+------------------------------------------------------------+----------+---------------------+------------+----------+
+
+    [INFO]
+
+    (or the same for flyway-maven-plugin) and return:
+
+    [INFO] --- flyway:10.12.0:info (default-cli) @ ORACLE_TOOLS ---
+    6 SQL migrations were detected but not run because they did not follow the filename convention.
+    Set 'validateMigrationNaming' to true to fail fast and see a list of the invalid file names.
+    Database: jdbc:oracle:thin:@bc_dev (Oracle 19.27)
+    Schema version: 20210607094700
+    +------------+----------------+------------------------------------------------------------+----------+---------------------+------------+----------+
+    ...
+    +------------+----------------+------------------------------------------------------------+----------+---------------------+------------+----------+
+    """
+    prefixes = ('[INFO] --- flyway',)
+    goal = None
+
+    def __init__(self):
+        self.expr = re.compile(r'\[INFO\] (--- (flyway|flyway-maven-plugin):(\d+\.)*\d+:%s .+ ---)' % (self.goal))
+
+    def start(self, line):
+        return line if self.expr.match(line) else None
+
+    def process(self, line):
+        if not line.strip():
+            return None, False
+        if line.startswith('[INFO]'):
+            output = line[len('[INFO] '):] if line.startswith('[INFO] ') else None
+            # the section ends when flyway is skipped
+            return output, output != 'Skipping Flyway execution'
+        return line, True
+
+
+class FlywayInfoFilter(FlywayGoalFilter):
+    """
+    Like FlywayGoalFilter but the info table is parsed (see the flyway module) and, when summary is True,
+    replaced by a summary of the module.
+    """
+    goal = 'info'
+
+    def __init__(self, parser=None, summary=True):
+        super().__init__()
+        self.parser = parser or FlywayInfoParser(None)
+        self.summary = summary
+
+    def start(self, line):
+        output = super().start(line)
+        if output is not None:
+            self.parser.feed(line)
+        return output
+
+    def process(self, line):
+        if self.parser.feed(line) and self.summary:
+            return None, True
+        output, more = super().process(line)
+        # no module summary for a goal line without the module (see flyway.INFO_GOAL_EXPR)
+        if self.summary and not more and output is None and self.parser.module_summary is not None and self.parser.module_summary.migrations:
+            output = str(self.parser.module_summary)
+        return output, more
+
+
+class FlywayMigrateFilter(FlywayGoalFilter):
+    goal = 'migrate'
+
+
+class SummaryFilter(OutputFilter):
+    """Show everything from the Reactor Summary or build result on."""
+    prefixes = ('[INFO] Reactor Summary', '[INFO] BUILD SUCCESS', '[INFO] BUILD FAILURE')
+
+
+class ProgressFilter(OutputFilter):
+    """Show the progress of a build: the modules and plugin goals executed."""
+    prefixes = ('[INFO] Building ', '[INFO] --- ')
+    single_line = True
+
+
+class FindingsFilter(OutputFilter):
+    """Show the warnings and errors, for instance the findings of a code check."""
+    prefixes = ('[WARNING]', '[ERROR]')
+    single_line = True
+
+
+# The filter chain per action: actions not listed show their output unfiltered.
+ACTION_FILTERS = {
+    'db-info': [FlywayInfoFilter, SummaryFilter],
+    'db-install': [FlywayMigrateFilter, FindingsFilter, SummaryFilter],
+    'db-code-check': [FindingsFilter, SummaryFilter],
+    'db-generate-ddl-full': [ProgressFilter, FindingsFilter, SummaryFilter],
+    'db-generate-ddl-incr': [ProgressFilter, FindingsFilter, SummaryFilter],
+}
+
+
+class OutputFilterEngine:
+    """
+    Pass output lines through a chain of filters and write the output kept in batches.
+
+    The engine can be used as a line handler (see the runner module): the output is written
+    when batch_size lines have been kept or flush_interval seconds have elapsed since the last write.
+    Call flush() at the end.
+
+    >>> engine = OutputFilterEngine([SummaryFilter()], write=print)
+    >>> engine.feed_lines(['[INFO] Compiling', '[INFO] BUILD SUCCESS', '[INFO] Total time: 1 s'])
+    >>> engine.flush()
+    [INFO] BUILD SUCCESS
+    [INFO] Total time: 1 s
+    <BLANKLINE>
+    """
+
+    def __init__(self, filters, write=None, batch_size=1000, flush_interval=0.1):
+        self.filters = filters
+        self.write = write or self._write_stdout
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.active = None
+        self.buffer = []
+        self.last_flush = time.monotonic()
+
+    @classmethod
+    def for_action(cls, action, info_parser=None, summary=True, **kwargs):
+        """
+        Return an engine with the filter chain of an action or None when the action has none.
+        The flyway info filter uses info_parser when supplied and shows a summary instead of the table when summary is True.
+        """
+        filters = ACTION_FILTERS.get(action)
+        if filters is None:
+            return None
+        return cls([f(info_parser, summary) if f is FlywayInfoFilter else f() for f in filters], **kwargs)
+
+    @staticmethod
+    def _write_stdout(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def feed_lines(self, lines):
+        """Filter a batch of lines (without line endings)."""
+        filters = self.filters
+        active = self.active
+        append = self.buffer.append
+        for line in lines:
+            if active is None:
+                for f in filters:
+                    if line.startswith(f.prefixes):
+                        output = f.start(line)
+                        if output is not None:
+                            if not f.single_line:
+                                active = f
+                            if output:
+                                append(output)
+                            break
+            else:
+                output, more = active.process(line)
+                if output:
+                    append(output)
+                if not more:
+                    active = None
+        self.active = active
+        if len(self.buffer) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def feed(self, line):
+        """Filter one line (without line ending)."""
+        self.feed_lines((line,))
+
+    __call__ = feed
+
+    def flush(self):
+        if self.buffer:
+            self.write('\n'.join(self.buffer) + '\n')
+            self.buffer = []
+        self.last_flush = time.monotonic()
@@ -0,0 +1,120 @@
+"""
+Build avoidance: skip an action when its inputs have not changed since its last successful run.
+
+The fingerprint of a run covers the project directory of the POM (without target and hidden directories),
+the POM chain, the .mvn directory of the project (maven.config, jvm.config and extensions), the directory of the database in the database configuration directory, the action,
+the database and the extra Maven command line options. It is recorded after a successful run,
+keyed by POM file, database and action.
+
+To be fast on big trees, the size and modification time of every file are compared with
+those of the previous fingerprint first: only the files that changed are hashed, in parallel.
+"""
+
+# Python modules
+import os
+import time
+import logging
+import concurrent.futures
+
+# local module(s)
+from pato_gui import cache
+from pato_gui.pom import maven_config_dir, pom_chain
+
+
+__all__ = ['AVOIDABLE_ACTIONS', 'tree_digest', 'fingerprint', 'unchanged', 'record']
+
+
+logger = logging.getLogger(__name__)
+
+# The actions that are skipped when their inputs have not changed.
+AVOIDABLE_ACTIONS = {'db-install'}
+
+# Directories that are not inputs.
+EXCLUDED_DIRS = {'target'}
+
+HASH_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+SECTION = 'build'
+FILES_SECTION = 'build-files'
+
+
+def _files(root):
+    """The path (relative to root), size and modification time of the files below root."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in EXCLUDED_DIRS:
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        yield os.path.relpath(entry.path, root), st.st_size, st.st_mtime_ns
+        except OSError as e:
+            logger.debug('Could not list %s: %s' % (directory, e))
+
+
+def tree_digest(root):
+    """
+    Return a digest of the contents of the files below a directory.
+
+    The hashes of the files are cached with their size and modification time,
+    so only new and changed files are hashed (in parallel).
+    """
+    root = os.path.abspath(root)
+    key = cache.digest(root)
+    previous = cache.load(FILES_SECTION, key, count=False) or {}
+    files = {}
+    changed = []
+    for path, size, mtime_ns in _files(root):
+        state = previous.get(path)
+        if state and state[0] == size and state[1] == mtime_ns:
+            files[path] = state
+        else:
+            files[path] = [size, mtime_ns, None]
+            changed.append(path)
+    if changed:
+        logger.debug('Hashing %d of the %d files below %s' % (len(changed), len(files), root))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+            for path, digest in zip(changed, executor.map(lambda path: cache.file_digest(os.path.join(root, path)), changed)):
+                files[path][2] = digest
+    if changed or len(files) != len(previous):
+        cache.store(FILES_SECTION, key, files)
+    return cache.digest(sorted([path, state[2]] for path, state in files.items()))
+
+
+def fingerprint(pom_file, db_config_dir, db, action, extra_maven_command_line_options):
+    """Return the fingerprint of the inputs of a run."""
+    start = time.perf_counter()
+    project_dir = os.path.dirname(os.path.abspath(pom_file))
+    chain = [[str(pom), cache.file_digest(pom)] for pom in pom_chain(pom_file)]
+    db_dir = os.path.join(db_config_dir, db) if db_config_dir else None
+    config_dir = maven_config_dir(pom_file)
+    result = cache.digest(tree_digest(project_dir),
+                          chain,
+                          tree_digest(config_dir) if config_dir else None,
+                          tree_digest(db_dir) if db_dir and os.path.isdir(db_dir) else None,
+                          action,
+                          db,
+                          list(extra_maven_command_line_options))
+    logger.debug('Fingerprint of %s for database %s and action %s took %.3f seconds' % (pom_file, db, action, time.perf_counter() - start))
+    return result
+
+
+def _key(pom_file, db, action):
+    return cache.digest(os.path.abspath(pom_file), db, action)
+
+
+def unchanged(pom_file, db, action, fp):
+    """Return the time (seconds since the epoch) of the last successful run with the same fingerprint or None."""
+    entry = cache.load(SECTION, _key(pom_file, db, action), lambda entry: entry['fingerprint'] == fp)
+    return entry['time'] if entry else None
+
+
+def record(pom_file, db, action, fp):
+    """Record the fingerprint of a successful run."""
+    cache.store(SECTION, _key(pom_file, db, action), {'fingerprint': fp, 'time': time.time()})
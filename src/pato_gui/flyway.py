@@ -0,0 +1,207 @@
+"""
+Structured output of the flyway info goal.
+
+The flyway info table is parsed into Migration records while the Maven output streams,
+so a log with thousands of migrations is never kept in memory. The records can be written
+as JSON or CSV (see writer()) and are summarized per database (see FlywayInfoSummary).
+"""
+
+# Python modules
+import re
+import csv
+import json
+import collections
+
+
+__all__ = ['FIELDS', 'FORMATS', 'Migration', 'FlywayInfoSummary', 'FlywayInfoParser', 'writer', 'summary_table']
+
+
+FIELDS = ['database', 'module', 'category', 'version', 'description', 'type', 'installed_on', 'state']
+
+FORMATS = ['json', 'csv']
+
+Migration = collections.namedtuple('Migration', FIELDS)
+
+# The table header of flyway info versus the Migration field.
+COLUMNS = {
+    'Category': 'category',
+    'Version': 'version',
+    'Description': 'description',
+    'Type': 'type',
+    'Installed On': 'installed_on',
+    'State': 'state',
+}
+
+VERSION_SEPARATOR_EXPR = re.compile(r'[._]')
+
+INFO_GOAL_EXPR = re.compile(r'\[INFO\] --- (flyway|flyway-maven-plugin):(\d+\.)*\d+:info .+ @ (\S+) ---')
+
+
+def _version_key(version):
+    """
+    A sort key for a flyway version.
+
+    >>> sorted(['1.10', '1.9', '2'], key=_version_key)
+    ['1.9', '1.10', '2']
+    """
+    return tuple(int(part) if part.isdigit() else 0 for part in VERSION_SEPARATOR_EXPR.split(version))
+
+
+class FlywayInfoSummary:
+    """
+    The number of migrations, pending and failed ones and the latest version applied.
+
+    >>> summary = FlywayInfoSummary('bc_dev')
+    >>> summary.add(Migration('bc_dev', 'db', 'Versioned', '1.10', 'init', 'SQL', '2024-01-01 10:00:00', 'Success'))
+    >>> summary.add(Migration('bc_dev', 'db', 'Versioned', '2', 'next', 'SQL', '', 'Pending'))
+    >>> print(summary)
+    bc_dev: 2 migrations, 1 pending, 0 failed, latest version 1.10
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.migrations = 0
+        self.pending = 0
+        self.failed = 0
+        self.latest_version = None
+        self.latest_key = None
+
+    def add(self, migration):
+        self.migrations += 1
+        if migration.state == 'Pending':
+            self.pending += 1
+        elif 'Failed' in migration.state:
+            self.failed += 1
+        elif migration.state in ('Success', 'Baseline') and migration.version:
+            key = _version_key(migration.version)
+            if self.latest_key is None or key > self.latest_key:
+                self.latest_version, self.latest_key = migration.version, key
+
+    def __str__(self):
+        return '%s: %d migrations, %d pending, %d failed, latest version %s' % \
+            (self.database or 'database', self.migrations, self.pending, self.failed, self.latest_version or '-')
+
+
+class FlywayInfoParser:
+    """
+    Parse the flyway info tables in (Maven) output lines fed one by one.
+
+    Every migration found is added to the summary of the database and of the current module (Maven project)
+    and passed to on_migration when supplied.
+    """
+
+    def __init__(self, database, on_migration=None):
+        self.database = database
+        self.on_migration = on_migration
+        self.summary = FlywayInfoSummary(database)
+        self.module = None
+        self.module_summary = None
+        self.columns = None
+        self.indexes = None
+
+    def feed(self, line):
+        """Process a line and return whether it is part of a flyway info table."""
+        if line.startswith('[INFO] --- '):
+            m = INFO_GOAL_EXPR.match(line)
+            self.module = m.group(3) if m else None
+            self.module_summary = FlywayInfoSummary(self.database) if m else None
+            self.columns = None
+            return False
+        if self.module is None:
+            return False
+        if line.startswith('[INFO] '):
+            line = line[len('[INFO] '):]
+        if line.startswith('+-'):
+            return True
+        if not line.startswith('|'):
+            return False
+        cells = [cell.strip() for cell in line.strip()[1:-1].split('|')]
+        if self.columns is None:
+            self.columns = [COLUMNS.get(cell) for cell in cells]
+            # the cell index per Migration field (after the database and module)
+            self.indexes = [self.columns.index(field) if field in self.columns else None for field in FIELDS[2:]]
+        elif len(cells) >= len(self.columns):
+            self._add(cells)
+        # else a message like "No migrations found"
+        return True
+
+    def _add(self, cells):
+        columns = self.columns
+        extra = len(cells) - len(columns)
+        if extra and 'description' in columns:
+            # a description containing the column separator
+            i = columns.index('description')
+            cells[i:i + extra + 1] = [' | '.join(cells[i:i + extra + 1])]
+        migration = Migration(self.database, self.module, *['' if i is None else cells[i] for i in self.indexes])
+        self.summary.add(migration)
+        self.module_summary.add(migration)
+        if self.on_migration:
+            self.on_migration(migration)
+
+
+class _JSONWriter:
+    """Write the migrations as a JSON array, one object per line, without keeping them in memory."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.separator = '[\n'
+
+    def write(self, migration):
+        self.stream.write(self.separator + json.dumps(migration._asdict()))
+        self.separator = ',\n'
+
+    def close(self):
+        self.stream.write('[]\n' if self.separator == '[\n' else '\n]\n')
+        self.stream.flush()
+
+
+class _CSVWriter:
+    def __init__(self, stream):
+        self.stream = stream
+        self.csv = csv.writer(stream)
+        self.csv.writerow(FIELDS)
+
+    def write(self, migration):
+        self.csv.writerow(migration)
+
+    def close(self):
+        self.stream.flush()
+
+
+def writer(format, stream):
+    """
+    Return a writer for the migrations with methods write(migration) and close().
+
+    >>> import io
+    >>> stream = io.StringIO()
+    >>> w = writer('csv', stream)
+    >>> w.write(Migration('bc_dev', 'db', 'Versioned', '1', 'init', 'SQL', '', 'Pending'))
+    >>> w.close()
+    >>> print(stream.getvalue().replace('\\r', ''))
+    database,module,category,version,description,type,installed_on,state
+    bc_dev,db,Versioned,1,init,SQL,,Pending
+    <BLANKLINE>
+    """
+    assert format in FORMATS, f'The format must be one of {FORMATS}'
+    return _JSONWriter(stream) if format == 'json' else _CSVWriter(stream)
+
+
+def summary_table(summaries):
+    """
+    Return a table with the flyway info summary per database.
+
+    >>> summary = FlywayInfoSummary('bc_dev')
+    >>> print(summary_table([summary]))
+    Database  Migrations  Pending  Failed  Latest version
+    --------  ----------  -------  ------  --------------
+    bc_dev             0        0       0  -
+    """
+    rows = [['Database', 'Migrations', 'Pending', 'Failed', 'Latest version']]
+    for s in summaries:
+        rows.append([s.database, str(s.migrations), str(s.pending), str(s.failed), s.latest_version or '-'])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    rows.insert(1, ['-' * width for width in widths])
+    lines = []
+    for row in rows:
+        lines.append('  '.join([row[0].ljust(widths[0])] + [row[i].rjust(widths[i]) for i in range(1, 4)] + [row[4]]).rstrip())
+    return '\n'.join(lines)
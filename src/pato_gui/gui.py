@@ -0,0 +1,293 @@
+"""
+The GUI of PATO GUI, based on Gooey (and thus wxPython).
+
+This module is only imported when the GUI is needed, so the command line path starts fast.
+"""
+
+# Python modules
+import atexit
+import logging
+import os
+import sys
+import threading
+import time
+import wx
+from gooey import Gooey, GooeyParser
+
+# local module(s)
+from pato_gui import about, service, tracing, warmup
+from pato_gui.pom import db_order, last_known, restart_command
+from pato_gui.program import ACTION, BATCH_OUTPUT, DB, DB_CONFIG_DIR, DB_PASSWORD, DB_PROXY_PASSWORD, DEFAULT_JOBS, EXTRA_MAVEN_COMMAND_LINE_OPTIONS, FILE, FILTER_OUTPUT, FLYWAY_SUMMARY, FORCE, JOBS, MVND
+from pato_gui.workspace import PROJECT, WORKSPACE, actions, databases
+
+
+logger = logging.getLogger()
+
+DEFAULT_SIZE1 = (1200, 600)
+DEFAULT_SIZE2 = (1500, 750)
+MENU = [{'name': 'Help',
+         'items': [{'type': 'Link',
+                    'menuTitle': 'Documentation',
+                    'url': about.__help_url__},
+                   {'type': 'AboutDialog',
+                    'menuTitle': 'About',
+                    'name': 'Paulissoft Application Tools for Oracle (PATO)',
+                    'description': 'Run the various PATO commands',
+                    'version': about.__version__,
+                    'copyright': about.__copyright__,
+                    'website': about.__url__,
+                    'author(s)': about.__author__,
+                    'license': about.__license__}]}]
+TERMINAL_FONT_FAMILY = 'Courier New'
+RUN_POM_FILE = 'Run POM file'
+# the interval (in seconds) for a background thread to check whether Gooey created the wx.App
+APP_POLL_INTERVAL = 0.05
+
+
+@Gooey(program='Get POM file',
+       show_success_modal=False,
+       show_failure_modal=True,
+       show_restart_button=True,
+       disable_progress_bar_animation=True,
+       clear_before_run=True,
+       default_size=DEFAULT_SIZE1,
+       menu=MENU,
+       terminal_font_family=TERMINAL_FONT_FAMILY)
+def get_POM_file(argv):
+    logger.debug('get_POM_file(%s)' % (argv))
+    parser = GooeyParser(description='Get a Maven POM file to work with')
+    parser.add_argument(
+        'file',
+        help='The POM file',
+        nargs='?',
+        widget="FileChooser",
+        gooey_options={
+            'validator': {
+                'test': "user_input[-7:] == 'pom.xml'",
+                'message': 'This is not a POM file'
+            }
+        })
+    parser.add_argument(
+        DB_CONFIG_DIR,
+        required=False,
+        help='The database configuration directory',
+        widget="DirChooser")
+    args = parser.parse_args(argv)
+    logger.debug('args: %s' % (args))
+    logger.debug('return')
+    return args
+
+
+def _warm_up(pom_file, db_config_dir, profiles, mvnd, warm_up):
+    # use the time the user needs to fill in the form
+    if warm_up and warmup.start(pom_file, db_config_dir, profiles, mvnd):
+        atexit.register(warmup.cancel, pom_file)
+
+
+def _set_title(title):
+    for window in wx.GetTopLevelWindows():
+        window.SetTitle(title)
+
+
+def _account(result):
+    """The database configuration directory and account of a process_POM result: the fields of the form depend on them."""
+    return (result[0], *result[3:])
+
+
+class _ProgressHandler(logging.Handler):
+    """Show the messages logged by a thread in the title of the GUI."""
+
+    def __init__(self, thread_id):
+        super().__init__(logging.INFO)
+        self.thread_id = thread_id
+
+    def emit(self, record):
+        if record.thread == self.thread_id and wx.GetApp() is not None:
+            wx.CallAfter(_set_title, '%s (resolving: %s)' % (RUN_POM_FILE, record.getMessage()))
+
+
+def _call_after_app(callable_, *args):
+    """wx.CallAfter for a thread that may run before Gooey created the wx.App (in the main thread)."""
+    while wx.GetApp() is None:
+        time.sleep(APP_POLL_INTERVAL)
+    wx.CallAfter(callable_, *args)
+
+
+def _restart(pom_file, db_config_dir):
+    """Start this program again for a POM file in the same process: there can be only one wx.App (and Gooey form)."""
+    argv = restart_command(pom_file, db_config_dir)
+    logger.debug('restart: %s' % (argv))
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.execv(argv[0], argv)
+
+
+class _Resolution(threading.Thread):
+    """
+    Resolve the POM file in the background while the form shows the last known choices (shown).
+    The resolved choices are seeded into the form like Gooey does for its dynamic values. When the account
+    changed, the fields of the form are different so the program is started again (the resolution is cached then).
+    """
+
+    def __init__(self, pom_file, db_config_dir, mvnd, use_cache, refresh, native, warm_up, shown):
+        super().__init__(daemon=True)
+        self.pom_file, self.db_config_dir, self.mvnd = pom_file, db_config_dir, mvnd
+        self.use_cache, self.refresh, self.native, self.warm_up = use_cache, refresh, native, warm_up
+        self.shown = shown
+        self.result = None
+
+    def run(self):
+        handler = _ProgressHandler(threading.get_ident())
+        logging.getLogger().addHandler(handler)
+        try:
+            self.result = service.resolve(self.pom_file, self.db_config_dir, self.use_cache, self.refresh, self.native)
+        except Exception as e:
+            logger.error('Could not resolve POM file %s (the choices shown may be out of date): %s' % (self.pom_file, e))
+            return
+        finally:
+            logging.getLogger().removeHandler(handler)
+        if _account(self.result) != _account(self.shown):
+            logger.info('The database configuration directory or account of the POM file changed: starting again')
+            _call_after_app(_restart, self.pom_file, self.db_config_dir)
+            return
+        _warm_up(self.pom_file, self.result[0], self.result[2], self.mvnd, self.warm_up)
+        _call_after_app(self.update_form)
+
+    def update_form(self):
+        dbs, profiles = self.result[1:3]
+        seeds = {DB: sorted(dbs, key=db_order), ACTION: profiles}
+        for window in wx.GetTopLevelWindows():
+            for config in getattr(window, 'configs', []):
+                config.seedUI(seeds)
+        _set_title(RUN_POM_FILE)
+
+
+def _run_POM_file_form(pom_file, result, mvnd):
+    db_config_dir, dbs, profiles, db_proxy_username, db_username = result
+    db_proxy_password_help = f'The password for database proxy account {db_proxy_username}'
+    db_password_help = f'The password for database account {db_username}'
+    dbs_sorted = sorted(dbs, key=db_order)
+
+    gui_construction = tracing.begin('GUI construction')
+    parser = GooeyParser(description='Get the Maven POM settings to work with and run the Maven POM file')
+
+    group0 = parser.add_argument_group('Database Information', 'Choose the database connection')
+    group0.add_argument(DB, required=True, choices=dbs_sorted, default=dbs_sorted[0], help='The database to log on to')
+    if db_proxy_username:
+        group0.add_argument(DB_PROXY_PASSWORD, required=True, widget="PasswordField", help=db_proxy_password_help)
+    else:
+        group0.add_argument(DB_PASSWORD, required=True, widget="PasswordField", help=db_password_help)
+
+    group1 = parser.add_argument_group('Other Information', 'Choose action to perform and (optionally) extra Maven command line options')
+    group1.add_argument(ACTION, required=True, choices=profiles, default=profiles[0], help='The action to perform')
+    group1.add_argument(EXTRA_MAVEN_COMMAND_LINE_OPTIONS, required=False, help='Extra Maven command line options')
+    group1.add_argument(FILTER_OUTPUT, required=False, widget='CheckBox', default=False, help='Show only the most relevant output (always for db-info)')
+    group1.add_argument(FLYWAY_SUMMARY, required=False, widget='CheckBox', default=True, help='Show a summary per module instead of the flyway info table (db-info)')
+    group1.add_argument(BATCH_OUTPUT, required=False, widget='CheckBox', default=True, help='Show the output in batches with a limited number of lines (the full output is written to a log file)')
+    group1.add_argument(FORCE, required=False, widget='CheckBox', default=False, help='Run the action even when nothing changed since its last successful run (db-install)')
+    if mvnd:
+        group1.add_argument(MVND, required=False, widget='CheckBox', default=True, help='Use the Maven daemon for a (possibly) better performance')  # , metavar='Maven daemon'
+
+    group2 = parser.add_argument_group('Information to be supplied to Maven', 'DO NOT CHANGE!')
+    group2.add_argument(
+        FILE,
+        required=True,
+        default=pom_file,
+        gooey_options={
+            'validator': {
+                'test': "hash(user_input) == {}".format(hash(pom_file)),
+                'message': 'Did you change the POM file?'
+            }
+        },
+        help='The POM file (DO NOT CHANGE!)'
+    )
+    group2.add_argument(
+        DB_CONFIG_DIR,
+        required=False,
+        default=db_config_dir,
+        gooey_options={
+            'validator': {
+                'test': "hash(user_input) == {}".format(hash(db_config_dir)),
+                'message': 'Did you change the database configuration directory?'
+            }
+        },
+        help='The database configuration directory (DO NOT CHANGE!)'
+    )
+
+    tracing.end(gui_construction)
+
+    args = parser.parse_args(list(pom_file))
+    logger.debug('args: %s' % (args))
+
+
+@Gooey(program=RUN_POM_FILE,
+       show_success_modal=True,
+       show_failure_modal=True,
+       show_restart_button=True,
+       disable_progress_bar_animation=False,
+       clear_before_run=True,
+       required_cols=3,
+       default_size=DEFAULT_SIZE2,
+       menu=MENU,
+       terminal_font_family=TERMINAL_FONT_FAMILY)
+def run_POM_file_gui(pom_file, db_config_dir, mvnd, use_cache=True, refresh=False, native=True, warm_up=True):
+    logger.debug('run_POM_file_gui({}, {}, {}, {}, {}, {}, {})'.format(pom_file, db_config_dir, mvnd, use_cache, refresh, native, warm_up))
+
+    # show the form with the last known choices while the POM file is resolved again (if there are any)
+    provisional = last_known(pom_file, db_config_dir) if use_cache else None
+    if provisional:
+        resolution = _Resolution(pom_file, db_config_dir, mvnd, use_cache, refresh, native, warm_up, provisional)
+        resolution.start()
+        _run_POM_file_form(pom_file, provisional, mvnd)
+    else:
+        result = service.resolve(pom_file, db_config_dir, use_cache, refresh, native)
+        _warm_up(pom_file, result[0], result[2], mvnd, warm_up)
+        _run_POM_file_form(pom_file, result, mvnd)
+    logger.debug('return')
+
+
+@Gooey(program='Run workspace',
+       show_success_modal=True,
+       show_failure_modal=True,
+       show_restart_button=True,
+       disable_progress_bar_animation=False,
+       clear_before_run=True,
+       required_cols=3,
+       default_size=DEFAULT_SIZE2,
+       menu=MENU,
+       terminal_font_family=TERMINAL_FONT_FAMILY)
+def run_workspace_gui(workspace, projects, db_config_dir):
+    logger.debug('run_workspace_gui({}, {}, {})'.format(workspace, [project.name for project in projects], db_config_dir))
+
+    dbs_sorted = databases(projects)
+    assert dbs_sorted, 'The projects of the workspace do not have a database in common'
+    profiles = actions(projects)
+    db_proxy_usernames = sorted({project.db_proxy_username for project in projects if project.db_proxy_username})
+    db_usernames = sorted({project.db_username for project in projects if project.db_username})
+    names = [project.name for project in projects]
+
+    gui_construction = tracing.begin('GUI construction')
+    parser = GooeyParser(description='Run an action for the projects of a workspace')
+
+    group0 = parser.add_argument_group('Database Information', 'Choose the database connection')
+    group0.add_argument(DB, required=True, choices=dbs_sorted, default=dbs_sorted[0], help='The database to log on to')
+    if db_proxy_usernames:
+        group0.add_argument(DB_PROXY_PASSWORD, required=True, widget="PasswordField", help=f'The password for database proxy account {", ".join(db_proxy_usernames)}')
+    else:
+        group0.add_argument(DB_PASSWORD, required=True, widget="PasswordField", help=f'The password for database account {", ".join(db_usernames)}')
+
+    group1 = parser.add_argument_group('Other Information', 'Choose action to perform, the projects and (optionally) extra Maven command line options')
+    group1.add_argument(ACTION, required=True, choices=profiles, default=profiles[0], help='The action to perform (for the projects having it)')
+    group1.add_argument(PROJECT, required=False, nargs='+', widget='Listbox', choices=names, default=names, help='The projects to run the action for')
+    group1.add_argument(EXTRA_MAVEN_COMMAND_LINE_OPTIONS, required=False, help='Extra Maven command line options')
+    group1.add_argument(JOBS, required=False, type=int, default=DEFAULT_JOBS, widget='IntegerField', help='The maximum number of projects to run the action for at the same time')
+
+    group2 = parser.add_argument_group('Information to be supplied to Maven', 'DO NOT CHANGE!')
+    group2.add_argument(WORKSPACE, required=True, nargs='+', default=workspace, help='The workspace directories and/or POM files (DO NOT CHANGE!)')
+    group2.add_argument(DB_CONFIG_DIR, required=False, default=db_config_dir, help='The database configuration directory (DO NOT CHANGE!)')
+
+    tracing.end(gui_construction)
+
+    args = parser.parse_args()
+    logger.debug('args: %s' % (args))
+    logger.debug('return')
@@ -0,0 +1,149 @@
+"""
+An inventory of the databases in a database configuration directory (db.config.dir).
+
+Every subdirectory is a database. The inventory keeps, per database, some key properties
+read from its *.properties files (connect identifier and usernames) and when it was last used,
+ordered by db_order. It is stored in the cache and only the modification time of the directory
+is checked to see whether it is still valid, so a (slow) network share is not listed every time.
+When the directory has changed, only the databases whose directory has changed are read again.
+Use refresh for changes that do not change the modification time of a directory,
+like editing a properties file in place.
+"""
+
+# Python modules
+import os
+import time
+import argparse
+import logging
+
+# local module(s)
+from pato_gui import cache
+
+
+__all__ = ['read_properties', 'inventory', 'databases', 'record_use', 'main']
+
+
+logger = logging.getLogger(__name__)
+
+SECTION = 'inventory'
+USAGE_SECTION = 'inventory-usage'
+
+
+def read_properties(path):
+    """
+    Read a Java properties file (key=value or key: value lines) and return a dictionary.
+
+    >>> import tempfile
+    >>> with tempfile.NamedTemporaryFile('w', suffix='.properties', delete=False) as f:
+    ...     _ = f.write('# comment\\ndb.username = SCOTT\\ndb.url: jdbc:oracle:thin:@//host:1521/\\\\\\n  orcl\\n')
+    >>> read_properties(f.name)
+    {'db.username': 'SCOTT', 'db.url': 'jdbc:oracle:thin:@//host:1521/orcl'}
+    >>> os.unlink(f.name)
+    """
+    properties = {}
+    with open(path, encoding='utf-8', errors='replace') as f:
+        line = ''
+        for part in f:
+            part = part.strip() if not line else part.lstrip().rstrip('\r\n')
+            if not line and (not part or part[0] in '#!'):
+                continue
+            if part.endswith('\\'):
+                # continued on the next line
+                line += part[:-1]
+                continue
+            line += part
+            separator = min([i for i in (line.find('='), line.find(':')) if i >= 0], default=len(line))
+            properties[line[:separator].strip()] = line[separator + 1:].strip()
+            line = ''
+    return properties
+
+
+def _database(entry):
+    """Read the key properties of a database from the *.properties files in its directory."""
+    properties = {}
+    try:
+        with os.scandir(entry.path) as it:
+            for f in sorted(it, key=lambda f: f.name):
+                if f.name.endswith('.properties') and f.is_file():
+                    properties.update(read_properties(f.path))
+    except OSError as e:
+        logger.warning('Could not read the properties of database %s: %s' % (entry.name, e))
+    connect_identifier = properties.get('db.connect.identifier', '')
+    if not connect_identifier and '@' in properties.get('db.url', ''):
+        connect_identifier = properties['db.url'].split('@', 1)[1]
+    return {'name': entry.name,
+            'mtime_ns': entry.stat().st_mtime_ns,
+            'connect_identifier': connect_identifier,
+            'db_username': properties.get('db.username', ''),
+            'db_proxy_username': properties.get('db.proxy.username', '')}
+
+
+def _scan(db_config_dir, previous):
+    """List the databases, reusing the previous information of those whose directory has not changed."""
+    from pato_gui.pom import db_order  # the pom module imports this module
+
+    previous = {db['name']: db for db in previous}
+    dbs = []
+    with os.scandir(db_config_dir) as it:
+        for entry in it:
+            if entry.is_dir():
+                db = previous.get(entry.name)
+                dbs.append(db if db and db['mtime_ns'] == entry.stat().st_mtime_ns else _database(entry))
+    return sorted(dbs, key=lambda db: db_order(db['name']))
+
+
+def inventory(db_config_dir, use_cache=True, refresh=False):
+    """
+    Return the databases of a database configuration directory ordered by db_order:
+    a list of dictionaries with name, connect_identifier, db_username, db_proxy_username and last_used (seconds since the epoch or None).
+    """
+    db_config_dir = os.path.abspath(db_config_dir)
+    key = cache.digest(db_config_dir)
+    try:
+        mtime_ns = os.stat(db_config_dir).st_mtime_ns
+    except OSError:
+        return []
+    entry = cache.load(SECTION, key, count=False) if use_cache else None
+    if entry is None or refresh or entry['mtime_ns'] != mtime_ns:
+        logger.debug('Scanning database configuration directory %s' % (db_config_dir))
+        dbs = _scan(db_config_dir, [] if entry is None or refresh else entry['databases'])
+        if use_cache:
+            cache.store(SECTION, key, {'db_config_dir': db_config_dir, 'mtime_ns': mtime_ns, 'databases': dbs})
+    else:
+        dbs = entry['databases']
+    usage = (cache.load(USAGE_SECTION, key, count=False) or {}) if use_cache else {}
+    return [dict(db, last_used=usage.get(db['name'])) for db in dbs]
+
+
+def databases(db_config_dir, use_cache=True, refresh=False):
+    """Return the names of the databases of a database configuration directory ordered by db_order."""
+    return [db['name'] for db in inventory(db_config_dir, use_cache, refresh)]
+
+
+def record_use(db_config_dir, dbs):
+    """Record the time the databases have been used."""
+    key = cache.digest(os.path.abspath(db_config_dir))
+    usage = cache.load(USAGE_SECTION, key, count=False) or {}
+    usage.update({db: time.time() for db in dbs})
+    cache.store(USAGE_SECTION, key, usage)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='List the databases of a database configuration directory (one per line, for instance for command line completion)')
+    parser.add_argument('db_config_dir', help='The database configuration directory')
+    parser.add_argument('-l', '--long', action='store_true', help='Show the connect identifier, usernames and the time last used too')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', help='Do not use the inventory in the cache')
+    parser.add_argument('--refresh', action='store_true', help='Read the database configuration directory again')
+    args = parser.parse_args(argv)
+    logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.WARNING)
+
+    for db in inventory(args.db_config_dir, args.use_cache, args.refresh):
+        if args.long:
+            last_used = time.strftime('%Y-%m-%d %H:%M', time.localtime(db['last_used'])) if db['last_used'] else '-'
+            print('\t'.join([db['name'], db['connect_identifier'] or '-', db['db_username'] or '-', db['db_proxy_username'] or '-', last_used]))
+        else:
+            print(db['name'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+Tuning of the JVM started by plain Maven (the Maven daemon has a JVM of its own).
+
+Maven runs are started with MAVEN_OPTS extended by:
+- a dynamic AppCDS archive of the classes loaded by Maven, created by the first run (Java 13+) or created
+  and refreshed by the JVM itself (Java 19+), so later runs load those classes from the archive;
+- for short actions (PRESETS), presets limiting the JIT compilation, the GC threads and sizing the heap,
+  since these actions end before the JVM would profit from the optimizing compiler.
+
+The archive lives in the cache directory (subdirectory jvm) and its name contains the Maven and Java versions:
+an archive for other versions is removed, so an upgrade of either invalidates it. Set PATO_GUI_JVM_TUNING=0
+to disable the tuning and run pato-gui-jvm benchmark to compare the wall time with and without it.
+"""
+
+# Python modules
+import os
+import re
+import sys
+import time
+import uuid
+import shlex
+import logging
+import argparse
+import statistics
+import subprocess
+from shutil import which
+from contextlib import contextmanager
+
+# local module(s)
+from pato_gui import cache
+
+
+__all__ = ['SHORT_ACTION_PRESET', 'PRESETS', 'enabled', 'java_version', 'archive_file', 'options', 'tuned_environment', 'main']
+
+
+logger = logging.getLogger(__name__)
+
+
+SHORT_ACTION_PRESET = ['-XX:TieredStopAtLevel=1', '-XX:ParallelGCThreads=2', '-XX:ConcGCThreads=1', '-Xms256m', '-Xss1m']
+
+# The presets per action ('inquiry' is the Maven inquiry of the POM settings).
+PRESETS = {
+    'inquiry': SHORT_ACTION_PRESET,
+    'db-info': SHORT_ACTION_PRESET,
+    'db-code-check': SHORT_ACTION_PRESET,
+}
+
+# The JVM warns about an archive it can not use: that is not interesting for the Maven output.
+CDS_OPTIONS = ['-Xshare:auto', '-Xlog:cds=off', '-Xlog:cds+dynamic=off']
+
+DEFAULT_ROUNDS = 3
+
+
+def enabled():
+    return os.environ.get('PATO_GUI_JVM_TUNING', '1') != '0'
+
+
+def java_version():
+    """The version of the Java used by Maven (JAVA_HOME, else the PATH) from its release file, None when unknown."""
+    from pato_gui.pom import static_version  # the pom module uses this module
+
+    java = os.path.join(os.environ['JAVA_HOME'], 'bin', 'java') if os.environ.get('JAVA_HOME') else which('java')
+    return None if java is None or not os.path.exists(java) else static_version('java', java)
+
+
+def _major(version):
+    """
+    The major version of a Java version.
+
+    >>> _major('1.8.0'), _major('17.0.9'), _major('21')
+    (8, 17, 21)
+    """
+    parts = [int(part) for part in re.findall(r'\d+', version)]
+    return parts[1] if parts[0] == 1 and len(parts) > 1 else parts[0]
+
+
+def archive_file(maven_version, java_version):
+    return cache.cache_dir() / 'jvm' / ('maven-%s-java-%s.jsa' % (maven_version, java_version))
+
+
+def options(action):
+    """
+    The JVM options for a Maven run of an action and the file the JVM dumps a new archive into (or None).
+    Archives for other Maven or Java versions are removed.
+    """
+    if not enabled() or action is None:
+        return [], None
+    from pato_gui.pom import maven_version  # the pom module uses this module
+
+    result = list(PRESETS.get(action, []))
+    maven, java = maven_version(), java_version()
+    if maven is None or java is None or _major(java) < 13:
+        return result, None
+    archive = archive_file(maven, java)
+    archive.parent.mkdir(parents=True, exist_ok=True)
+    for stale in archive.parent.glob('*.jsa'):
+        if stale != archive:
+            logger.info('Removing class data archive %s for another Maven or Java version' % (stale))
+            stale.unlink()
+    if _major(java) >= 19:
+        return result + CDS_OPTIONS + ['-XX:+AutoCreateSharedArchive', '-XX:SharedArchiveFile=%s' % (archive)], None
+    if archive.exists():
+        return result + CDS_OPTIONS + ['-XX:SharedArchiveFile=%s' % (archive)], None
+    # a file of its own, so Maven runs at the same time do not write the same file
+    dump = archive.with_name('%s.%s.tmp' % (archive.name, uuid.uuid4().hex))
+    return result + CDS_OPTIONS + ['-XX:ArchiveClassesAtExit=%s' % (dump)], dump
+
+
+@contextmanager
+def tuned_environment(action, env=None):
+    """
+    Yield a copy of env (default os.environ) with the JVM options for action (see options) in front of MAVEN_OPTS
+    and install an archive dumped by the Maven run afterwards. No action (None) means no tuning.
+    """
+    env = dict(os.environ if env is None else env)
+    jvm_options, dump = options(action)
+    if jvm_options:
+        env['MAVEN_OPTS'] = ' '.join(jvm_options + [env.get('MAVEN_OPTS', '')]).strip()
+        logger.debug('MAVEN_OPTS: %s' % (env['MAVEN_OPTS']))
+    try:
+        yield env
+    finally:
+        if dump and dump.exists():
+            archive = dump.with_name(dump.name.rsplit('.', 2)[0])
+            if dump.stat().st_size > 0:
+                os.replace(dump, archive)
+                logger.info('Created class data archive %s' % (archive))
+            else:
+                dump.unlink()
+
+
+def _time(cmd, env):
+    start = time.perf_counter()
+    returncode = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env).returncode
+    if returncode != 0:
+        raise RuntimeError('The command "%s" failed with return code %d' % (' '.join(cmd), returncode))
+    return time.perf_counter() - start
+
+
+def benchmark(cmd, action, rounds=DEFAULT_ROUNDS):
+    """
+    Run a Maven command rounds times with and rounds times without the tuning for action (alternating)
+    and return the wall times per variant. A first (untimed) run with the tuning creates the archive.
+    """
+    untuned = dict(os.environ)
+    with tuned_environment(action) as env:
+        _time(cmd, env)
+    times = {'tuned': [], 'untuned': []}
+    for _ in range(rounds):
+        with tuned_environment(action) as env:
+            times['tuned'].append(_time(cmd, env))
+        times['untuned'].append(_time(cmd, untuned))
+    return times
+
+
+def benchmark_report(times):
+    """
+    A table with the best and median wall time per variant and the time saved.
+
+    >>> print(benchmark_report({'tuned': [1.0, 1.5, 1.2], 'untuned': [2.0, 2.5, 2.2]}))
+    Variant        Best   Median
+    tuned         1.00s    1.20s
+    untuned       2.00s    2.20s
+    The tuning saves 1.00 seconds (45%) per run (median)
+    """
+    lines = ['%-10s %8s %8s' % ('Variant', 'Best', 'Median')]
+    for variant in ['tuned', 'untuned']:
+        lines.append('%-10s %7.2fs %7.2fs' % (variant, min(times[variant]), statistics.median(times[variant])))
+    tuned, untuned = statistics.median(times['tuned']), statistics.median(times['untuned'])
+    lines.append('The tuning saves %.2f seconds (%.0f%%) per run (median)' % (untuned - tuned, 100 * (untuned - tuned) / untuned))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='The JVM tuning of Maven runs: show it or compare the wall time of an action with and without it')
+    parser.add_argument('command', choices=['status', 'benchmark'], help='status or benchmark')
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help='The number of runs per variant (benchmark)')
+    args, run_argv = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+    if args.command == 'status':
+        from pato_gui.pom import maven_version  # the pom module uses this module
+
+        maven, java = maven_version(), java_version()
+        print('Maven %s, Java %s, tuning %s' % (maven, java, 'enabled' if enabled() else 'disabled'))
+        archive = archive_file(maven, java)
+        print('Class data archive: %s' % (archive if archive.exists() else 'none'))
+        for action, preset in PRESETS.items():
+            print('%-15s %s' % (action, ' '.join(preset)))
+        return
+    from pato_gui import program  # the program module uses this module
+
+    run_args, extra_maven_command_line_options = program.parse_run_POM_file_arguments([arg for arg in run_argv if arg != '--'])
+    assert run_args.action and run_args.db and run_args.file, f'Options {program.ACTION}, {program.DB} and {program.FILE} are needed'
+    if run_args.db_proxy_password or run_args.db_password:
+        os.environ['DB_PASSWORD'] = run_args.db_proxy_password or run_args.db_password
+    cmd = program.maven_command(run_args, run_args.db, extra_maven_command_line_options)
+    logger.info('Maven command to benchmark: %s' % (cmd))
+    print(benchmark_report(benchmark(shlex.split(cmd), run_args.action, args.rounds)))
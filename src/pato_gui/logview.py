@@ -0,0 +1,235 @@
+"""
+View and search (large) Maven run logs without loading them into memory (command pato-gui-log).
+
+The log is memory mapped and indexed: the offsets of the lines and the line numbers of the
+errors, warnings, plugin goals and the Reactor Summary (see MARKS) are stored in compact arrays.
+The index is cached next to the log (LOG.idx) and only the part added since is indexed when the log grows.
+The index belongs to the log when the file (inode) is the same and the head and the end of the indexed part did not change.
+A compressed log (LOG.gz, see the console module) is decompressed next to it first.
+"""
+
+# Python modules
+import os
+import re
+import sys
+import gzip
+import mmap
+import shutil
+import struct
+import hashlib
+import argparse
+import bisect
+import logging
+import itertools
+from array import array
+
+
+__all__ = ['MARKS', 'LogIndex', 'main']
+
+
+logger = logging.getLogger(__name__)
+
+# The kind of lines to jump to, with the expressions for them.
+# Every expression starts with a literal (a new line for the start of a line) since that is a lot faster than using ^.
+MARKS = {
+    'errors': [re.compile(rb'\n\[ERROR\]'), re.compile(rb'ORA-\d{5}'), re.compile(rb'PLS-\d{5}'), re.compile(rb'SP2-\d{4}')],
+    'warnings': [re.compile(rb'\n\[WARNING\]')],
+    'plugins': [re.compile(rb'\n\[INFO\] --- [^\n]+ ---(?=\r?\n)')],
+    'summary': [re.compile(rb'\n\[INFO\] (?:Reactor Summary|BUILD SUCCESS|BUILD FAILURE)')],
+}
+
+MAGIC = b'PATOIDX2'
+# magic, inode, indexed size, head and tail digest and the number of line offsets plus the number of lines per mark
+HEADER = struct.Struct('<8sQQ32s32sQ' + 'Q' * len(MARKS))
+# the size of the log head and of the end of the indexed part used to detect a log that has been replaced
+HEAD_SIZE = 4096
+# the size of the parts of the log indexed at a time
+CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def _head_digest(mm, size):
+    return hashlib.sha256(mm[:min(size, HEAD_SIZE)]).digest()
+
+
+def _tail_digest(mm, size):
+    return hashlib.sha256(mm[max(0, size - HEAD_SIZE):size]).digest()
+
+
+def _decompress(log_file):
+    """Return the name of the decompressed log, decompressing it when needed."""
+    plain_file = log_file[:-len('.gz')]
+    if not os.path.exists(plain_file) or os.path.getmtime(plain_file) < os.path.getmtime(log_file):
+        logger.info('Decompressing %s' % (log_file))
+        with gzip.open(log_file, 'rb') as src, open(plain_file, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+    return plain_file
+
+
+class LogIndex:
+    """
+    A log with its index: the offset of every line (offsets) and the line numbers per mark (marks).
+    The line numbers start at 0 and only complete lines (ending with a new line) are indexed.
+    """
+
+    def __init__(self, log_file, use_cache=True):
+        log_file = str(log_file)
+        if log_file.endswith('.gz'):
+            log_file = _decompress(log_file)
+        self.log_file = log_file
+        self.index_file = log_file + '.idx'
+        self.file = open(log_file, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.size = 0
+        self.offsets = array('Q', [0])
+        self.marks = {mark: array('Q') for mark in MARKS}
+        if not (use_cache and self._load()):
+            logger.debug('Indexing %s' % (log_file))
+        if self.size < len(self.mm):
+            self._index(self.size)
+            if use_cache:
+                self._save()
+
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        """The number of lines."""
+        return len(self.offsets) - 1
+
+    def _inode(self):
+        return os.fstat(self.file.fileno()).st_ino
+
+    def _load(self):
+        """Load the index when it belongs to this log (that may have grown since)."""
+        try:
+            with open(self.index_file, 'rb') as f:
+                header = HEADER.unpack(f.read(HEADER.size))
+                magic, inode, size, head, tail, count, *mark_counts = header
+                if magic != MAGIC or inode != self._inode() or size > len(self.mm) or \
+                        head != _head_digest(self.mm, size) or tail != _tail_digest(self.mm, size):
+                    return False
+                offsets = array('Q')
+                offsets.fromfile(f, count)
+                marks = {}
+                for mark, mark_count in zip(MARKS, mark_counts):
+                    marks[mark] = array('Q')
+                    marks[mark].fromfile(f, mark_count)
+        except (OSError, EOFError, struct.error):
+            return False
+        self.size, self.offsets, self.marks = size, offsets, marks
+        logger.debug('Loaded the index of %s with %d lines' % (self.log_file, len(self)))
+        return True
+
+    def _save(self):
+        tmp = self.index_file + '.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, self._inode(), self.size, _head_digest(self.mm, self.size), _tail_digest(self.mm, self.size), len(self.offsets),
+                                    *[len(self.marks[mark]) for mark in MARKS]))
+                self.offsets.tofile(f)
+                for mark in MARKS:
+                    self.marks[mark].tofile(f)
+            os.replace(tmp, self.index_file)
+        except OSError as e:
+            logger.warning('Could not write index %s: %s' % (self.index_file, e))
+
+    def _index(self, start):
+        """Index the complete lines from offset start (the start of a line) on."""
+        mm, offsets = self.mm, self.offsets
+        end = mm.rfind(b'\n', start) + 1
+        pos = start
+        while pos < end:
+            chunk_end = min(pos + CHUNK_SIZE, end)
+            # a chunk ends with a complete line
+            chunk_end = mm.rfind(b'\n', pos, chunk_end) + 1 or mm.find(b'\n', chunk_end) + 1
+            chunk = mm[pos:chunk_end]
+            first_line = len(offsets) - 1
+            # the offsets of the lines following each line of the chunk (computed without a Python loop)
+            offsets.extend(map(pos.__add__, itertools.accumulate(map((1).__add__, map(len, chunk.split(b'\n')[:-1])))))
+            # so every line, including the first, starts after a new line
+            data = b'\n' + chunk
+            for mark, exprs in MARKS.items():
+                numbers = set()
+                for expr in exprs:
+                    # the last character matched is in the line (pos - 1 since data starts with an extra character)
+                    numbers.update(self._line_numbers((pos - 1 + m.end() - 1 for m in expr.finditer(data)), first_line))
+                self.marks[mark].extend(sorted(numbers))
+            pos = chunk_end
+        self.size = end
+
+    def _line_numbers(self, positions, lo=0):
+        """The line numbers of increasing offsets in the log."""
+        offsets = self.offsets
+        for position in positions:
+            lo = bisect.bisect_right(offsets, position, lo) - 1
+            yield lo
+
+    def line(self, number):
+        """The text of a line (without line ending)."""
+        return self.mm[self.offsets[number]:self.offsets[number + 1] - 1].decode('utf-8', errors='replace').rstrip('\r')
+
+    def lines(self, start, count):
+        """The line numbers and text of at most count lines from line start on."""
+        for number in range(max(0, start), min(len(self), start + count)):
+            yield number, self.line(number)
+
+    def search(self, pattern, start=0, ignore_case=False):
+        """The line numbers of the lines (from line start on) matching a regular expression."""
+        expr = re.compile(pattern.encode('utf-8'), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        previous = -1
+        for number in self._line_numbers(m.start() for m in expr.finditer(self.mm, self.offsets[min(start, len(self))], self.size)):
+            if number != previous:
+                previous = number
+                yield number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='View and search a (large) Maven run log')
+    parser.add_argument('log_file', help='The log file (it may be compressed with gzip)')
+    group = parser.add_mutually_exclusive_group()
+    for mark in MARKS:
+        group.add_argument('--' + mark, dest='mark', action='store_const', const=mark, help=f'Show the {mark} lines')
+    group.add_argument('--search', metavar='REGEX', help='Show the lines matching a regular expression')
+    group.add_argument('--line', type=int, help='Show the lines from this line number on (starting with 1)')
+    parser.add_argument('-i', dest='ignore_case', action='store_true', help='Ignore case when searching')
+    parser.add_argument('-C', dest='context', type=int, default=0, help='Show this number of lines before and after each line')
+    parser.add_argument('--max', type=int, default=100, help='Show at most this number of lines (default 100)')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', help='Do not use (or write) the index file')
+    parser.add_argument('-d', dest='debug', action='store_true', help='Enable debugging')
+    args = parser.parse_args(argv)
+    logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.DEBUG if args.debug else logging.INFO)
+
+    with LogIndex(args.log_file, args.use_cache) as log:
+        if args.line is not None:
+            numbers = range(args.line - 1, args.line - 1 + args.max)
+        elif args.search:
+            numbers = log.search(args.search, ignore_case=args.ignore_case)
+        elif args.mark:
+            numbers = log.marks[args.mark]
+        else:
+            print('%s: %d lines, %s' % (log.log_file, len(log), ', '.join('%d %s' % (len(log.marks[mark]), mark) for mark in MARKS)))
+            return
+        numbers = list(itertools.islice(numbers, args.max))
+        matched = set(numbers)
+        shown = -1
+        for number in numbers:
+            if args.context and shown >= 0 and number - args.context > shown + 1:
+                print('--')
+            first = max(number - args.context, shown + 1)
+            for n, text in log.lines(first, number + args.context + 1 - first):
+                print('%d%s%s' % (n + 1, ':' if n in matched else '-', text))
+                shown = n
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
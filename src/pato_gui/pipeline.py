@@ -0,0 +1,256 @@
+"""
+Run a pipeline of PATO actions (pato-gui run-pipeline FILE).
+
+A pipeline is a TOML file with steps, where every step runs an action (profile) of a POM file
+for a database and may need other steps to succeed first:
+
+    [pipeline]
+    db = "bc_dev"                 # the default database of a step
+    db_config_dir = "../conf/src" # optional, default the one of the POM (db.config.dir)
+    jobs = 2                      # the maximum number of steps running at the same time
+
+    [[step]]
+    name = "install"
+    pom = "db/pom.xml"            # relative to the pipeline file
+    action = "db-install"
+
+    [[step]]
+    name = "test"
+    pom = "db/pom.xml"
+    action = "db-test"
+    needs = ["install"]
+
+    [[step]]
+    name = "apex"
+    pom = "apex/pom.xml"
+    action = "apex-import"
+    needs = ["install"]
+    options = ["-Dapex.application=138"]  # extra Maven command line options
+
+Every POM file is resolved once (see pom.process_POM) and all steps are checked before anything runs.
+The steps are prepared like a single run (see program.prepare_run): a step whose inputs did not change since its
+last successful run is skipped (and counts as succeeded) and the database connections of the others are checked first.
+A step starts as soon as the steps it needs have succeeded. After a failure no more steps are started:
+the steps already running finish (stopping a db-install halfway is worse) and the others are not run.
+Steps without a dependency between them may run at the same time, so they should not write the same project.
+"""
+
+# Python modules
+import os
+import time
+import asyncio
+import argparse
+import logging
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+
+# local module(s)
+from pato_gui import cache, daemon, fanout, program
+from pato_gui.pom import process_POM
+
+
+__all__ = ['PipelineStep', 'load', 'check', 'prepare', 'run_pipeline', 'report', 'main']
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS = 2
+
+
+class PipelineStep(fanout.DatabaseRun):
+    """A step of a pipeline: a Maven run with an action, a POM file, the names of the steps needed first and extra Maven command line options."""
+
+    def __init__(self, name, pom_file, action, db, needs=(), options=()):
+        super().__init__(db, None, name=name)
+        self.pom_file = pom_file
+        self.action = action
+        self.needs = list(needs)
+        self.options = list(options)
+        self.start = None
+
+
+def load(pipeline_file, db=None):
+    """Return the pipeline settings and steps of a pipeline file (a database supplied overrides the default one)."""
+    with open(pipeline_file, 'rb') as f:
+        data = tomllib.load(f)
+    settings = data.get('pipeline', {})
+    if db:
+        settings['db'] = db
+    base_dir = Path(pipeline_file).resolve().parent
+    if settings.get('db_config_dir'):
+        settings['db_config_dir'] = str(base_dir / settings['db_config_dir'])
+    steps = []
+    for i, step in enumerate(data.get('step', [])):
+        for key in ['name', 'pom', 'action']:
+            assert key in step, f'Step {i + 1} of pipeline {pipeline_file} must have a {key}'
+        steps.append(PipelineStep(step['name'],
+                                  str(base_dir / step['pom']),
+                                  step['action'],
+                                  step.get('db', settings.get('db')),
+                                  step.get('needs', []),
+                                  step.get('options', [])))
+    check(steps)
+    return settings, steps
+
+
+def check(steps):
+    """
+    Check that the step names are unique, that every step has a database and that the steps needed exist without a cycle.
+
+    >>> check([PipelineStep('a', 'pom.xml', 'db-info', 'dev', ['b']), PipelineStep('b', 'pom.xml', 'db-info', 'dev', ['a'])])  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    AssertionError: The pipeline has a cycle: a -> b -> a...
+    """
+    names = [step.name for step in steps]
+    assert len(steps) > 0, 'The pipeline must have steps'
+    assert len(set(names)) == len(names), f'The step names ({names}) must be unique'
+    by_name = {step.name: step for step in steps}
+    for step in steps:
+        assert step.db, f'Step {step.name} must have a database (db)'
+        for need in step.needs:
+            assert need in by_name, f'Step {step.name} needs unknown step {need}'
+    # depth first search for a cycle
+    state = {}
+
+    def visit(step, path):
+        if state.get(step.name) == 'done':
+            return
+        assert state.get(step.name) != 'visiting', 'The pipeline has a cycle: ' + ' -> '.join(path + [step.name])
+        state[step.name] = 'visiting'
+        for need in step.needs:
+            visit(by_name[need], path + [step.name])
+        state[step.name] = 'done'
+
+    for step in steps:
+        visit(step, [])
+
+
+def resolve(steps, db_config_dir=None, use_cache=True, native=True):
+    """
+    Resolve every POM file once, check the action and database of every step against it
+    and return the database configuration directory per POM file.
+    """
+    db_config_dirs = {}
+    for pom_file in dict.fromkeys(step.pom_file for step in steps):
+        pom_db_config_dir, dbs, profiles, _, _ = process_POM(pom_file, db_config_dir, use_cache, False, native)
+        db_config_dirs[pom_file] = pom_db_config_dir
+        for step in steps:
+            if step.pom_file == pom_file:
+                assert step.action in profiles, f'Step {step.name}: action {step.action} must be one of {profiles}'
+                assert step.db in dbs, f'Step {step.name}: database {step.db} must be one of {dbs}'
+    return db_config_dirs
+
+
+def prepare(steps, args, db_config_dirs):
+    """
+    Prepare the steps (see program.prepare_run) with the run options of args (see program.add_run_arguments) and the passwords,
+    mark the ones that can be skipped and check the database connections of the others, once per database configuration directory.
+    """
+    policies = {}
+    checks = {}
+    for step in steps:
+        step_args = argparse.Namespace(**dict(vars(args), file=step.pom_file, action=step.action, db_config_dir=db_config_dirs[step.pom_file]))
+        if step.action not in policies:
+            policies[step.action] = daemon.use_daemon(step.action, args.mvnd)
+        if program.prepare_run(step_args, step.db, step.options, step, policies[step.action]) is None:
+            step.skipped = True
+        else:
+            checks.setdefault(step_args.db_config_dir, (step_args, []))[1].append(step.db)
+    for step_args, dbs in checks.values():
+        program.preflight_check(step_args, list(dict.fromkeys(dbs)))
+
+
+async def _run_step(step, steps, tasks, log_dir, semaphore, failed, start, stop_on_failure):
+    # wait for the steps needed (they never raise)
+    await asyncio.gather(*[tasks[need] for need in step.needs])
+    async with semaphore:
+        if failed.is_set() or any(not steps[need].succeeded for need in step.needs):
+            logger.info('%s: not run because of a failure' % (step.name))
+            step.skipped = False
+            return
+        if step.skipped:
+            logger.info('%s: skipped since nothing changed since its last successful run' % (step.name))
+            return
+        step.start = time.perf_counter() - start
+        await fanout.execute(step, log_dir)
+        if step.status != 'OK' and stop_on_failure:
+            failed.set()
+
+
+async def _run_pipeline(steps, jobs, log_dir, stop_on_failure):
+    semaphore = asyncio.Semaphore(jobs)
+    failed = asyncio.Event()
+    start = time.perf_counter()
+    by_name = {step.name: step for step in steps}
+    tasks = {}
+    for step in steps:
+        tasks[step.name] = asyncio.ensure_future(_run_step(step, by_name, tasks, log_dir, semaphore, failed, start, stop_on_failure))
+    await asyncio.gather(*tasks.values())
+
+
+def run_pipeline(steps, jobs, log_dir, stop_on_failure=True):
+    """
+    Run the (prepared) steps with at most jobs at the same time, see the module documentation,
+    and record their statistics and fingerprints (see program.record_runs).
+    When stop_on_failure is False, only the steps needing a step that did not succeed are not run.
+    """
+    log_dir = Path(log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    asyncio.run(_run_pipeline(steps, max(1, jobs), log_dir, stop_on_failure))
+    program.record_runs(steps)
+    return steps
+
+
+def report(steps):
+    """
+    Return a table with the status, start (since the start of the pipeline) and duration per step.
+
+    >>> step = PipelineStep('install', 'pom.xml', 'db-install', 'bc_dev')
+    >>> step.returncode, step.start, step.duration, step.log_file = 0, 0.01, 62.5, 'install.log'
+    >>> print(report([step, PipelineStep('test', 'pom.xml', 'db-test', 'bc_dev', ['install'])]))
+    Step     Action      Database  Status   Start  Duration  Log file
+    -------  ----------  --------  -------  -----  --------  -----------
+    install  db-install  bc_dev    OK       0.0 s    62.5 s  install.log
+    test     db-test     bc_dev    NOT RUN
+    """
+    rows = [['Step', 'Action', 'Database', 'Status', 'Start', 'Duration', 'Log file']]
+    for step in steps:
+        rows.append([step.name, step.action, step.db, step.status,
+                     '' if step.start is None else '%.1f s' % (step.start),
+                     '' if step.duration is None else '%.1f s' % (step.duration),
+                     str(step.log_file or '')])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    rows.insert(1, ['-' * width for width in widths])
+    lines = []
+    for row in rows:
+        lines.append('  '.join([row[i].ljust(widths[i]) for i in range(4)] + [row[i].rjust(widths[i]) for i in range(4, 6)] + [row[6]]).rstrip())
+    return '\n'.join(lines)
+
+
+def main(argv, use_cache=True, native=True):
+    """The run-pipeline mode of pato-gui (argv is the command line after run-pipeline)."""
+    parser = argparse.ArgumentParser(prog='pato-gui run-pipeline', description='Run a pipeline of PATO actions')
+    parser.add_argument('pipeline_file', help='The pipeline file (TOML)')
+    parser.add_argument(program.DB, help='The database for the steps without one (overrides the pipeline default)')
+    parser.add_argument(program.DB_CONFIG_DIR, help='The database configuration directory')
+    parser.add_argument(program.DB_PROXY_PASSWORD, default='', help='The password for database proxy account')
+    parser.add_argument(program.DB_PASSWORD, default='', help='The password for database account')
+    parser.add_argument(program.JOBS, type=int, help=f'The maximum number of steps running at the same time (default {DEFAULT_JOBS})')
+    parser.add_argument(program.LOG_DIR, help='The directory for the log files')
+    program.add_run_arguments(parser)
+    args = parser.parse_args(argv)
+
+    settings, steps = load(args.pipeline_file, args.db)
+    db_config_dir = os.path.abspath(args.db_config_dir) if args.db_config_dir else settings.get('db_config_dir')
+    prepare(steps, args, resolve(steps, db_config_dir, use_cache, native))
+    log_dir = args.log_dir or str(cache.cache_dir() / 'runs' / time.strftime('%Y%m%d-%H%M%S'))
+    run_pipeline(steps, args.jobs or settings.get('jobs', DEFAULT_JOBS), log_dir)
+    print(report(steps), flush=True)
+    failed = [step.name for step in steps if not step.succeeded]
+    if failed:
+        raise RuntimeError('Pipeline {} failed: step(s) {} did not succeed'.format(args.pipeline_file, ', '.join(failed)))
@@ -10,20 +10,35 @@ import subprocess
 import re
 from pathlib import Path
 import logging
+import signal
+import threading
+import collections
+import zipfile
+import concurrent.futures
 from shutil import which
+import xml.etree.ElementTree as ET
 # from pkg_resources import packaging
 from packaging.version import parse as parse_version
 
+# local module(s)
+from pato_gui import cache, inventory, jvm, tracing
+
 
 # items to test
-__all__ = ['db_order', 'initialize', 'check_environment', 'process_POM']
+__all__ = ['db_order', 'initialize', 'restart_command', 'check_environment', 'pom_chain', 'maven_config_dir', 'maven_version', 'resolve_POM_settings', 'list_databases', 'process_POM', 'last_known']
 
 
-logger = None
+logger = logging.getLogger()
 
 
 DB_ORDER = {'dev': 1, 'tst': 2, 'test': 2, 'acc': 3, 'prod': 4, 'prd': 4}
 
+APEX_PROFILES = ['apex-seed-publish', 'apex-export', 'apex-import']
+DB_PROFILES = ['db-info', 'db-install', 'db-code-check', 'db-test', 'db-generate-ddl-full', 'db-generate-ddl-incr']
+
+# Gooey starts the run of the GUI form with this option: only Gooey itself (imported by the GUI) removes it from sys.argv.
+IGNORE_GOOEY = '--ignore-gooey'
+
 
 def db_order(db):
     for key in DB_ORDER.keys():
@@ -35,150 +50,713 @@ def db_order(db):
 def initialize():
     global logger
 
-    argv = [argc for argc in sys.argv[1:] if argc != '--']
+    # sys.argv keeps IGNORE_GOOEY for Gooey, but the command line program must not pass it on to Maven
+    argv = [argc for argc in sys.argv[1:] if argc not in ('--', IGNORE_GOOEY)]
 
     parser = argparse.ArgumentParser(description='Setup logging')
     parser.add_argument('-d', dest='debug', action='store_true', help='Enable debugging')
     parser.add_argument('--db-config-dir', help='The database configuration directory')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', help='Do not use the cache of POM inquiry results and environment checks')
+    parser.add_argument('--refresh', action='store_true', help='Refresh the cache of POM inquiry results and environment checks')
+    parser.add_argument('--no-native', dest='native', action='store_false', help='Always use Maven for the POM inquiry')
+    parser.add_argument('--trace', metavar='FILE', help='Write a trace (Chrome trace JSON format) of the timings to FILE')
+    parser.add_argument('--profile', action='store_true', help='Profile the Python code and print the statistics at the end')
+    parser.add_argument('--no-warm-up', dest='warm_up', action='store_false', help='Do not resolve the Maven plugins and dependencies in the background while the GUI waits for input')
+    parser.add_argument('--service', action='store_true', help='Use the background service (pato-gui-service) when it is running')
     parser.add_argument('file', nargs='?', help='The POM file')
     args, rest = parser.parse_known_args(argv)
     if args.db_config_dir:
         args.db_config_dir = os.path.abspath(args.db_config_dir)
     if args.file:
         args.file = os.path.abspath(args.file)
+    if args.trace:
+        tracing.set_trace_file(os.path.abspath(args.trace))
+    if args.service:
+        # the runs started by the GUI inherit it
+        os.environ['PATO_GUI_SERVICE'] = '1'
     logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.DEBUG if args.debug else logging.INFO)
     logger = logging.getLogger()
     if len(rest) == 0 and args.file:
-        args.mvnd = 'mvnd' in check_environment()
+        from pato_gui import service  # the service module imports this module
+
+        args.mvnd = 'mvnd' in service.environment(args.use_cache, args.refresh)
     else:
         args.mvnd = False
-    # GJP 2025-04-14 Disable mvnd since generating DDL in parallel does not work
-    args.mvnd = False
-    if '-d' in argv:
-        argv.remove('-d')
+    # GJP 2025-04-14 Generating DDL in parallel does not work with mvnd: see daemon.ACTION_POLICY
+    for option in ['-d', '--no-cache', '--refresh', '--no-native', '--profile', '--no-warm-up', '--service']:
+        if option in argv:
+            argv.remove(option)
+    if '--trace' in argv:
+        i = argv.index('--trace')
+        del argv[i:i + 2]
+    argv = [argc for argc in argv if not argc.startswith('--trace=')]
     logger.debug('argv: %s; logger: %s; args: %s' % (argv, logger, args))
     return argv, logger, args
 
 
-def check_environment():
-    programs = [
-        ['mvn', '-version', '3.3.1', None, r'Apache Maven ([0-9.]+)', True, True],
-        ['perl', '--version', '5.16.0', None, r'\(v([0-9.]+)\)', True, True],
-        # GJP 2025-04-14 sql version 22+ seems to have problems with connecting
-        ['sql', '-V', '18.0.0.0', '22.0.0.0', r'SQLcl: Release ([0-9.]+)', True, True],
-        ['java', '-version', '1.8.0', None, r'(?:java|openjdk) version "([0-9.]+).*"', False, True],  # version is printed to stderr (!#$?)
-        ['javac', '-version', '1.8.0', None, r'javac ([0-9.]+)', True, True],
-        # Apache Maven Daemon (mvnd) 1.0-m8 darwin-aarch64 native client (0f4bdb6df5e74453d8d558d292789da4e66a7933)
-        ['mvnd', '--version', '0.8.0', None, r'(?:mvnd|\(mvnd\)) ([0-9.]+)', True, False],  # Maven daemon may be there or not
-    ]
+def restart_command(pom_file, db_config_dir):
+    """
+    The command line to start this program again for a POM file, also when the POM file and database configuration
+    directory were chosen in the GUI instead of supplied on the command line.
+    """
+    argv = [argc for argc in sys.argv[1:] if argc != IGNORE_GOOEY]
+    if pom_file not in [os.path.abspath(argc) for argc in argv]:
+        argv += (['--db-config-dir', db_config_dir] if db_config_dir else []) + [pom_file]
+    # a frozen (PyInstaller) executable is the program itself
+    return [sys.executable] + argv if getattr(sys, 'frozen', False) else [sys.executable, '-m', 'pato_gui'] + argv
+
+
+PROGRAMS = [
+    ['mvn', '-version', '3.3.1', None, r'Apache Maven ([0-9.]+)', True, True],
+    ['perl', '--version', '5.16.0', None, r'\(v([0-9.]+)\)', True, True],
+    # GJP 2025-04-14 sql version 22+ seems to have problems with connecting
+    ['sql', '-V', '18.0.0.0', '22.0.0.0', r'SQLcl: Release ([0-9.]+)', True, True],
+    ['java', '-version', '1.8.0', None, r'(?:java|openjdk) version "([0-9.]+).*"', False, True],  # version is printed to stderr (!#$?)
+    ['javac', '-version', '1.8.0', None, r'javac ([0-9.]+)', True, True],
+    # Apache Maven Daemon (mvnd) 1.0-m8 darwin-aarch64 native client (0f4bdb6df5e74453d8d558d292789da4e66a7933)
+    ['mvnd', '--version', '0.8.0', None, r'(?:mvnd|\(mvnd\)) ([0-9.]+)', True, False],  # Maven daemon may be there or not
+]
+
+# The maximum number of programs to check at the same time.
+CHECK_ENVIRONMENT_WORKERS = 4
+
+
+def static_version(program, path):
+    """
+    Determine the version of a program without running it, i.e. from the files of its installation.
+    Returns None when that is not possible so the program must be run.
+    """
+    home = Path(path).resolve().parent.parent
+    try:
+        if program == 'mvn':
+            for jar in (home / 'lib').glob('maven-core-*.jar'):
+                return jar.name[len('maven-core-'):-len('.jar')]
+        elif program in ('java', 'javac'):
+            # JAVA_VERSION="17.0.9" or JAVA_VERSION="1.8.0_392"
+            m = re.search(r'^JAVA_VERSION="([0-9.]+)', (home / 'release').read_text(), re.MULTILINE)
+            if m:
+                return m.group(1)
+        elif program == 'sql':
+            for jar in sorted((home / 'lib').glob('*sqlcl*.jar')):
+                with zipfile.ZipFile(jar) as zf:
+                    m = re.search(r'^Implementation-Version: ([0-9.]+)', zf.read('META-INF/MANIFEST.MF').decode('utf-8'), re.MULTILINE)
+                if m:
+                    return m.group(1)
+    except (OSError, KeyError, zipfile.BadZipFile):
+        pass
+    return None
+
+
+def _probe_program(p, path):
+    """Return the version of a program (or None), the error when it could not be determined and the duration."""
+    with tracing.span(p[0], cat='check_environment') as event:
+        version, error = _probe_program_version(p, path)
+        event['args']['version'] = version
+    return version, error, event['dur'] / 1e6
+
+
+def _probe_program_version(p, path):
+    version, error = None, None
+    if path is None:
+        error = f'Program "{p[0]}" can not be found on the PATH'
+    else:
+        version = static_version(p[0], path)
+        if version is None:
+            proc = subprocess.run([path, p[1]], capture_output=True, text=True)
+            if proc.returncode == 0:
+                logger.debug('proc: {}'.format(proc))
+                regex = p[4]
+                output = proc.stdout if p[5] else proc.stderr
+                m = re.search(regex, output)
+                assert m, 'Could not find {} in {}'.format(regex, output)
+                version = m.group(1)
+            else:
+                error = 'Command "{0}" failed: {1}'.format(p[0] + ' ' + p[1], proc.stderr)
+    return version, error
+
+
+def _environment_cache_key(paths):
+    files = []
+    for path in paths:
+        try:
+            files.append([path, str(Path(path).resolve()), Path(path).resolve().stat().st_mtime_ns])
+        except (OSError, TypeError):
+            files.append([path, None, None])
+    return cache.digest(os.environ.get('PATH'), files)
+
+
+def check_environment(use_cache=True, refresh=False):
+    """
+    Check the versions of the programs needed (PROGRAMS) and return the names of those found.
+
+    The programs are checked concurrently and a version is read from the installation files when possible
+    (see static_version) instead of running the program. The versions found are cached for the same PATH
+    and (resolved) program locations and modification times.
+    """
+    with tracing.span('check_environment'):
+        return _check_environment(use_cache, refresh)
+
+
+def _check_environment(use_cache, refresh):
+    # p[0]: program
+    # p[1]: command line option to get the version
+    # p[2]: minimum version (including)
+    # p[3]: maximum version (excluding)
+    # p[4]: regular expression to parse for version
+    # p[5]: print stdout (True) or stderr (False)?
+    # p[6]: program mandatory?
+    paths = [which(p[0]) for p in PROGRAMS]
+    key = _environment_cache_key(paths) if use_cache else None
+    versions = cache.load('environment', key) if key and not refresh else None
+    if versions is None:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=CHECK_ENVIRONMENT_WORKERS) as executor:
+            results = list(executor.map(_probe_program, PROGRAMS, paths))
+        versions = {}
+        for p, (version, error, duration) in zip(PROGRAMS, results):
+            logger.debug('Checking program "{}" took {:.3f} seconds'.format(p[0], duration))
+            assert not (p[6]) or version is not None, error
+            if version is None:
+                logger.info(error)
+            versions[p[0]] = version
+        if key:
+            cache.store('environment', key, versions)
+
     programs_found = []
 
-    for i, p in enumerate(programs):
-        # p[0]: program
-        # p[1]: command line option to get the version
-        # p[2]: minimum version (including)
-        # p[3]: maximum version (excluding)
-        # p[4]: regular expression to parse for version
-        # p[5]: print stdout (True) or stderr (False)?
-        # p[6]: program mandatory?
-        proc = subprocess.run(p[0] + ' ' + p[1], shell=True, capture_output=True, text=True)
-        assert not (p[6]) or proc.returncode == 0, proc.stderr
-
-        if proc.returncode == 0:
-            logger.debug('proc: {}'.format(proc))
-            regex = p[4]
-            output = proc.stdout if p[5] else proc.stderr
-            m = re.search(regex, output)
-            assert m, 'Could not find {} in {}'.format(regex, output)
-            actual_version = m.group(1)
-
-            expected_min_version = p[2]
-            assert parse_version(actual_version) >= parse_version(expected_min_version), f'Version of program "{p[0]}" is "{actual_version}" which is less than the expected minimum version (including) "{expected_min_version}"'
-
-            expected_max_version = p[3]
-            if expected_max_version:
-                assert parse_version(actual_version) < parse_version(expected_max_version), f'Version of program "{p[0]}" is "{actual_version}" which is greater or equal to the expected maximum version (excluding) "{expected_max_version}"'
-
-            logger.info('Version of "{}" is "{}" and its location is "{}"'.format(p[0], actual_version, os.path.dirname(which(p[0]))))
-            programs_found.append(p[0])
-        else:
-            logger.info('Command "{0}" failed: {1}'.format(p[0] + ' ' + p[1], proc.stderr))
+    for p, path in zip(PROGRAMS, paths):
+        actual_version = versions.get(p[0])
+        if actual_version is None:
+            continue
+
+        expected_min_version = p[2]
+        assert parse_version(actual_version) >= parse_version(expected_min_version), f'Version of program "{p[0]}" is "{actual_version}" which is less than the expected minimum version (including) "{expected_min_version}"'
+
+        expected_max_version = p[3]
+        if expected_max_version:
+            assert parse_version(actual_version) < parse_version(expected_max_version), f'Version of program "{p[0]}" is "{actual_version}" which is greater or equal to the expected maximum version (excluding) "{expected_max_version}"'
+
+        logger.info('Version of "{}" is "{}" and its location is "{}"'.format(p[0], actual_version, os.path.dirname(path)))
+        programs_found.append(p[0])
 
     return programs_found
 
 
-def process_POM(pom_file, db_config_dir):
+class UnresolvablePOM(Exception):
+    """Raised by the native POM resolver for a construct that only Maven itself can resolve."""
+
+
+# Plugins that may set properties during the build: the native resolver can not predict their outcome.
+MAVEN_ONLY_PLUGINS = {'properties-maven-plugin', 'build-helper-maven-plugin', 'gmaven-plugin', 'gmavenplus-plugin', 'groovy-maven-plugin'}
+
+# The properties printed by [echoproperties] in the conf-inquiry profile that we are interested in.
+INQUIRY_PROPERTY_PREFIX = 'db.'
+
+# Properties in these namespaces are resolved by Maven: when the native resolver does not know them it gives up.
+MAVEN_PROPERTY_NAMESPACES = {'project', 'pom', 'settings', 'session', 'maven', 'java', 'os', 'user', 'env'}
+
+PROPERTY_EXPR = re.compile(r'\$\{([^}]+)\}')
+
+PROFILE_EXPR = re.compile(r"Profile Id: ([a-zA-Z0-9_.-]+) \(Active: .*, Source: pom\)")
+ECHOPROPERTIES_EXPR = re.compile(r'\[echoproperties\] ([a-zA-Z0-9_.-]+)=(.+)$')
+
+# The number of lines of the Maven inquiry error output to show when it fails.
+STDERR_TAIL_LINES = 100
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else None
+
+
+def _pom_children(element, tag=None):
+    """Return the child elements of a POM element with this (namespace less) tag, or all when tag is None."""
+    if element is None:
+        return []
+    return [child for child in element if _local_name(child.tag) is not None and (tag is None or _local_name(child.tag) == tag)]
+
+
+def _pom_find(element, path):
+    """Return the (namespace agnostic) child path of a POM element or None."""
+    for tag in path.split('/'):
+        children = _pom_children(element, tag)
+        element = children[0] if children else None
+    return element
+
+
+def _pom_text(element, path):
+    """Return the text of a (namespace agnostic) child path of a POM element or None."""
+    child = _pom_find(element, path)
+    return None if child is None else (child.text or '').strip()
+
+
+def maven_local_repository():
+    """The local Maven repository: $MAVEN_REPO_LOCAL, the localRepository from ~/.m2/settings.xml or ~/.m2/repository."""
+    if os.environ.get('MAVEN_REPO_LOCAL'):
+        return Path(os.environ['MAVEN_REPO_LOCAL'])
+    settings = Path.home() / '.m2' / 'settings.xml'
+    if settings.is_file():
+        try:
+            local_repository = _pom_text(ET.parse(settings).getroot(), 'localRepository')
+            if local_repository:
+                return Path(local_repository.replace('${user.home}', str(Path.home())))
+        except ET.ParseError:
+            pass
+    return Path.home() / '.m2' / 'repository'
+
+
+def _parent_POM_file(pom_file, parent):
+    """Find the parent POM file like Maven does: first via the relative path, next in the local repository."""
+    group_id, artifact_id, version = [_pom_text(parent, tag) for tag in ['groupId', 'artifactId', 'version']]
+    relative_path = _pom_text(parent, 'relativePath')
+    if relative_path is None:
+        relative_path = '../pom.xml'
+    if relative_path:
+        candidate = Path(pom_file).parent / relative_path
+        if candidate.is_dir():
+            candidate = candidate / 'pom.xml'
+        if candidate.is_file():
+            try:
+                if _pom_text(ET.parse(candidate).getroot(), 'artifactId') == artifact_id:
+                    return candidate.resolve()
+            except ET.ParseError:
+                pass
+    if group_id and artifact_id and version:
+        candidate = maven_local_repository().joinpath(*group_id.split('.'), artifact_id, version, f'{artifact_id}-{version}.pom')
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def pom_chain(pom_file):
     """
-    Process a single POM file and setup the GUI.
-    The POM file must be either based on an PATO parent POM for the database or Apex.
+    Return the POM file followed by its parent POM files as far as they can be found locally.
     """
-    def determine_POM_settings(pom_file, db_config_dir):
-        properties = {}
-        profiles = set()
+    chain = []
+    pom_file = Path(pom_file).resolve()
+    while pom_file is not None and pom_file not in chain:
+        chain.append(pom_file)
+        try:
+            parent = _pom_find(ET.parse(pom_file).getroot(), 'parent')
+        except ET.ParseError:
+            parent = None
+        pom_file = None if parent is None else _parent_POM_file(pom_file, parent)
+    return chain
 
-        cmd = f"mvn --file {pom_file} -B -N help:all-profiles -Pconf-inquiry compile"
-        if db_config_dir:
-            cmd += f" -Ddb.config.dir={db_config_dir}"
-        mvn = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, text=True)
-        stdout, stderr = mvn.communicate()
 
-        if mvn.returncode == 0:
-            pass
+def maven_version():
+    """
+    Determine the Maven version without starting a JVM, i.e. from the name of lib/maven-core-<version>.jar.
+    Returns None when the version can not be determined like that.
+    """
+    mvn = which('mvn')
+    return None if mvn is None else static_version('mvn', mvn)
+
+
+def list_databases(db_config_dir):
+    """Return the databases, i.e. the names of the subdirectories of the database configuration directory."""
+    try:
+        return [d.name for d in filter(Path.is_dir, Path(db_config_dir).iterdir())]
+    except Exception:
+        return []
+
+
+def POM_cache_key(pom_file, db_config_dir):
+    """The cache key for a POM inquiry: the contents of the POM chain, the database configuration directory and Maven."""
+    chain = [[str(pom), cache.file_digest(pom)] for pom in pom_chain(pom_file)]
+    return cache.digest(chain, db_config_dir, maven_version() or which('mvn'))
+
+
+def _escape_property_value(value):
+    r"""
+    Escape a property value like java.util.Properties.store() does, since that is what [echoproperties] prints.
+
+    >>> print(_escape_property_value('C:\\dev\\conf'))
+    C\:\\dev\\conf
+    """
+    escaped = ''
+    for i, ch in enumerate(value):
+        if ch in '\\:=#!':
+            escaped += '\\' + ch
+        elif ch == ' ' and i == 0:
+            escaped += '\\ '
+        elif ch in '\t\n\r\f':
+            escaped += '\\' + {'\t': 't', '\n': 'n', '\r': 'r', '\f': 'f'}[ch]
+        elif ord(ch) < 0x20 or ord(ch) > 0x7e:
+            escaped += '\\u%04X' % ord(ch)
         else:
-            returncode = mvn.returncode
-            error = ''
-            for ch in stderr:
-                error += ch
-            raise Exception(f'The command "{cmd}" failed with return code {returncode} and error:\n{error}')
+            escaped += ch
+    return escaped
 
-        # Profile Id: db-install (Active: false , Source: pom)
-        line = ''
-        for ch in stdout:
-            if ch != "\n":
-                line += ch
+
+def _interpolate(value, lookup, seen=()):
+    """
+    Interpolate ${...} expressions like Maven does: unknown properties are left as is,
+    unless Maven would have known them (MAVEN_PROPERTY_NAMESPACES).
+
+    >>> _interpolate('${a}/${b}', {'a': '${c}', 'c': 'x'}.get)
+    'x/${b}'
+    """
+    def replace(m):
+        name = m.group(1)
+        if name in seen:
+            raise UnresolvablePOM(f'Property ${{{name}}} is defined recursively')
+        resolved = lookup(name)
+        if resolved is None:
+            if name.split('.')[0] in MAVEN_PROPERTY_NAMESPACES:
+                raise UnresolvablePOM(f'Can not resolve property ${{{name}}}')
+            return m.group(0)
+        return _interpolate(resolved, lookup, seen + (name,))
+
+    return PROPERTY_EXPR.sub(replace, value)
+
+
+def _system_property(name, user_properties):
+    """Return a user (-D) property, an environment variable (env.NAME) or one of the common Java system properties."""
+    if name in user_properties:
+        return user_properties[name]
+    if name.startswith('env.'):
+        return os.environ.get(name[len('env.'):])
+    return {'user.home': str(Path.home()),
+            'user.dir': os.getcwd(),
+            'user.name': os.environ.get('USER') or os.environ.get('USERNAME'),
+            'file.separator': os.sep,
+            'path.separator': os.pathsep,
+            'line.separator': os.linesep}.get(name)
+
+
+def _profile_activation(profile, pom_dir, user_properties):
+    """
+    Return None when the profile has no activation conditions, else whether all of them hold.
+    Conditions the native resolver can not evaluate (jdk, os, packaging) raise UnresolvablePOM.
+    """
+    conditions = [child for child in _pom_children(_pom_find(profile, 'activation')) if _local_name(child.tag) != 'activeByDefault']
+    if not conditions:
+        return None
+    all_active = True
+    for condition in conditions:
+        tag = _local_name(condition.tag)
+        if tag == 'property':
+            name = _pom_text(condition, 'name') or ''
+            value = _pom_text(condition, 'value')
+            actual = _system_property(name.lstrip('!'), user_properties)
+            if value is None:
+                active = (actual is not None) != name.startswith('!')
             else:
-                logger.debug("line: %s" % (line))
-                m = re.search(r"Profile Id: ([a-zA-Z0-9_.-]+) \(Active: .*, Source: pom\)", line)
-                if m:
+                active = (actual == value.lstrip('!')) != value.startswith('!')
+        elif tag == 'file':
+            def lookup(name):
+                return str(pom_dir) if name in ('basedir', 'project.basedir') else _system_property(name, user_properties)
+
+            exists, missing = _pom_text(condition, 'exists'), _pom_text(condition, 'missing')
+            if exists:
+                active = (pom_dir / _interpolate(exists, lookup)).exists()
+            else:
+                active = not (pom_dir / _interpolate(missing or '', lookup)).exists()
+        else:
+            raise UnresolvablePOM(f'Profile {_pom_text(profile, "id")} uses a {tag} activation')
+        # evaluate all conditions so an unresolvable one is always noticed
+        all_active = all_active and active
+    return all_active
+
+
+def maven_config_dir(pom_file):
+    """The .mvn directory of the project (Maven looks for it in the directory of the POM and above) or None."""
+    for directory in Path(pom_file).resolve().parents:
+        if (directory / '.mvn').is_dir():
+            return directory / '.mvn'
+    return None
+
+
+def _maven_config_file(pom_file):
+    """The .mvn/maven.config of the project or None."""
+    config_dir = maven_config_dir(pom_file)
+    maven_config = config_dir / 'maven.config' if config_dir else None
+    return maven_config if maven_config and maven_config.is_file() else None
+
+
+def _settings_files():
+    """The user and global Maven settings files that exist."""
+    files = [Path.home() / '.m2' / 'settings.xml']
+    mvn = which('mvn')
+    if mvn:
+        files.append(Path(mvn).resolve().parent.parent / 'conf' / 'settings.xml')
+    return [f for f in files if f.is_file()]
+
+
+def _check_build_configuration(pom_file):
+    """
+    Raise UnresolvablePOM when properties or profiles come from outside the POM chain:
+    -D or -P options in .mvn/maven.config or MAVEN_ARGS, or profiles with properties in the Maven settings.
+    """
+    maven_config = _maven_config_file(pom_file)
+    for source, text in [(maven_config, maven_config.read_text(errors='replace') if maven_config else ''),
+                         ('MAVEN_ARGS', os.environ.get('MAVEN_ARGS', ''))]:
+        for option in text.split():
+            if option.startswith(('-D', '-P', '--define', '--activate-profiles')):
+                raise UnresolvablePOM(f'{source} has option {option}')
+    for settings in _settings_files():
+        try:
+            root = ET.parse(settings).getroot()
+        except ET.ParseError as e:
+            raise UnresolvablePOM(f'Can not parse {settings}: {e}')
+        for profile in _pom_children(_pom_find(root, 'profiles'), 'profile'):
+            if _pom_children(_pom_find(profile, 'properties')):
+                raise UnresolvablePOM(f'{settings} has profile {_pom_text(profile, "id")} with properties')
+
+
+def resolve_POM_settings(pom_file, db_config_dir):
+    """
+    Determine the POM settings (properties and profiles) like the Maven inquiry does but without starting a JVM.
+
+    The POM and its parent chain (see pom_chain) are read, profiles are activated like Maven does for
+    "-Pconf-inquiry" (and "-Ddb.config.dir") and the properties starting with INQUIRY_PROPERTY_PREFIX
+    are interpolated and escaped like [echoproperties] prints them.
+
+    Raises UnresolvablePOM when the outcome can not be determined reliably without Maven,
+    for instance when .mvn/maven.config or the Maven settings may set properties (see _check_build_configuration).
+    """
+    _check_build_configuration(pom_file)
+    user_properties = {'db.config.dir': str(db_config_dir)} if db_config_dir else {}
+    chain = pom_chain(pom_file)
+    models = [ET.parse(pom).getroot() for pom in chain]
+    parent = _pom_find(models[-1], 'parent')
+    if parent is not None:
+        raise UnresolvablePOM(f'Can not find the parent POM {_pom_text(parent, "groupId")}:{_pom_text(parent, "artifactId")}:{_pom_text(parent, "version")} of {chain[-1]}')
+
+    profiles = set()
+    model_properties = {}
+    # inheritance: the top parent first, the POM itself last
+    for pom, model in reversed(list(zip(chain, models))):
+        for plugin in model.iter():
+            if _local_name(plugin.tag) == 'plugin' and _pom_text(plugin, 'artifactId') in MAVEN_ONLY_PLUGINS:
+                raise UnresolvablePOM(f'{pom} uses plugin {_pom_text(plugin, "artifactId")}')
+        model_profiles = _pom_children(_pom_find(model, 'profiles'), 'profile')
+        active_profiles = []
+        default_profiles = []
+        for profile in model_profiles:
+            profile_id = _pom_text(profile, 'id')
+            profiles.add(profile_id)
+            activation = _profile_activation(profile, pom.parent, user_properties)
+            if profile_id == 'conf-inquiry' or activation:
+                active_profiles.append(profile)
+            elif activation is None and _pom_text(profile, 'activation/activeByDefault') == 'true':
+                default_profiles.append(profile)
+        # profiles active by default are only activated when no other profile of the same POM is active
+        for properties in [model] + (active_profiles or default_profiles):
+            for prop in _pom_children(_pom_find(properties, 'properties')):
+                model_properties[_local_name(prop.tag)] = (prop.text or '').strip()
+
+    project = models[0]
+    project_values = {'basedir': str(chain[0].parent),
+                      'project.basedir': str(chain[0].parent),
+                      'project.build.directory': str(chain[0].parent / 'target')}
+    for tag in ['groupId', 'artifactId', 'version', 'name', 'packaging']:
+        value = _pom_text(project, tag) or _pom_text(project, 'parent/' + tag)
+        if value is not None:
+            project_values['project.' + tag] = project_values['pom.' + tag] = value
+        value = _pom_text(project, 'parent/' + tag)
+        if value is not None:
+            project_values['project.parent.' + tag] = value
+    project_values.setdefault('project.packaging', 'jar')
+
+    def lookup(name):
+        if name in user_properties:
+            return user_properties[name]
+        if name in model_properties:
+            return model_properties[name]
+        if name in project_values:
+            return project_values[name]
+        return _system_property(name, user_properties)
+
+    properties = {}
+    for name in set(model_properties) | set(user_properties):
+        if name.startswith(INQUIRY_PROPERTY_PREFIX):
+            value = _escape_property_value(_interpolate(lookup(name), lookup))
+            # just like parse_POM_settings() ignores "[echoproperties] name="
+            if value:
+                properties[name] = value
+    return properties, profiles
+
+
+def parse_POM_settings(lines, required_profiles=None):
+    """
+    Parse the output of the Maven inquiry, an iterable of lines or a string, into properties and profiles.
+
+    The output is processed line by line so it can be read while Maven is still running.
+    When required_profiles (a list of profile sets) is supplied, parsing stops as soon as the profiles
+    found are a superset of one of them and the [echoproperties] output has ended.
+
+    >>> parse_POM_settings('  Profile Id: db-info (Active: false , Source: pom)\\n[echoproperties] db.username=SCOTT\\n')
+    ({'db.username': 'SCOTT'}, {'db-info'})
+    """
+    properties = {}
+    profiles = set()
+    debug = logger.isEnabledFor(logging.DEBUG)
+    in_echoproperties = False
+
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    for line in lines:
+        line = line.rstrip('\n')
+        if debug:
+            logger.debug("line: %s" % (line))
+        # a cheap substring test first before trying the regular expression
+        if '[echoproperties]' in line:
+            in_echoproperties = True
+            # GJP 2023-09-06 https://github.com/paulissoft/pato-gui/issues/8
+            # Change re.match() into re.search() so we can match not only from the beginning but also in the middle.
+            m = ECHOPROPERTIES_EXPR.search(line)
+            if m:
+                if debug:
+                    logger.debug("adding property %s = %s" % (m.group(1), m.group(2)))
+                properties[m.group(1)] = m.group(2)
+            continue
+        if in_echoproperties:
+            in_echoproperties = False
+            if required_profiles and any(profiles.issuperset(required) for required in required_profiles):
+                logger.debug('stop parsing: all profiles and properties have been found')
+                break
+        # Profile Id: db-install (Active: false , Source: pom)
+        if 'Profile Id: ' in line:
+            m = PROFILE_EXPR.search(line)
+            if m:
+                if debug:
                     logger.debug("adding profile: %s" % (m.group(1)))
-                    profiles.add(m.group(1))
+                profiles.add(m.group(1))
+    return properties, profiles
+
+
+def inquire_POM_settings(pom_file, db_config_dir):
+    """
+    Determine the POM settings by running the Maven inquiry (profile conf-inquiry).
+
+    The output is parsed while Maven runs and Maven is stopped as soon as everything needed has been found.
+    Only the last STDERR_TAIL_LINES lines of the error output are kept for the error message.
+    """
+    cmd = f"mvn --file {pom_file} -B -N help:all-profiles -Pconf-inquiry compile"
+    if db_config_dir:
+        cmd += f" -Ddb.config.dir={db_config_dir}"
+    with jvm.tuned_environment('inquiry') as env:
+        mvn = subprocess.Popen(cmd,
+                               stdin=subprocess.DEVNULL,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE,
+                               shell=True,
+                               text=True,
+                               # so the shell and Maven can be stopped together
+                               start_new_session=(os.name == 'posix'),
+                               env=env)
+        stderr = collections.deque(maxlen=STDERR_TAIL_LINES)
+        stderr_reader = threading.Thread(target=stderr.extend, args=(mvn.stderr,), daemon=True)
+        stderr_reader.start()
+        eof = []
+
+        def stdout_lines():
+            yield from mvn.stdout
+            eof.append(True)
+
+        try:
+            properties, profiles = parse_POM_settings(stdout_lines(), [set(APEX_PROFILES), set(DB_PROFILES)])
+        finally:
+            stopped = not eof
+            if stopped and mvn.poll() is None:
+                logger.debug('stopping the Maven inquiry early')
+                if os.name == 'posix':
+                    os.killpg(mvn.pid, signal.SIGTERM)
                 else:
-                    # GJP 2023-09-06 https://github.com/paulissoft/pato-gui/issues/8
-                    # Change re.match() into re.search() so we can match not only from the beginning but also in the middle.
-                    m = re.search(r'\[echoproperties\] ([a-zA-Z0-9_.-]+)=(.+)$', line)
-                    if m:
-                        logger.debug("adding property %s = %s" % (m.group(1), m.group(2)))
-                        properties[m.group(1)] = m.group(2)
-                line = ''
-        return properties, profiles
+                    mvn.terminate()
+            mvn.stdout.close()
+            mvn.wait()
+            stderr_reader.join()
+
+    if not stopped and mvn.returncode != 0:
+        error = ''.join(stderr)
+        raise Exception(f'The command "{cmd}" failed with return code {mvn.returncode} and error:\n{error}')
+
+    return properties, profiles
+
+
+def determine_POM_settings(pom_file, db_config_dir, native=True):
+    """
+    Determine the POM settings with the native resolver (when native is True) and fall back to the Maven inquiry.
+    """
+    if native:
+        try:
+            with tracing.span('determine_POM_settings', resolver='native'):
+                return resolve_POM_settings(pom_file, db_config_dir)
+        except (UnresolvablePOM, ET.ParseError) as e:
+            logger.info('Using Maven for the POM inquiry since the native resolver can not: %s' % (e))
+    with tracing.span('determine_POM_settings', resolver='maven'):
+        return inquire_POM_settings(pom_file, db_config_dir)
+
 
+def process_POM(pom_file, db_config_dir, use_cache=True, refresh=False, native=True):
+    """
+    Process a single POM file and setup the GUI.
+    The POM file must be either based on an PATO parent POM for the database or Apex.
+
+    The result is cached (see the cache module) unless use_cache is False.
+    When refresh is True the cache is not read but it is still written.
+    When native is False the POM settings are always determined by Maven (see determine_POM_settings).
+    The databases always come from the inventory (see the inventory module), so they are not part of the cached result.
+    """
     logger.debug('process_POM()')
-    properties, profiles = determine_POM_settings(pom_file, db_config_dir)
-    apex_profiles = ['apex-seed-publish', 'apex-export', 'apex-import']
-    db_profiles = ['db-info', 'db-install', 'db-code-check', 'db-test', 'db-generate-ddl-full', 'db-generate-ddl-incr']
-    if profiles.issuperset(set(apex_profiles)):
-        profiles = apex_profiles
-    elif profiles.issuperset(set(db_profiles)):
-        profiles = db_profiles
+    key = None
+    if use_cache:
+        key = POM_cache_key(pom_file, db_config_dir)
+        if not refresh:
+            entry = cache.load('pom', key)
+            if entry:
+                result = entry['result']
+                with tracing.span('database discovery'):
+                    result[1] = inventory.databases(result[0], use_cache, refresh)
+                logger.debug('return (cached): %s' % (result))
+                return tuple(result)
+
+    db_config_arg = db_config_dir
+    properties, profiles = determine_POM_settings(pom_file, db_config_dir, native)
+    all_profiles = sorted(profiles)
+    if profiles.issuperset(set(APEX_PROFILES)):
+        profiles = list(APEX_PROFILES)
+    elif profiles.issuperset(set(DB_PROFILES)):
+        profiles = list(DB_PROFILES)
     else:
-        raise Exception('Profiles (%s) must be a super set of either the Apex (%s) or database (%s) profiles' % (profiles, set(apex_profiles), set(db_profiles)))
+        raise Exception('Profiles (%s) must be a super set of either the Apex (%s) or database (%s) profiles' % (profiles, set(APEX_PROFILES), set(DB_PROFILES)))
     if not db_config_dir:
         # C\:\\dev\\bc\\oracle-tools\\conf\\src => C:\dev\bc\oracle-tools\conf\src =>
         db_config_dir = properties.get('db.config.dir', '').replace('\\:', ':').replace('\\\\', '\\')
     assert db_config_dir, 'The property db.config.dir must have been set in order to choose a database (on of its subdirectories)'
     logger.debug('db_config_dir: ' + db_config_dir)
 
-    p = Path(db_config_dir)
-    dbs = []
-    try:
-        dbs = [d.name for d in filter(Path.is_dir, p.iterdir())]
-    except Exception:
-        pass
+    with tracing.span('database discovery'):
+        dbs = inventory.databases(db_config_dir, use_cache, refresh)
     assert len(dbs) > 0, 'The directory %s must have subdirectories, where each one contains information for one database (and Apex) instance' % (properties['db.config.dir'])
 
     db_proxy_username = properties.get('db.proxy.username', '')
     db_username = properties.get('db.username', '')
     assert db_proxy_username or db_username, f'The database acount (Maven property db.proxy.username {db_proxy_username} or db.username {db_username}) must be set'
 
-    logger.debug('return: (%s, %s, %s, %s, %s)' % (db_config_dir, dbs, profiles, db_proxy_username, db_username))
-    return db_config_dir, dbs, profiles, db_proxy_username, db_username
+    result = (db_config_dir, dbs, profiles, db_proxy_username, db_username)
+    if key:
+        cache.store('pom', key, {'result': result,
+                                 'properties': properties,
+                                 'profiles': all_profiles})
+        cache.store('last', _last_known_key(pom_file, db_config_arg), {'result': result})
+    logger.debug('return: (%s, %s, %s, %s, %s)' % result)
+    return result
+
+
+def _last_known_key(pom_file, db_config_dir):
+    return cache.digest(os.path.abspath(pom_file), db_config_dir)
+
+
+def last_known(pom_file, db_config_dir):
+    """
+    The result of the last process_POM for the POM file (even when the POM files changed since), with the databases
+    from the inventory, or None when there is none. It provides the provisional choices of the GUI while process_POM runs.
+    """
+    entry = cache.load('last', _last_known_key(pom_file, db_config_dir), count=False)
+    if entry is None:
+        return None
+    result = entry['result']
+    result[1] = inventory.databases(result[0])
+    return tuple(result) if result[1] else None
@@ -0,0 +1,200 @@
+"""
+A preflight check of the connect details of the databases, before Maven starts.
+
+A wrong password or an unreachable database otherwise only shows up when flyway connects, after Maven
+resolved and ran the plugins before it. The check connects to every database with the username of the
+database configuration directory (db.config.dir) or the POM, through at most SESSIONS SQLcl sessions
+at the same time: a session connects to its databases one after the other, so there is one JVM start
+per session instead of per database. The whole check has a strict timeout: a database whose check did
+not end in time fails with status TIMEOUT.
+
+The probe command reads the script from its input and can be replaced (for instance by a fake sql in the tests)
+with environment variable PATO_GUI_PREFLIGHT_COMMAND.
+"""
+
+# Python modules
+import os
+import re
+import time
+import shlex
+import signal
+import logging
+import subprocess
+import concurrent.futures
+from shutil import which
+
+# local module(s)
+from pato_gui import inventory
+
+
+__all__ = ['DEFAULT_COMMAND', 'DEFAULT_TIMEOUT', 'SESSIONS', 'Probe', 'probes', 'script', 'check', 'summary']
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_COMMAND = 'sql -S /nolog'
+
+DEFAULT_TIMEOUT = 30
+
+SESSIONS = 4
+
+BEGIN = 'PATO_GUI_PREFLIGHT_BEGIN'
+END = 'PATO_GUI_PREFLIGHT_END'
+# the query concatenates it, so an echo of the query is not mistaken for its result
+OK = 'PATO_GUI_PREFLIGHT_OK'
+
+ERROR_EXPR = re.compile(r'(ORA|TNS|SP2)-\d+.*')
+
+
+class Probe:
+    """The connect details of a database and (after the check) the result."""
+
+    def __init__(self, db, connect_identifier, username, password, proxy_username=''):
+        self.db = db
+        self.connect_identifier = connect_identifier
+        self.username = username
+        self.proxy_username = proxy_username
+        self.password = password
+        self.status = None
+        self.error = None
+
+    @property
+    def login(self):
+        """
+        The login of the connect command, for a proxy account like SQLcl wants it.
+
+        >>> Probe('bc_dev', 'orcl', 'BC_APP', 'secret', 'BC_PROXY').login
+        'BC_PROXY[BC_APP]'
+        """
+        return '%s[%s]' % (self.proxy_username, self.username) if self.proxy_username else self.username
+
+
+def probes(db_config_dir, dbs, password, db_username='', db_proxy_username=''):
+    """
+    The probes for the databases: the connect identifier and usernames come from the inventory of the database
+    configuration directory, else the usernames supplied (from the POM). password is a function of the database.
+    """
+    details = {db['name']: db for db in inventory.inventory(db_config_dir)}
+    result = []
+    for db in dbs:
+        info = details.get(db, {})
+        result.append(Probe(db,
+                            info.get('connect_identifier', ''),
+                            info.get('db_username') or db_username,
+                            password(db),
+                            info.get('db_proxy_username') or db_proxy_username))
+    return result
+
+
+def script(probes):
+    """
+    The script connecting to the databases of a session one after the other.
+
+    >>> print(script([Probe('bc_dev', 'orcl', 'BC_APP', 'secret')]))
+    prompt PATO_GUI_PREFLIGHT_BEGIN bc_dev
+    connect BC_APP/"secret"@orcl
+    select 'PATO_GUI_' || 'PREFLIGHT_OK' from dual;
+    disconnect
+    prompt PATO_GUI_PREFLIGHT_END bc_dev
+    exit
+    """
+    lines = []
+    for probe in probes:
+        lines += ['prompt %s %s' % (BEGIN, probe.db),
+                  'connect %s/"%s"@%s' % (probe.login, probe.password, probe.connect_identifier),
+                  "select 'PATO_GUI_' || 'PREFLIGHT_OK' from dual;",
+                  'disconnect',
+                  'prompt %s %s' % (END, probe.db)]
+    return '\n'.join(lines + ['exit'])
+
+
+def _quotable(probe):
+    """
+    Can the connect details be put into the connect command of the script (see script)?
+
+    >>> _quotable(Probe('bc_dev', 'orcl', 'BC_APP', 'se"cret')), _quotable(Probe('bc_dev', 'orcl', 'BC_APP', 'secret\\nexit'))
+    (False, False)
+    """
+    details = [probe.connect_identifier, probe.username, probe.proxy_username, probe.password]
+    return '"' not in probe.password and not any('\n' in detail or '\r' in detail for detail in details)
+
+
+def _parse(probes, output):
+    """Set the status of the probes from the output of their session (the ones not finished keep status None)."""
+    by_db = {probe.db: probe for probe in probes}
+    probe, lines = None, []
+    for line in output.splitlines():
+        words = line.split()
+        if len(words) == 2 and words[0] == BEGIN and words[1] in by_db:
+            probe, lines = by_db[words[1]], []
+        elif len(words) == 2 and words[0] == END and probe is not None:
+            if any(OK in text for text in lines):
+                probe.status = 'OK'
+            else:
+                errors = [m.group(0) for m in map(ERROR_EXPR.search, lines) if m]
+                probe.status, probe.error = 'FAILED', (errors or [line for line in lines if line.strip()] or ['no output'])[0].strip()
+            probe = None
+        elif probe is not None:
+            lines.append(line)
+
+
+def _session(cmd, probes, deadline):
+    """Check the probes in one session of the probe command, stopping it at the deadline (a time.monotonic() value)."""
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                               start_new_session=(os.name == 'posix'))
+    try:
+        output, _ = process.communicate(script(probes), timeout=max(0, deadline - time.monotonic()))
+    except subprocess.TimeoutExpired:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+        output, _ = process.communicate()
+    _parse(probes, output)
+    for probe in probes:
+        if probe.status is None:
+            probe.status = 'TIMEOUT' if process.returncode != 0 else 'FAILED'
+            probe.error = probe.error or ('no answer in time' if probe.status == 'TIMEOUT' else 'no result')
+
+
+def check(probes, timeout=DEFAULT_TIMEOUT, command=None, sessions=SESSIONS):
+    """
+    Check the probes concurrently within timeout seconds and return them with their status:
+    OK, FAILED (also for a password with a double quote or connect details with a line break), TIMEOUT or SKIPPED
+    (no connect identifier, username or password, or no probe command).
+    """
+    cmd = shlex.split(command or os.environ.get('PATO_GUI_PREFLIGHT_COMMAND') or DEFAULT_COMMAND)
+    todo = []
+    for probe in probes:
+        if not _quotable(probe):
+            # it would end the quoted password or the command of the script (Oracle does not allow them anyway)
+            probe.status, probe.error = 'FAILED', 'the password contains a double quote or the connect details a line break'
+        elif probe.connect_identifier and probe.username and probe.password:
+            todo.append(probe)
+        else:
+            probe.status, probe.error = 'SKIPPED', 'the connect identifier, username or password is not known'
+    if todo and which(cmd[0]) is None:
+        logger.warning('Can not check the database connections without %s' % (cmd[0]))
+        for probe in todo:
+            probe.status, probe.error = 'SKIPPED', '%s not found' % (cmd[0])
+        todo = []
+    if todo:
+        deadline = time.monotonic() + timeout
+        groups = [todo[i::sessions] for i in range(min(sessions, len(todo)))]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(groups)) as executor:
+            for future in [executor.submit(_session, cmd, group, deadline) for group in groups]:
+                future.result()
+    return probes
+
+
+def summary(probes):
+    """
+    A line per database with the result of its check.
+
+    >>> probe = Probe('bc_dev', 'orcl', 'BC_APP', 'secret')
+    >>> probe.status, probe.error = 'FAILED', 'ORA-01017: invalid username/password; logon denied'
+    >>> print(summary([probe]))
+    bc_dev: FAILED (ORA-01017: invalid username/password; logon denied)
+    """
+    return '\n'.join('%s: %s%s' % (probe.db, probe.status, ' (%s)' % (probe.error) if probe.error else '') for probe in probes)
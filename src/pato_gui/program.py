@@ -5,44 +5,25 @@ The PATO GUI for launching Maven builds based on PATO.
 # Python modules
 import os
 import sys
+import asyncio
 import argparse
-import subprocess
 import shlex
-import re
-from gooey import Gooey, GooeyParser
+import subprocess
+import time
+import logging
 from shutil import which
 
 # local module(s)
-from pato_gui import about
-from pato_gui.pom import db_order, initialize, process_POM
+from pato_gui import cache, console, daemon, jvm, fanout, fingerprint, flyway, inventory, preflight, runner, stats, tracing, warmup
+from pato_gui.filters import OutputFilterEngine
+from pato_gui.pom import initialize, pom_chain, process_POM
 
 # f"" syntax
 if sys.version_info < (3, 6):
     sys.exit("Please use Python 3.6+")
 
 
-logger = None
-parse_state = ''
-parse_info_expr = re.compile(r'\[INFO\]( (.+))?')
-parse_flyway_info_expr = re.compile(r'\[INFO\] (--- (flyway|flyway-maven-plugin):(\d+\.)*\d+:info .+ ---)')
-parse_summary_expr = re.compile(r'\[INFO\] ((Reactor Summary|BUILD SUCCESS).*)')
-
-DEFAULT_SIZE1 = (1200, 600)
-DEFAULT_SIZE2 = (1500, 750)
-MENU = [{'name': 'Help',
-         'items': [{'type': 'Link',
-                    'menuTitle': 'Documentation',
-                    'url': about.__help_url__},
-                   {'type': 'AboutDialog',
-                    'menuTitle': 'About',
-                    'name': 'Paulissoft Application Tools for Oracle (PATO)',
-                    'description': 'Run the various PATO commands',
-                    'version': about.__version__,
-                    'copyright': about.__copyright__,
-                    'website': about.__url__,
-                    'author(s)': about.__author__,
-                    'license': about.__license__}]}]
-TERMINAL_FONT_FAMILY = 'Courier New'
+logger = logging.getLogger()
 
 MVND = '--mvnd'
 EXTRA_MAVEN_COMMAND_LINE_OPTIONS = '--extra-maven-command-line-options'
@@ -52,276 +33,409 @@ DB_PROXY_PASSWORD = '--db-proxy-password'
 DB_PASSWORD = '--db-password'
 FILE = '--file'
 DB_CONFIG_DIR = '--db-config-dir'
+FILTER_OUTPUT = '--filter-output'
+FLYWAY_SUMMARY = '--flyway-summary'
+JOBS = '--jobs'
+LOG_DIR = '--log-dir'
+FORMAT = '--format'
+BATCH_OUTPUT = '--batch-output'
+FORCE = '--force'
+NO_PREFLIGHT = '--no-preflight'
+PREFLIGHT_TIMEOUT = '--preflight-timeout'
 
+DEFAULT_JOBS = 4
+# Actions that do not write into the project directory, so they can run for several databases at the same time.
+PARALLEL_SAFE_ACTIONS = {'db-info', 'db-code-check'}
 
-def find_executable(executables):
-    for executable in executables:
-        if which(executable) is not None:
-            return executable
-    assert False, "None of the executables ({}) can be found on the PATH.".format(", ".join(executables))
-
-
-PYTHONW = find_executable(['pythonw3', 'pythonw', 'python3', 'python'])
-PYTHON = find_executable(['python3', 'python'])
-
-
-@Gooey(program='Get POM file',
-       show_success_modal=False,
-       show_failure_modal=True,
-       show_restart_button=True,
-       disable_progress_bar_animation=True,
-       clear_before_run=True,
-       default_size=DEFAULT_SIZE1,
-       menu=MENU,
-       terminal_font_family=TERMINAL_FONT_FAMILY)
-def get_POM_file(argv):
-    logger.debug('get_POM_file(%s)' % (argv))
-    parser = GooeyParser(description='Get a Maven POM file to work with')
-    parser.add_argument(
-        'file',
-        help='The POM file',
-        nargs='?',
-        widget="FileChooser",
-        gooey_options={
-            'validator': {
-                'test': "user_input[-7:] == 'pom.xml'",
-                'message': 'This is not a POM file'
-            }
-        })
-    parser.add_argument(
-        DB_CONFIG_DIR,
-        required=False,
-        help='The database configuration directory',
-        widget="DirChooser")
-    args = parser.parse_args(argv)
-    logger.debug('args: %s' % (args))
-    logger.debug('return')
-    return args
-
-
-@Gooey(program='Run POM file',
-       show_success_modal=True,
-       show_failure_modal=True,
-       show_restart_button=True,
-       disable_progress_bar_animation=False,
-       clear_before_run=True,
-       required_cols=3,
-       default_size=DEFAULT_SIZE2,
-       menu=MENU,
-       terminal_font_family=TERMINAL_FONT_FAMILY)
-def run_POM_file_gui(pom_file, db_config_dir, mvnd):
-    logger.debug('run_POM_file_gui({}, {}, {})'.format(pom_file, db_config_dir, mvnd))
-
-    db_config_dir, dbs, profiles, db_proxy_username, db_username = process_POM(pom_file, db_config_dir)
-    db_proxy_password_help = f'The password for database proxy account {db_proxy_username}'
-    db_password_help = f'The password for database account {db_username}'
-    dbs_sorted = sorted(dbs, key=db_order)
-
-    parser = GooeyParser(description='Get the Maven POM settings to work with and run the Maven POM file')
-
-    group0 = parser.add_argument_group('Database Information', 'Choose the database connection')
-    group0.add_argument(DB, required=True, choices=dbs_sorted, default=dbs_sorted[0], help='The database to log on to')
-    if db_proxy_username:
-        group0.add_argument(DB_PROXY_PASSWORD, required=True, widget="PasswordField", help=db_proxy_password_help)
-    else:
-        group0.add_argument(DB_PASSWORD, required=True, widget="PasswordField", help=db_password_help)
-
-    group1 = parser.add_argument_group('Other Information', 'Choose action to perform and (optionally) extra Maven command line options')
-    group1.add_argument(ACTION, required=True, choices=profiles, default=profiles[0], help='The action to perform')
-    group1.add_argument(EXTRA_MAVEN_COMMAND_LINE_OPTIONS, required=False, help='Extra Maven command line options')
-    if mvnd:
-        group1.add_argument(MVND, required=False, widget='CheckBox', default=True, help='Use the Maven daemon for a (possibly) better performance')  # , metavar='Maven daemon'
-
-    group2 = parser.add_argument_group('Information to be supplied to Maven', 'DO NOT CHANGE!')
-    group2.add_argument(
-        FILE,
-        required=True,
-        default=pom_file,
-        gooey_options={
-            'validator': {
-                'test': "hash(user_input) == {}".format(hash(pom_file)),
-                'message': 'Did you change the POM file?'
-            }
-        },
-        help='The POM file (DO NOT CHANGE!)'
-    )
-    group2.add_argument(
-        DB_CONFIG_DIR,
-        required=False,
-        default=db_config_dir,
-        gooey_options={
-            'validator': {
-                'test': "hash(user_input) == {}".format(hash(db_config_dir)),
-                'message': 'Did you change the database configuration directory?'
-            }
-        },
-        help='The database configuration directory (DO NOT CHANGE!)'
-    )
-
-    args = parser.parse_args(list(pom_file))
-    logger.debug('args: %s' % (args))
-    logger.debug('return')
-
-
-def process_output_line(line):
-    """
-Should be able to parse output like this:
-
-[INFO] --- flyway:10.12.0:info (default-cli) @ ORACLE_TOOLS ---
-[INFO] 6 SQL migrations were detected but not run because they did not follow the filename convention.
-[INFO] Set 'validateMigrationNaming' to true to fail fast and see a list of the invalid file names.
-[INFO] Database: jdbc:oracle:thin:@bc_dev (Oracle 19.27)
-[INFO] Schema version: 20210607094700
-[INFO]
-[INFO] +------------+----------------+------------------------------------------------------------+----------+---------------------+------------+----------+
-...
-+------------+----------------+------------------------------------------------------------+----------+---------------------+------------+----------+
-
-[INFO]
-
-or:
-
-[INFO] --- flyway-maven-plugin:10.12.0:info (default-cli) @ BC_UI ---
-[INFO] 4 SQL migrations were detected but not run because they did not follow the filename convention.
-[INFO] Set 'validateMigrationNaming' to true to fail fast and see a list of the invalid file names.
-[INFO] Database: jdbc:oracle:thin:@bc_dev (Oracle 19.27)
-[INFO] Schema version: 0
-[INFO]
-[INFO] +------------+---------+-----------------------------------------------------+----------+---------------------+------------+----------+
-...
-+------------+---------+-----------------------------------------------------+----------+---------------------+------------+----------+
-
-[INFO] ------------------------------------------------------------------------
-
-and return:
-
---- flyway:10.12.0:info (default-cli) @ BC_UI ---
-4 SQL migrations were detected but not run because they did not follow the filename convention.
-Set 'validateMigrationNaming' to true to fail fast and see a list of the invalid file names.
-Database: jdbc:oracle:thin:@bc_dev (Oracle 19.27)
-Schema version: 0
-
-+------------+---------+-----------------------------------------------------+----------+---------------------+------------+----------+
-...
-+------------+---------+-----------------------------------------------------+----------+---------------------+------------+----------+
+# The number of functions shown by --profile.
+PROFILE_LINES = 30
 
-"""
-    global parse_state, parse_info_expr, parse_flyway_info_expr, parse_summary_expr
 
-    debug = False
+def maven_command(args, db, extra_maven_command_line_options, policy=daemon.NO_DAEMON):
+    mvn_args = '-B'
+    cmd = '{0} {1} {2} -P{3} {4} -Ddb.config.dir={5} -Ddb={6}'.format(daemon.maven_executable(policy), FILE, args.file, args.action, mvn_args, args.db_config_dir, db)
+    if len(extra_maven_command_line_options) > 0:
+        cmd += ' ' + ' '.join(extra_maven_command_line_options)
+    sql_home = os.path.dirname(os.path.dirname(which('sql')))
+    logger.debug('sql_home: {}'.format(sql_home))
+    cmd += f' -Dsql.home="{sql_home}"'
+    return cmd
 
-    if debug:
-        print("parse_state = %r, line = %r" % (parse_state, line))
 
-    output = None
+def database_password(args, db, env=None):
+    """The password for a database: variable DB_PASSWORD_<DB> of env (default os.environ) or else the password supplied."""
+    return (os.environ if env is None else env).get('DB_PASSWORD_' + db.upper()) or args.db_proxy_password or args.db_password
 
-    if parse_state == 'summary':
-        output = line
-    elif parse_state == 'flyway_info':
-        if not line:
-            parse_state = ''
-        else:
-            m = parse_info_expr.match(line)
-            if m:
-                output = m.group(2)
-                if output is not None and output == 'Skipping Flyway execution':
-                    parse_state = 'flyway_info_skip'
-            else:
-                output = line
-    else:
-        m = parse_flyway_info_expr.match(line)
-        if m:
-            output = line  # show whole line
-            parse_state = 'flyway_info'
-        else:
-            m = parse_summary_expr.match(line)
-            if m:
-                output = line  # show whole line
-                parse_state = 'summary'
 
-    if debug:
-        print("parse_state = %r, output = %r" % (parse_state, output))
-    elif output:
-        print(output, flush=True)
-
-    return
+async def run_maven_async(cmd, handler, policy, timings=None, action=None, error_handler=None, env=None, cwd=None):
+    """
+    Run a Maven command (a list of arguments), passing every output line to handler and every error output line
+    to error_handler (without a handler the output goes to the console).
+    The module and plugin goal durations are parsed into timings (a stats.BuildTimings) when supplied.
+    The JVM of plain Maven is tuned for the action when supplied (see the jvm module).
+    For the Maven daemon the error output is monitored: a daemon failure raises daemon.DaemonFailure.
+    A Maven failure raises subprocess.CalledProcessError.
+    """
+    monitor = daemon.DaemonMonitor(error_handler or _print_stderr) if policy != daemon.NO_DAEMON else None
+    if timings:
+        handler = timings.handler(handler or _print)
+    # the Maven output is only parsed for a trace when it is written
+    tracer = tracing.MavenOutputTracer(handler or _print) if tracing.enabled() else None
+    try:
+        with tracing.span('maven run', cmd=shlex.join(cmd), policy=policy), \
+                jvm.tuned_environment(action if policy == daemon.NO_DAEMON else None, env) as env:
+            returncode = await runner.run_async(cmd, stdout_handler=tracer or handler, stderr_handler=monitor or error_handler, env=env, cwd=cwd)
+    finally:
+        if timings:
+            timings.finish()
+        if tracer:
+            tracer.finish()
+    if monitor and monitor.failed:
+        raise daemon.DaemonFailure(f'The Maven daemon failed running "{shlex.join(cmd)}"')
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, shlex.join(cmd))
+
+
+async def execute(args, run, extra_maven_command_line_options, writer=None, console_output=None, write=None, error_handler=None, cwd=None):
+    """
+    Execute a prepared run (see prepare_run) of the action of args like run_POM_file and return its flyway info parser.
+
+    The output is filtered (see output_engine) and shown in batches when console_output (a console.ConsoleOutput) is supplied,
+    else written to write (a function of text) or the console. The error output goes to error_handler or the console.
+    After a failure of the Maven daemon an idempotent action (see daemon.IDEMPOTENT_ACTIONS) is run again with plain Maven,
+    with a fresh parser and engine. The timing, the statistics and after success the fingerprint are recorded
+    (in a thread of the default executor) and the policy, return code and duration set in the run.
+    A failure raises subprocess.CalledProcessError.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        info_parser, engine = output_engine(args, writer, console_output, write)
+        handler = console_output.handler(engine) if console_output else engine
+        if handler is None and write:
+            def handler(line):
+                write(line + '\n')
+
+        timings = stats.BuildTimings()
+        start = time.perf_counter()
+        try:
+            await run_maven_async(run.cmd, handler, run.policy, timings, args.action, error_handler, run.env, cwd)
+            break
+        except daemon.DaemonFailure:
+            if args.action not in daemon.IDEMPOTENT_ACTIONS:
+                logger.error('The Maven daemon failed: action %s is not run again since it may have changed something already' % (args.action))
+                raise
+            logger.warning('The Maven daemon failed: running the action again with Maven')
+            run.policy = daemon.NO_DAEMON
+            cmd = maven_command(args, run.db, extra_maven_command_line_options, run.policy)
+            logger.info('Maven command to execute for %s: %s' % (run.name, cmd))
+            run.cmd = shlex.split(cmd)
+        except subprocess.CalledProcessError as e:
+            run.returncode, run.duration = e.returncode, time.perf_counter() - start
+            await loop.run_in_executor(None, stats.record, args.file, run.db, args.action, daemon.tool(run.policy), run.returncode, run.duration, timings)
+            raise
+        finally:
+            if engine:
+                engine.flush()
+            if console_output:
+                console_output.flush()
+    run.returncode, run.duration = 0, time.perf_counter() - start
+    await loop.run_in_executor(None, _record_success, args, run, timings)
+    return info_parser
+
+
+def _record_success(args, run, timings):
+    """Record the timing, the statistics and the fingerprint of a successful run (blocking I/O, so not on the event loop)."""
+    logger.info(daemon.record_timing(args.file, args.action, run.policy, run.duration))
+    slow = stats.record(args.file, run.db, args.action, daemon.tool(run.policy), 0, run.duration, timings)
+    if slow:
+        logger.warning(slow)
+    if run.fingerprint:
+        fingerprint.record(args.file, run.db, args.action, run.fingerprint)
+
+
+def add_run_arguments(parser):
+    """Add the options for running an action (see prepare_run and preflight_check) to an argument parser."""
+    parser.add_argument(MVND, action='store_true', help='Use the Maven daemon')
+    parser.add_argument(FORCE, action='store_true', help='Run the action even when nothing changed since its last successful run (action {})'.format(', '.join(sorted(fingerprint.AVOIDABLE_ACTIONS))))
+    parser.add_argument(NO_PREFLIGHT, dest='preflight', action='store_false', help='Do not check the database connections before Maven starts')
+    parser.add_argument(PREFLIGHT_TIMEOUT, type=float, default=preflight.DEFAULT_TIMEOUT, help='The maximum number of seconds for the check of the database connections')
 
 
-def run_POM_file(argv):
-    logger.debug('run_POM_file(%s)' % (argv))
+def parse_run_POM_file_arguments(argv):
+    """Return the arguments of run_POM_file and the extra Maven command line options (the unknown arguments)."""
     parser = argparse.ArgumentParser(description='Get the POM settings to work with and run the POM file')
     db_proxy_password_help = 'The password for database proxy account'
     db_password_help = 'The password for database account'
     # 4 positional arguments
     parser.add_argument(ACTION, help='The action to perform')
-    parser.add_argument(DB, help='The database to log on to')
+    parser.add_argument(DB, help='The database to log on to: a comma separated list or "all" runs the action for each one')
     parser.add_argument(DB_PROXY_PASSWORD, default='', required=False, help=db_proxy_password_help)
     parser.add_argument(DB_PASSWORD, default='', required=False, help=db_password_help)
     parser.add_argument(FILE, help='The POM file')
     parser.add_argument(DB_CONFIG_DIR, help='The database configuration directory')
-    parser.add_argument(MVND, action='store_true', help='Use the Maven daemon')
+    parser.add_argument(FILTER_OUTPUT, action='store_true', help='Show only the most relevant output')
+    parser.add_argument(FLYWAY_SUMMARY, action='store_true', help='Show a summary per module instead of the flyway info table (action db-info)')
+    parser.add_argument(JOBS, type=int, default=DEFAULT_JOBS, help='The maximum number of databases to run the action for at the same time')
+    parser.add_argument(LOG_DIR, help='The directory for the log files when running for several databases or with ' + BATCH_OUTPUT)
+    parser.add_argument(BATCH_OUTPUT, action='store_true', help='Write the output in batches with a limited number of lines and the full output to a compressed log file')
+    add_run_arguments(parser)
+    parser.add_argument(FORMAT, choices=flyway.FORMATS, help='Write the flyway info migrations (action db-info) in this format to stdout (other output goes to stderr)')
     args, extra_maven_command_line_options = parser.parse_known_args(argv)
     logger.debug('args: %s; extra_maven_command_line_options: %s' % (args, extra_maven_command_line_options))
     try:
         extra_maven_command_line_options.remove(EXTRA_MAVEN_COMMAND_LINE_OPTIONS)
     except Exception:
         pass
+    return args, extra_maven_command_line_options
 
-    mvn_args = '-B'
-    cmd = '{0} {1} {2} -P{3} {4} -Ddb.config.dir={5} -Ddb={6}'.format('mvnd' if args.mvnd else 'mvn', FILE, args.file, args.action, mvn_args, args.db_config_dir, args.db)
-    if len(extra_maven_command_line_options) > 0:
-        cmd += ' ' + ' '.join(extra_maven_command_line_options)
-    sql_home = os.path.dirname(os.path.dirname(which('sql')))
-    logger.debug('sql_home: {}'.format(sql_home))
-    cmd += f' -Dsql.home="{sql_home}"'
-#    if args.action == 'db-info':
-#        cmd +='| grep '
-    logger.info('Maven command to execute: %s' % (cmd))
-    # now add the password
-    if args.db_proxy_password:
-        os.environ['DB_PASSWORD'] = args.db_proxy_password
-    elif args.db_password:
-        os.environ['DB_PASSWORD'] = args.db_password
 
-    # Run the command as a subprocess so we can process flyway:info (or flyway-maven-plugin:info) output and let other flyway output unchanged
+def run_POM_file(argv):
+    logger.debug('run_POM_file(%s)' % (argv))
+    args, extra_maven_command_line_options = parse_run_POM_file_arguments(argv)
+
+    assert args.db != 'all' or args.db_config_dir, f'Database "all" needs option {DB_CONFIG_DIR}'
+    dbs = inventory.databases(args.db_config_dir) if args.db == 'all' else args.db.split(',')
+    if not dbs:
+        raise RuntimeError('There are no databases in database configuration directory %s' % (args.db_config_dir))
+    # the single run needs the database itself, not "all"
+    args.db = dbs[0] if len(dbs) == 1 else args.db
+    # the Maven run needs the machine (and the local repository) now
+    warm_up = warmup.cancel(args.file)
+    if len(dbs) > 1:
+        run_POM_file_fan_out(args, dbs, extra_maven_command_line_options)
+        logger.debug('return')
+        return
+
+    run = prepare_run(args, args.db, extra_maven_command_line_options)
+    if run is None:
+        logger.debug('return')
+        return
+    preflight_check(args, dbs)
+    median = stats.median(args.file, args.db, args.action, daemon.tool(run.policy)) if warm_up else None
 
-    if args.action != 'db-info':
-        subprocess.run(shlex.split(cmd), check=True, shell=False)
-    else:
-        exit_code = None
-        with subprocess.Popen(shlex.split(cmd),
-                              shell=False,
-                              # We pipe the output to an internal pipe
-                              stdout=subprocess.PIPE,
-                              # Make sure that if this Python program is killed, this gets killed too
-                              preexec_fn=os.setsid) as process:
-            # Poll for output, note: readline() blocks efficiently until there is output with a newline
-            while True:
-                output = process.stdout.readline()
-                # If the output is not empty, feed it to the function, strip the newline first
-                if output:
-                    process_output_line(output.strip().decode("utf-8"))
-                else:
-                    # Polling returns None when the program is still running, exit_code otherwise
-                    exit_code = process.poll()
-                    if exit_code is not None:
-                        break
-
-        # Program ended, get exit/return code
-        if exit_code is not None and exit_code != 0:
-            raise RuntimeError("Command '{}' finished with exit code {}".format(cmd, exit_code))
-
-    os.environ['DB_PASSWORD'] = ''
+    # Run the command as a subprocess so we can process flyway:info (or flyway-maven-plugin:info) output and let other flyway output unchanged
+    writer = flyway.writer(args.format, sys.stdout) if args.format and args.action == 'db-info' else None
+    console_output = console.ConsoleOutput(console.spill_file_name(run_log_dir(args), args.action, args.db)) if args.batch_output else None
+    try:
+        info_parser = asyncio.run(execute(args, run, extra_maven_command_line_options, writer, console_output))
+    finally:
+        if console_output:
+            console_output.close()
+    if warm_up:
+        logger.info(warmup.report(warm_up, run.duration, median))
+    if writer:
+        writer.close()
+    if args.action == 'db-info':
+        logger.info(str(info_parser.summary))
     logger.debug('return')
 
 
+def output_engine(args, writer, console_output, write=None):
+    """
+    Return a flyway info parser (writing migrations to writer when supplied) and the output filter engine for a Maven run (or None).
+    The engine writes to write (default stderr with a writer, else the console output or the console).
+    """
+    info_parser = flyway.FlywayInfoParser(args.db, writer.write if writer else None)
+    write = write or (_write_stderr if writer else (console_output.write if console_output else None))
+    engine = OutputFilterEngine.for_action(args.action, info_parser=info_parser, summary=args.flyway_summary, write=write) \
+        if args.action == 'db-info' or args.filter_output else None
+    return info_parser, engine
+
+
+def preflight_check(args, dbs, env=None):
+    """
+    Check the connections to the databases (see the preflight module) and raise a RuntimeError when one fails.
+    The passwords come from env (default os.environ, see database_password).
+    The use of the databases is recorded in the inventory once the check passed.
+    """
+    if not dbs:
+        return
+    if args.preflight and args.db_config_dir:
+        _preflight_check(args, dbs, env)
+    if args.db_config_dir:
+        inventory.record_use(args.db_config_dir, dbs)
+
+
+def _preflight_check(args, dbs, env):
+    details = {db['name']: db for db in inventory.inventory(args.db_config_dir)}
+    db_username, db_proxy_username = '', ''
+    if not all(details.get(db, {}).get('db_username') for db in dbs):
+        # the usernames of the POM file (process_POM is cheap once cached)
+        try:
+            _, _, _, db_proxy_username, db_username = process_POM(args.file, args.db_config_dir)
+        except Exception as e:
+            logger.warning('Could not determine the database account of POM file %s: %s' % (args.file, e))
+    with tracing.span('preflight'):
+        probes = preflight.check(preflight.probes(args.db_config_dir, dbs, lambda db: database_password(args, db, env), db_username, db_proxy_username),
+                                 args.preflight_timeout)
+    logger.info('Database connections:\n%s' % (preflight.summary(probes)))
+    if all(probe.status == 'SKIPPED' for probe in probes):
+        logger.warning('None of the database connections could be checked: a wrong password or an unreachable database only shows up when Maven runs')
+    failed = [probe.db for probe in probes if probe.status not in ('OK', 'SKIPPED')]
+    if failed:
+        raise RuntimeError('Can not connect to database(s) {}: see the database connections above (use {} to skip this check)'.format(', '.join(failed), NO_PREFLIGHT))
+
+
+def avoid_build(args, db, extra_maven_command_line_options):
+    """
+    Return the fingerprint of the inputs of the action (None when it can not be skipped, see the fingerprint module)
+    and whether to skip the action since nothing changed since its last successful run.
+    """
+    if args.action not in fingerprint.AVOIDABLE_ACTIONS:
+        return None, False
+    fp = fingerprint.fingerprint(args.file, args.db_config_dir, db, args.action, extra_maven_command_line_options)
+    last_run = None if args.force else fingerprint.unchanged(args.file, db, args.action, fp)
+    if last_run:
+        logger.info('Skipping action %s for database %s since nothing changed since its last successful run at %s (use %s to run it anyway)' %
+                    (args.action, db, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_run)), FORCE))
+    return fp, last_run is not None
+
+
+def prepare_run(args, db, extra_maven_command_line_options, run=None, policy=None):
+    """
+    Prepare the Maven run of the action of args (the options of run_POM_file) for a database like run_POM_file does:
+    return None when it can be skipped (see avoid_build), else the run (a fanout.DatabaseRun, default a new one)
+    with the fingerprint, the Maven daemon policy (default the one of use_daemon), the command and the environment
+    (default os.environ) with the password.
+    """
+    fp, skip = avoid_build(args, db, extra_maven_command_line_options)
+    if skip:
+        return None
+    run = run or fanout.DatabaseRun(db, None)
+    run.pom_file, run.action, run.fingerprint = args.file, args.action, fp
+    run.policy = policy or daemon.use_daemon(args.action, args.mvnd)
+    cmd = maven_command(args, db, extra_maven_command_line_options, run.policy)
+    logger.info('Maven command to execute for %s: %s' % (run.name, cmd))
+    run.cmd = shlex.split(cmd)
+    run.env = dict(os.environ if run.env is None else run.env)
+    password = database_password(args, db, run.env)
+    if password:
+        run.env['DB_PASSWORD'] = password
+    return run
+
+
+def record_runs(runs):
+    """Record the statistics of the runs (see prepare_run) and the fingerprint of the successful ones."""
+    for run in runs:
+        if run.returncode is not None:
+            slow = stats.record_log(run.pom_file, run.db, run.action, daemon.tool(run.policy), run.returncode, run.duration, run.log_file)
+            if slow:
+                logger.warning('%s: %s' % (run.name, slow))
+        if run.status == 'OK' and run.fingerprint:
+            fingerprint.record(run.pom_file, run.db, run.action, run.fingerprint)
+
+
+def run_log_dir(args, name=''):
+    """The directory for log files: option --log-dir or else a directory in the cache."""
+    log_dir = args.log_dir or str(cache.cache_dir() / 'runs')
+    if name:
+        log_dir = os.path.join(log_dir, name)
+    os.makedirs(log_dir, exist_ok=True)
+    return log_dir
+
+
+def run_POM_file_fan_out(args, dbs, extra_maven_command_line_options):
+    """Run the action for several databases, see the fanout module."""
+    jobs = args.jobs
+    policy = daemon.use_daemon(args.action, args.mvnd)
+    if args.action not in PARALLEL_SAFE_ACTIONS and jobs > 1:
+        logger.warning('Action %s changes the project directory so it is run for one database at a time' % (args.action))
+        jobs = 1
+    log_dir = run_log_dir(args, time.strftime('%Y%m%d-%H%M%S'))
+    runs = [run for run in [prepare_run(args, db, extra_maven_command_line_options, policy=policy) for db in dbs] if run]
+    if jobs > 1 and len(runs) > 1:
+        # the build output (target) of concurrent runs for the same project must be kept apart
+        project_dir = os.path.commonpath([str(pom_file.parent) for pom_file in pom_chain(args.file)])
+        for run in runs:
+            run.project_dir = project_dir
+    preflight_check(args, [run.db for run in runs])
+    runs = fanout.fan_out(runs, jobs, log_dir)
+    record_runs(runs)
+    output = sys.stderr if args.format else sys.stdout
+    print(fanout.summary(runs), file=output, flush=True)
+    if args.action == 'db-info':
+        print(flyway_info(runs, args.format), file=output, flush=True)
+    failed = [run.db for run in runs if run.status != 'OK']
+    if failed:
+        raise RuntimeError('Action {} failed for database(s) {}'.format(args.action, ', '.join(failed)))
+
+
+def flyway_info(runs, format=None):
+    """
+    Parse the flyway info output in the log files of the runs, write the migrations in a format (if any) to stdout
+    and return a table with the summary per database.
+    """
+    writer = flyway.writer(format, sys.stdout) if format else None
+    summaries = []
+    for run in runs:
+        info_parser = flyway.FlywayInfoParser(run.db, writer.write if writer else None)
+        if run.log_file:
+            with open(run.log_file, encoding='utf-8') as log:
+                for line in log:
+                    info_parser.feed(line.rstrip('\n'))
+        summaries.append(info_parser.summary)
+    if writer:
+        writer.close()
+    return flyway.summary_table(summaries)
+
+
+def _write_stderr(text):
+    sys.stderr.write(text)
+    sys.stderr.flush()
+
+
+def _print(line):
+    print(line, flush=True)
+
+
+def _print_stderr(line):
+    print(line, file=sys.stderr, flush=True)
+
+
 def main():
     global logger
 
-    argv, logger, args = initialize()
-    if len(argv) <= 4:
-        if not args.file:
-            args = get_POM_file(argv)
-        run_POM_file_gui(args.file, args.db_config_dir, args.mvnd)
-    else:
-        run_POM_file(argv)
+    profiler = None
+    # check the command line here so the initialization is profiled too
+    if '--profile' in sys.argv:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        with tracing.span('initialize'):
+            argv, logger, args = initialize()
+        if argv[:1] == ['run-pipeline']:
+            from pato_gui import pipeline
+
+            pipeline.main(argv[1:], args.use_cache, args.native)
+        elif '--workspace' in argv:
+            from pato_gui import workspace
+
+            workspace.main(argv, args.use_cache, args.refresh, args.native)
+        elif len(argv) <= 4:
+            # only the GUI needs Gooey (and wxPython): import it as late as possible
+            from pato_gui import gui
+
+            if not args.file:
+                file_args = gui.get_POM_file(argv)
+                args.file, args.db_config_dir = file_args.file, file_args.db_config_dir
+            gui.run_POM_file_gui(args.file, args.db_config_dir, args.mvnd, args.use_cache, args.refresh, args.native, args.warm_up)
+        else:
+            from pato_gui import service  # the service module imports this module
+
+            final = None
+            if service.enabled() and service.available():
+                final = service.submit(argv)
+            if final is None:
+                run_POM_file(argv)
+            elif final['status'] not in ('OK', 'skipped'):
+                raise RuntimeError('Job {} of the service: {}'.format(final['job'], final['status']))
+    finally:
+        if profiler:
+            import pstats
+
+            profiler.disable()
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        if tracing.enabled():
+            tracing.write_trace()
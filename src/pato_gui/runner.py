@@ -0,0 +1,135 @@
+"""
+Run a (Maven) command as a subprocess using asyncio.
+
+Standard output and error are read concurrently and every line is passed to a handler.
+Without a handler the output goes straight to the console, so there is nothing to do for Python.
+The process is started in its own process group (POSIX) so cancelling stops the whole group.
+Since the group does not get the signals of this program anymore, a SIGTERM (like the Stop button of the GUI)
+or SIGINT of this program stops the groups of the running processes first (only in the main thread).
+"""
+
+# Python modules
+import os
+import signal
+import asyncio
+import logging
+import threading
+import subprocess
+
+
+__all__ = ['run_async', 'run']
+
+
+logger = logging.getLogger(__name__)
+
+# The maximum length of an output line.
+LINE_LIMIT = 16 * 1024 * 1024
+
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+# The running processes per event loop.
+_processes = {}
+
+
+async def _read_lines(stream, handler):
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+        handler(line.decode('utf-8', errors='replace').rstrip('\r\n'))
+
+
+def _terminate(process):
+    if process.returncode is not None:
+        return
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGTERM)
+        else:
+            process.terminate()
+    except ProcessLookupError:
+        pass
+
+
+def _handles_signals():
+    return os.name == 'posix' and threading.current_thread() is threading.main_thread()
+
+
+def _restore_signals(loop):
+    _processes.pop(loop, None)
+    if _handles_signals():
+        for signum in STOP_SIGNALS:
+            loop.remove_signal_handler(signum)
+
+
+def _stop(loop, signum):
+    logger.debug('stopping the running processes on signal %d' % (signum))
+    for process in list(_processes.get(loop, ())):
+        _terminate(process)
+    _restore_signals(loop)
+    # now the default behaviour: stop this program
+    os.kill(os.getpid(), signum)
+
+
+def _watch(process):
+    loop = asyncio.get_running_loop()
+    processes = _processes.setdefault(loop, set())
+    if not processes and _handles_signals():
+        for signum in STOP_SIGNALS:
+            loop.add_signal_handler(signum, _stop, loop, signum)
+    processes.add(process)
+
+
+def _unwatch(process):
+    loop = asyncio.get_running_loop()
+    processes = _processes.get(loop)
+    if processes is not None:
+        processes.discard(process)
+        if not processes:
+            _restore_signals(loop)
+
+
+async def run_async(cmd, stdout_handler=None, stderr_handler=None, env=None, cwd=None):
+    """
+    Run a command (a list of arguments) and return its exit code.
+
+    Each line of standard output (error) is passed without line ending to stdout_handler (stderr_handler).
+    When the task is cancelled the process group is terminated and the cancellation is propagated.
+    """
+    process = await asyncio.create_subprocess_exec(*cmd,
+                                                   stdin=subprocess.DEVNULL,
+                                                   stdout=subprocess.PIPE if stdout_handler else None,
+                                                   stderr=subprocess.PIPE if stderr_handler else None,
+                                                   env=env,
+                                                   cwd=cwd,
+                                                   limit=LINE_LIMIT,
+                                                   # Make sure that if this Python program is killed, this gets killed too
+                                                   **({'start_new_session': True} if os.name == 'posix' else {}))
+    logger.debug('started process %d: %s' % (process.pid, cmd))
+    _watch(process)
+    readers = []
+    if stdout_handler:
+        readers.append(_read_lines(process.stdout, stdout_handler))
+    if stderr_handler:
+        readers.append(_read_lines(process.stderr, stderr_handler))
+    try:
+        await asyncio.gather(*readers)
+        return await process.wait()
+    except BaseException:
+        # cancelled or a handler failed
+        _terminate(process)
+        await asyncio.shield(process.wait())
+        raise
+    finally:
+        _unwatch(process)
+
+
+def run(cmd, stdout_handler=None, stderr_handler=None, env=None, cwd=None, check=True):
+    """
+    Run a command like run_async() and return its exit code.
+    When check is True a non zero exit code raises subprocess.CalledProcessError.
+    """
+    returncode = asyncio.run(run_async(cmd, stdout_handler, stderr_handler, env, cwd))
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+    return returncode
@@ -0,0 +1,376 @@
+"""
+A background service (pato-gui-service) that keeps the resolved state warm between invocations.
+
+The service listens on a Unix socket ($PATO_GUI_SOCKET or service.sock in the cache directory) and keeps
+the environment check and the resolved POM files (see pom.process_POM, with their databases from the inventory)
+in memory. Clients (pato-gui --service or PATO_GUI_SERVICE=1, so the runs started by the GUI too) submit
+an action as a job and receive its (filtered) output while it runs. A job runs like run_POM_file does
+(build avoidance, the check of the database connection, the Maven daemon policy, JVM tuning and statistics).
+Jobs are queued and at most --jobs run at the same time. A job is cancelled (the Maven process group stopped) by pato-gui-service cancel JOB
+or when its client disconnects, for instance after Ctrl-C. A job runs as the user of the service, so only that user
+can connect: the socket is created without access for others and connections of other users (SO_PEERCRED) are refused.
+
+The protocol is JSON, one message per line and one request per connection:
+
+    {"request": "run", "argv": [...], "env": {...}}   -> {"job": 1, "status": "queued"}, {"job": 1, "output": "..."}, ...,
+                                                         {"job": 1, "status": "OK", "returncode": 0}
+    {"request": "resolve", "file": ..., "db_config_dir": ..., "refresh": false, "native": true}  -> {"result": [...]}
+    {"request": "environment"}                        -> {"programs": [...]}
+    {"request": "status"}                             -> {"jobs": [...]}
+    {"request": "cancel", "job": 1}                   -> {"cancelled": true}
+    {"request": "shutdown"}                           -> {"stopped": true}
+
+Any request may be answered by {"error": "..."}.
+"""
+
+# Python modules
+import os
+import sys
+import json
+import time
+import socket
+import struct
+import asyncio
+import argparse
+import logging
+import subprocess
+import collections
+
+# local module(s)
+from pato_gui import cache, daemon, fanout, inventory, program, runner
+from pato_gui.pom import POM_cache_key, check_environment, process_POM
+
+
+__all__ = ['socket_path', 'enabled', 'available', 'Service', 'submit', 'resolve', 'environment', 'main']
+
+
+logger = logging.getLogger(__name__)
+
+# The number of finished jobs kept for the status.
+MAX_FINISHED_JOBS = 100
+
+# The number of seconds a client waits for a connection.
+CONNECT_TIMEOUT = 2
+
+LINE_LIMIT = runner.LINE_LIMIT
+
+
+def socket_path():
+    """The path of the Unix socket of the service."""
+    return os.environ.get('PATO_GUI_SOCKET') or str(cache.cache_dir() / 'service.sock')
+
+
+def enabled():
+    """Should the clients use the service (option --service or environment variable PATO_GUI_SERVICE)?"""
+    return os.environ.get('PATO_GUI_SERVICE', '') not in ('', '0')
+
+
+class Job:
+    def __init__(self, id, args, extra_maven_command_line_options, env, cwd):
+        self.id = id
+        self.args = args
+        self.extra_maven_command_line_options = extra_maven_command_line_options
+        self.env = env
+        self.cwd = cwd
+        self.status = 'queued'
+        self.returncode = None
+        self.submitted = time.time()
+        self.duration = None
+        self.task = None
+
+    def info(self):
+        return {'job': self.id, 'action': self.args.action, 'db': self.args.db, 'file': self.args.file,
+                'status': self.status, 'submitted': self.submitted, 'duration': self.duration}
+
+
+class Service:
+    """The state and the request handlers of the service."""
+
+    def __init__(self, jobs=program.DEFAULT_JOBS, use_cache=True, native=True):
+        self.max_jobs = max(1, jobs)
+        self.semaphore = None
+        self.stopped = None
+        self.use_cache = use_cache
+        self.native = native
+        self.jobs = collections.OrderedDict()
+        self.last_id = 0
+        self.poms = {}
+        self.programs = None
+
+    async def serve(self, path):
+        """Listen on the socket until a shutdown request."""
+        self.semaphore = asyncio.Semaphore(self.max_jobs)
+        self.stopped = asyncio.Event()
+        if os.path.exists(path):
+            os.unlink(path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # the socket is created without access for others: a client may run commands as the user of the service
+        umask = os.umask(0o077)
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=path, limit=LINE_LIMIT)
+        finally:
+            os.umask(umask)
+        logger.info('Listening on %s' % (path))
+        try:
+            async with server:
+                await self.stopped.wait()
+                for job in self.jobs.values():
+                    if job.task and not job.task.done():
+                        job.task.cancel()
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    async def _handle(self, reader, writer):
+        def send(message):
+            writer.write((json.dumps(message) + '\n').encode('utf-8'))
+
+        try:
+            uid = _peer_uid(writer.get_extra_info('socket'))
+            if uid is not None and uid != os.getuid():
+                raise PermissionError(f'The client runs as user {uid}, not as the user of the service')
+            message = json.loads(await reader.readline() or 'null')
+            request = message.get('request') if isinstance(message, dict) else None
+            if request == 'run':
+                await self._run(message, reader, send)
+            elif request == 'resolve':
+                send({'result': await self.resolve(message['file'], message.get('db_config_dir'), message.get('refresh', False), message.get('native', self.native))})
+            elif request == 'environment':
+                send({'programs': await self.environment(message.get('refresh', False))})
+            elif request == 'status':
+                send({'jobs': [job.info() for job in self.jobs.values()]})
+            elif request == 'cancel':
+                job = self.jobs.get(message.get('job'))
+                cancelled = job is not None and job.task is not None and not job.task.done()
+                if cancelled:
+                    job.task.cancel()
+                send({'cancelled': cancelled})
+            elif request == 'shutdown':
+                send({'stopped': True})
+                self.stopped.set()
+            else:
+                send({'error': f'Unknown request {request}'})
+        except (Exception, SystemExit) as e:
+            # SystemExit: a command line that can not be parsed
+            logger.exception('Request failed')
+            send({'error': f'{type(e).__name__}: {e}'})
+        try:
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except (ConnectionError, BrokenPipeError):
+            pass
+
+    async def resolve(self, pom_file, db_config_dir=None, refresh=False, native=None):
+        """The result of process_POM from memory (the key covers the POM chain, so a changed POM is resolved again)."""
+        loop = asyncio.get_running_loop()
+        native = self.native if native is None else native
+        key = await loop.run_in_executor(None, POM_cache_key, pom_file, db_config_dir)
+        result = None if refresh else self.poms.get(key)
+        if result is None:
+            result = await loop.run_in_executor(None, process_POM, pom_file, db_config_dir, self.use_cache, refresh, native)
+            self.poms[key] = result
+        else:
+            # the inventory only checks the modification time of the database configuration directory
+            result = (result[0], await loop.run_in_executor(None, inventory.databases, result[0], self.use_cache), *result[2:])
+        return list(result)
+
+    async def environment(self, refresh=False):
+        """The programs found by check_environment, checked once."""
+        if self.programs is None or refresh:
+            self.programs = await asyncio.get_running_loop().run_in_executor(None, check_environment, self.use_cache, refresh)
+        return self.programs
+
+    async def _run(self, message, reader, send):
+        args, extra_maven_command_line_options = program.parse_run_POM_file_arguments(message['argv'])
+        cwd = message.get('cwd') or os.getcwd()
+        for name in ['file', 'db_config_dir', 'log_dir']:
+            if getattr(args, name):
+                setattr(args, name, os.path.join(cwd, getattr(args, name)))
+        if not args.action or not args.db or not args.file:
+            send({'error': f'Options {program.ACTION}, {program.DB} and {program.FILE} are needed'})
+            return
+        if args.db == 'all' or ',' in args.db or args.format or args.batch_output:
+            send({'error': 'Several databases, --format and --batch-output are not supported by the service'})
+            return
+        self.last_id += 1
+        job = Job(self.last_id, args, extra_maven_command_line_options, message.get('env') or dict(os.environ), cwd)
+        self.jobs[job.id] = job
+        while len(self.jobs) > MAX_FINISHED_JOBS and next(iter(self.jobs.values())).status not in ('queued', 'running'):
+            self.jobs.popitem(last=False)
+        send({'job': job.id, 'status': job.status})
+        job.task = asyncio.ensure_future(self._execute(job, send))
+        # a client disconnecting cancels its job
+        eof = asyncio.ensure_future(reader.read())
+        await asyncio.wait({job.task, eof}, return_when=asyncio.FIRST_COMPLETED)
+        if not job.task.done():
+            logger.info('Job %d: the client disconnected' % (job.id))
+            job.task.cancel()
+        eof.cancel()
+        try:
+            await job.task
+        except asyncio.CancelledError:
+            job.status = 'cancelled'
+        except Exception as e:
+            logger.exception('Job %d failed' % (job.id))
+            job.status = 'error'
+            send({'job': job.id, 'error': f'{type(e).__name__}: {e}'})
+        send({'job': job.id, 'status': job.status, 'returncode': job.returncode})
+
+    async def _execute(self, job, send):
+        async with self.semaphore:
+            job.status = 'running'
+            start = time.perf_counter()
+            try:
+                await self._execute_job(job, send)
+            finally:
+                job.duration = time.perf_counter() - start
+        logger.info('Job %d: %s in %.1f seconds' % (job.id, job.status, job.duration))
+
+    async def _execute_job(self, job, send):
+        args, extra = job.args, job.extra_maven_command_line_options
+        loop = asyncio.get_running_loop()
+        if not args.db_config_dir:
+            args.db_config_dir = (await self.resolve(args.file))[0]
+        # like run_POM_file: see program.prepare_run, program.preflight_check and program.execute
+        policy = daemon.use_daemon(args.action, args.mvnd and 'mvnd' in await self.environment())
+        run = await loop.run_in_executor(None, program.prepare_run, args, args.db, extra, fanout.DatabaseRun(args.db, None, job.env), policy)
+        if run is None:
+            send({'job': job.id, 'output': 'Skipping action %s for database %s since nothing changed since its last successful run\n' % (args.action, args.db)})
+            job.status, job.returncode = 'skipped', 0
+            return
+        # a RuntimeError when a connection fails: before Maven starts
+        await loop.run_in_executor(None, program.preflight_check, args, [args.db], job.env)
+
+        def output(text):
+            send({'job': job.id, 'output': text})
+
+        def error_output(line):
+            send({'job': job.id, 'error_output': line + '\n'})
+
+        try:
+            info_parser = await program.execute(args, run, extra, write=output, error_handler=error_output, cwd=job.cwd)
+        except subprocess.CalledProcessError as e:
+            job.status, job.returncode = f'FAILED ({e.returncode})', e.returncode
+            return
+        job.status, job.returncode = 'OK', 0
+        if args.action == 'db-info':
+            output(str(info_parser.summary) + '\n')
+
+
+def _peer_uid(sock):
+    """The user id of the process at the other end of a Unix socket (None when the platform can not tell)."""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    _, uid, _ = struct.unpack('3i', sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i')))
+    return uid
+
+
+def _connect(path=None):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(CONNECT_TIMEOUT)
+    try:
+        client.connect(path or socket_path())
+    except OSError:
+        client.close()
+        raise
+    client.settimeout(None)
+    return client
+
+
+def available(path=None):
+    """Is the service listening?"""
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return False
+    try:
+        _connect(path).close()
+        return True
+    except OSError:
+        return False
+
+
+def _request(message, path=None):
+    """Send a request and yield the messages received."""
+    with _connect(path) as client:
+        client.sendall((json.dumps(message) + '\n').encode('utf-8'))
+        with client.makefile('r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def _answer(message, path=None):
+    answer = next(_request(message, path))
+    if 'error' in answer:
+        raise RuntimeError('The service failed: ' + answer['error'])
+    return answer
+
+
+def submit(argv, path=None):
+    """
+    Run an action (the command line of run_POM_file) as a job of the service, writing its output to stdout
+    (and the error output to stderr). Return the final status message or None when the service does not support the action.
+    """
+    final = None
+    for message in _request({'request': 'run', 'argv': argv, 'env': dict(os.environ), 'cwd': os.getcwd()}, path):
+        if 'output' in message:
+            sys.stdout.write(message['output'])
+            sys.stdout.flush()
+        elif 'error_output' in message:
+            sys.stderr.write(message['error_output'])
+        elif 'error' in message:
+            if 'job' not in message:
+                logger.info('Not using the service: %s' % (message['error']))
+                return None
+            logger.error(message['error'])
+        elif message.get('status') == 'queued':
+            logger.info('Job %d submitted to the service' % (message['job']))
+        else:
+            final = message
+    return final
+
+
+def resolve(pom_file, db_config_dir, use_cache=True, refresh=False, native=True):
+    """process_POM by the service when enabled and available, else in this process."""
+    if enabled() and available():
+        return tuple(_answer({'request': 'resolve', 'file': str(pom_file), 'db_config_dir': db_config_dir, 'refresh': refresh, 'native': native})['result'])
+    return process_POM(pom_file, db_config_dir, use_cache, refresh, native)
+
+
+def environment(use_cache=True, refresh=False):
+    """check_environment by the service when enabled and available, else in this process."""
+    if enabled() and available():
+        return _answer({'request': 'environment', 'refresh': refresh})['programs']
+    return check_environment(use_cache, refresh)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='The PATO GUI background service: keeps the resolved state warm and runs the actions submitted by pato-gui --service')
+    parser.add_argument('command', nargs='?', default='start', choices=['start', 'stop', 'status', 'cancel'], help='start (in the foreground), stop, show the jobs or cancel a job')
+    parser.add_argument('job', nargs='?', type=int, help='The job to cancel')
+    parser.add_argument('--socket', help='The Unix socket (default $PATO_GUI_SOCKET or service.sock in the cache directory)')
+    parser.add_argument(program.JOBS, type=int, default=program.DEFAULT_JOBS, help='The maximum number of jobs running at the same time')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', help='Do not use the cache of POM inquiry results and environment checks')
+    parser.add_argument('--no-native', dest='native', action='store_false', help='Always use Maven for the POM inquiry')
+    parser.add_argument('-d', dest='debug', action='store_true', help='Enable debugging')
+    args = parser.parse_args(argv)
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level=logging.DEBUG if args.debug else logging.INFO)
+    path = args.socket or socket_path()
+
+    if args.command == 'start':
+        assert not available(path), f'The service is already listening on {path}'
+        asyncio.run(Service(args.jobs, args.use_cache, args.native).serve(path))
+    elif args.command == 'stop':
+        _answer({'request': 'shutdown'}, path)
+    elif args.command == 'cancel':
+        assert args.job, 'The job to cancel is needed'
+        if not _answer({'request': 'cancel', 'job': args.job}, path)['cancelled']:
+            print(f'Job {args.job} is not queued nor running')
+    else:
+        for job in _answer({'request': 'status'}, path)['jobs']:
+            duration = '' if job['duration'] is None else '%.1f s' % (job['duration'])
+            print('\t'.join([str(job['job']), job['status'], job['action'], job['db'], job['file'], duration]))
+
+
+if __name__ == '__main__':
+    main()
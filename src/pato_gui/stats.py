@@ -0,0 +1,345 @@
+"""
+A history of Maven run timings in a SQLite database (stats.sqlite in the cache directory) and its report (pato-gui-stats).
+
+Every run records its wall time, the Maven total time and the duration per module (from the Reactor Summary)
+and per plugin goal (from the "--- plugin:version:goal (id) @ module ---" lines, measured while the output streams),
+keyed by POM file, database, action, tool (mvn or mvnd) and the versions of pato-gui and Maven.
+A run is slow when its wall time is more than SLOW_FACTOR times the median of the previous
+ROLLING_WINDOW successful runs of the same POM file, database, action and tool.
+"""
+
+# Python modules
+import os
+import re
+import time
+import sqlite3
+import argparse
+import logging
+import statistics
+from contextlib import closing
+
+# local module(s)
+from pato_gui import cache
+
+
+__all__ = ['BuildTimings', 'database_file', 'record', 'record_log', 'percentile', 'runs', 'baseline', 'median', 'report', 'main']
+
+
+logger = logging.getLogger(__name__)
+
+# A run is slow when it takes more than SLOW_FACTOR times the median of the previous ROLLING_WINDOW runs.
+SLOW_FACTOR = 1.5
+ROLLING_WINDOW = 10
+# The minimum number of previous runs for a baseline.
+MIN_BASELINE_RUNS = 5
+
+# [INFO] BC_DB .......................................... SUCCESS [  1.234 s]
+MODULE_EXPR = re.compile(r'\[INFO\] (\S.*?) \.+ (SUCCESS|FAILURE|SKIPPED)(?: \[\s*(.+?)\])?$')
+# [INFO] Total time:  01:02 min
+TOTAL_TIME_EXPR = re.compile(r'\[INFO\] Total time:\s+(.+?)( \(Wall Clock\))?$')
+
+SCHEMA = """
+create table if not exists runs (
+  id integer primary key,
+  time real not null,
+  pom text not null,
+  db text not null,
+  action text not null,
+  tool text not null,
+  pato_gui_version text,
+  maven_version text,
+  returncode integer,
+  wall_time real not null,
+  maven_time real
+);
+create index if not exists runs_key on runs (pom, db, action, tool, time);
+create table if not exists modules (
+  run_id integer not null references runs (id) on delete cascade,
+  seq integer not null,
+  module text not null,
+  status text not null,
+  duration real
+);
+create table if not exists goals (
+  run_id integer not null references runs (id) on delete cascade,
+  seq integer not null,
+  goal text not null,
+  module text,
+  duration real not null
+);
+"""
+
+
+def _duration(text):
+    """
+    Convert a Maven duration to seconds.
+
+    >>> _duration('1.234 s'), _duration('01:02 min'), _duration('01:02 h'), _duration('?')
+    (1.234, 62.0, 3720.0, None)
+    """
+    m = re.match(r'([\d.:]+) (s|min|h)$', text.strip())
+    if not m:
+        return None
+    parts = [float(part) for part in m.group(1).split(':')]
+    if m.group(2) == 's':
+        return parts[0]
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + part
+    return seconds * (60 if m.group(2) == 'h' else 1)
+
+
+class BuildTimings:
+    """
+    Parse the module durations, the plugin goal boundaries and the total time from Maven output lines.
+
+    >>> timings = BuildTimings(clock=iter([0.0, 2.0, 5.0]).__next__)
+    >>> for line in ['[INFO] --- flyway:10.12.0:info (default-cli) @ BC_DB ---', '[INFO] Reactor Summary:',
+    ...              '[INFO] BC_DB ..................... SUCCESS [  2.100 s]', '[INFO] Total time:  2.500 s']:
+    ...     timings.feed(line)
+    >>> timings.finish()
+    >>> timings.modules, timings.goals, timings.total_time
+    ([('BC_DB', 'SUCCESS', 2.1)], [('flyway:10.12.0:info (default-cli)', 'BC_DB', 2.0)], 2.5)
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.modules = []
+        self.goals = []
+        self.total_time = None
+        self.goal = None
+        self.summary = False
+
+    def _end_goal(self):
+        if self.goal is not None:
+            goal, module, start = self.goal
+            self.goals.append((goal, module, self.clock() - start))
+            self.goal = None
+
+    def feed(self, line):
+        if not line.startswith('[INFO] '):
+            return
+        if line.startswith('[INFO] --- ') and line.endswith(' ---'):
+            self._end_goal()
+            goal, _, module = line[len('[INFO] --- '):-len(' ---')].rpartition(' @ ')
+            self.goal = (goal, module, self.clock())
+        elif line.startswith(('[INFO] Reactor Summary', '[INFO] BUILD SUCCESS', '[INFO] BUILD FAILURE')):
+            self._end_goal()
+            self.summary = True
+        elif self.summary:
+            m = MODULE_EXPR.match(line)
+            if m:
+                self.modules.append((m.group(1), m.group(2), _duration(m.group(3)) if m.group(3) else None))
+            else:
+                m = TOTAL_TIME_EXPR.match(line)
+                if m:
+                    self.total_time = _duration(m.group(1))
+
+    def handler(self, next_handler):
+        """A line handler feeding this parser and passing the line on to next_handler."""
+        def handle(line):
+            self.feed(line)
+            next_handler(line)
+
+        return handle
+
+    def finish(self):
+        self._end_goal()
+
+
+def database_file():
+    return cache.cache_dir() / 'stats.sqlite'
+
+
+def _connect():
+    path = database_file()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(path), timeout=30)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def _versions():
+    """The versions of pato-gui and Maven (None when not known)."""
+    from pato_gui.pom import maven_version  # only needed when recording
+
+    try:
+        from importlib.metadata import version
+
+        pato_gui_version = version('pato-gui')
+    except Exception:
+        pato_gui_version = None
+    return pato_gui_version, maven_version()
+
+
+def record(pom_file, db, action, tool, returncode, wall_time, timings):
+    """
+    Record a run with its timings (a BuildTimings) and return a message when it is slow compared to the baseline, else None.
+    Recording never fails a run: errors are logged.
+    """
+    try:
+        pato_gui_version, maven_version = _versions()
+        pom_file = os.path.abspath(pom_file)
+        with closing(_connect()) as connection, connection:
+            previous = baseline(connection, pom_file, db, action, tool)
+            run_id = connection.execute('insert into runs (time, pom, db, action, tool, pato_gui_version, maven_version, returncode, wall_time, maven_time) '
+                                        'values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                        (time.time(), pom_file, db, action, tool, pato_gui_version, maven_version, returncode, wall_time, timings.total_time)).lastrowid
+            connection.executemany('insert into modules (run_id, seq, module, status, duration) values (?, ?, ?, ?, ?)',
+                                   [(run_id, seq, *module) for seq, module in enumerate(timings.modules)])
+            connection.executemany('insert into goals (run_id, seq, goal, module, duration) values (?, ?, ?, ?, ?)',
+                                   [(run_id, seq, *goal) for seq, goal in enumerate(timings.goals)])
+    except sqlite3.Error as e:
+        logger.warning('Could not record the timings in %s: %s' % (database_file(), e))
+        return None
+    if returncode == 0 and previous and wall_time > SLOW_FACTOR * previous:
+        return 'Action %s for database %s took %.1f seconds, %.1f times the median of %.1f seconds of the previous runs' % \
+            (action, db, wall_time, wall_time / previous, previous)
+    return None
+
+
+def record_log(pom_file, db, action, tool, returncode, wall_time, log_file):
+    """Record a run whose output is in a log file (the plugin goals have no durations then)."""
+    timings = BuildTimings()
+    if log_file and os.path.exists(log_file):
+        with open(log_file, encoding='utf-8', errors='replace') as log:
+            for line in log:
+                timings.feed(line.rstrip('\n'))
+    timings.goals = []
+    return record(pom_file, db, action, tool, returncode, wall_time, timings)
+
+
+def percentile(values, p):
+    """
+    The p-th percentile (nearest rank) of a list of values.
+
+    >>> percentile([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 90), percentile([3.0], 50)
+    (9, 3.0)
+    """
+    values = sorted(values)
+    return values[max(0, -(-len(values) * p // 100) - 1)]
+
+
+def baseline(connection, pom_file, db, action, tool, before=None):
+    """The median wall time of the previous ROLLING_WINDOW successful runs (None with less than MIN_BASELINE_RUNS)."""
+    rows = connection.execute('select wall_time from runs where pom = ? and db = ? and action = ? and tool = ? and returncode = 0 and time < ? '
+                              'order by time desc limit ?',
+                              (pom_file, db, action, tool, before or float('inf'), ROLLING_WINDOW)).fetchall()
+    return statistics.median(row[0] for row in rows) if len(rows) >= MIN_BASELINE_RUNS else None
+
+
+def median(pom_file, db, action, tool):
+    """The baseline of the runs so far (see baseline), None when unknown."""
+    try:
+        with closing(_connect()) as connection:
+            return baseline(connection, os.path.abspath(pom_file), db, action, tool)
+    except sqlite3.Error as e:
+        logger.debug('Could not read %s: %s' % (database_file(), e))
+        return None
+
+
+def runs(connection, pom_file=None, db=None, action=None, since=None):
+    """The runs (as dictionaries) ordered by time, optionally filtered."""
+    cursor = connection.cursor()
+    cursor.row_factory = sqlite3.Row
+    conditions, parameters = [], []
+    for column, value in [('pom', pom_file), ('db', db), ('action', action)]:
+        if value:
+            conditions.append(f'{column} = ?')
+            parameters.append(os.path.abspath(value) if column == 'pom' else value)
+    if since:
+        conditions.append('time >= ?')
+        parameters.append(since)
+    query = 'select * from runs' + (' where ' + ' and '.join(conditions) if conditions else '') + ' order by time'
+    return [dict(row) for row in cursor.execute(query, parameters)]
+
+
+def _table(rows, right):
+    """Format rows (the first one is the header) as a table with the columns in right aligned to the right."""
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    rows.insert(1, ['-' * width for width in widths])
+    return '\n'.join('  '.join(cell.rjust(widths[i]) if i in right else cell.ljust(widths[i]) for i, cell in enumerate(row)).rstrip() for row in rows)
+
+
+def _trend(wall_times, n=5):
+    """
+    The change of the median of the last n runs compared to the n runs before.
+
+    >>> _trend([10, 10, 10, 10, 10, 12, 12, 12, 12, 12]), _trend([1, 2])
+    ('+20%', '')
+    """
+    if len(wall_times) < 2 * n:
+        return ''
+    before, last = statistics.median(wall_times[-2 * n:-n]), statistics.median(wall_times[-n:])
+    return '%+.0f%%' % (100 * (last - before) / before) if before else ''
+
+
+def report(connection, pom_file=None, db=None, action=None, since=None):
+    """A table per POM file, database, action and tool with the number of runs, the percentiles, the trend and the slow runs."""
+    groups = {}
+    for run in runs(connection, pom_file, db, action, since):
+        groups.setdefault((run['pom'], run['db'], run['action'], run['tool']), []).append(run)
+    rows = [['Project', 'Database', 'Action', 'Tool', 'Runs', 'Failed', 'Last', 'P50', 'P90', 'P95', 'Trend', 'Slow']]
+    for (pom, db, action, tool), group in sorted(groups.items()):
+        ok = [run['wall_time'] for run in group if run['returncode'] == 0]
+        slow = [run for run in group if run['returncode'] == 0 and _is_slow(connection, run)]
+        percentiles = ['%.1f s' % (percentile(ok, p)) if ok else '' for p in (50, 90, 95)]
+        rows.append([os.path.basename(os.path.dirname(pom)), db, action, tool, str(len(group)), str(len(group) - len(ok)),
+                     '%.1f s' % (group[-1]['wall_time']), *percentiles, _trend(ok), str(len(slow))])
+    return _table(rows, right={4, 5, 6, 7, 8, 9, 10, 11})
+
+
+def _is_slow(connection, run):
+    previous = baseline(connection, run['pom'], run['db'], run['action'], run['tool'], run['time'])
+    return previous is not None and run['wall_time'] > SLOW_FACTOR * previous
+
+
+def slow_report(connection, pom_file=None, db=None, action=None, since=None):
+    """A table with the slow runs."""
+    rows = [['Time', 'Project', 'Database', 'Action', 'Tool', 'Maven', 'Wall time', 'Baseline', 'Factor']]
+    for run in runs(connection, pom_file, db, action, since):
+        if run['returncode'] != 0:
+            continue
+        previous = baseline(connection, run['pom'], run['db'], run['action'], run['tool'], run['time'])
+        if previous is not None and run['wall_time'] > SLOW_FACTOR * previous:
+            rows.append([time.strftime('%Y-%m-%d %H:%M', time.localtime(run['time'])), os.path.basename(os.path.dirname(run['pom'])),
+                         run['db'], run['action'], run['tool'], run['maven_version'] or '-',
+                         '%.1f s' % (run['wall_time']), '%.1f s' % (previous), '%.1f' % (run['wall_time'] / previous)])
+    return _table(rows, right={6, 7, 8})
+
+
+def module_report(connection, pom_file=None, db=None, action=None, since=None):
+    """A table with the percentiles of the duration per module."""
+    durations = {}
+    for run in runs(connection, pom_file, db, action, since):
+        for module, duration in connection.execute('select module, duration from modules where run_id = ? and duration is not null order by seq', (run['id'],)):
+            durations.setdefault(module, []).append(duration)
+    rows = [['Module', 'Runs', 'P50', 'P90', 'P95', 'Trend']]
+    for module, values in durations.items():
+        rows.append([module, str(len(values))] + ['%.1f s' % (percentile(values, p)) for p in (50, 90, 95)] + [_trend(values)])
+    return _table(rows, right={1, 2, 3, 4, 5})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report the timings of the Maven runs of pato-gui: percentiles, trends and slow runs')
+    parser.add_argument('--file', dest='pom_file', help='Only the runs of this POM file')
+    parser.add_argument('--db', help='Only the runs for this database')
+    parser.add_argument('--action', help='Only the runs of this action')
+    parser.add_argument('--days', type=float, help='Only the runs of the last days')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--slow', action='store_true', help=f'Show the runs taking more than {SLOW_FACTOR} times the median of the previous {ROLLING_WINDOW} runs')
+    group.add_argument('--modules', action='store_true', help='Show the duration per module (from the Reactor Summary)')
+    args = parser.parse_args(argv)
+
+    since = time.time() - args.days * 86400 if args.days else None
+    with closing(_connect()) as connection:
+        if args.slow:
+            print(slow_report(connection, args.pom_file, args.db, args.action, since))
+        elif args.modules:
+            print(module_report(connection, args.pom_file, args.db, args.action, since))
+        else:
+            print(report(connection, args.pom_file, args.db, args.action, since))
+
+
+if __name__ == '__main__':
+    main()
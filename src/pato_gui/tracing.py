@@ -0,0 +1,125 @@
+"""
+Timing instrumentation: spans (phases with a duration) and instant events.
+
+The events are only recorded when a trace file has been set (option --trace FILE), so a long running
+process like the service does not collect them forever, and written as a Chrome trace (JSON), see write_trace().
+The file can be loaded in chrome://tracing or https://ui.perfetto.dev.
+"""
+
+# Python modules
+import os
+import json
+import time
+import logging
+import threading
+import contextlib
+
+
+__all__ = ['set_trace_file', 'enabled', 'begin', 'end', 'span', 'instant', 'events', 'write_trace', 'MavenOutputTracer']
+
+
+logger = logging.getLogger(__name__)
+
+_start = time.perf_counter()
+_events = []
+_trace_file = None
+
+
+def _now():
+    """Microseconds since the start."""
+    return (time.perf_counter() - _start) * 1e6
+
+
+def set_trace_file(trace_file):
+    global _trace_file
+
+    _trace_file = trace_file
+
+
+def enabled():
+    """Will a trace be written?"""
+    return _trace_file is not None
+
+
+def begin(name, cat='pato-gui', **args):
+    """Begin a span and return it: pass it to end()."""
+    return {'name': name, 'cat': cat, 'ph': 'X', 'ts': _now(), 'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args}
+
+
+def end(event, **args):
+    event['dur'] = _now() - event['ts']
+    event['args'].update(args)
+    if enabled():
+        _events.append(event)
+    logger.debug('%s took %.3f seconds' % (event['name'], event['dur'] / 1e6))
+    return event
+
+
+@contextlib.contextmanager
+def span(name, cat='pato-gui', **args):
+    """
+    Record the duration of a block.
+
+    >>> set_trace_file('trace.json')
+    >>> with span('example'):
+    ...     pass
+    >>> events()[-1]['name']
+    'example'
+    >>> set_trace_file(None)
+    """
+    event = begin(name, cat, **args)
+    try:
+        yield event
+    finally:
+        end(event)
+
+
+def instant(name, cat='pato-gui', **args):
+    """Record a point in time."""
+    if enabled():
+        _events.append({'name': name, 'cat': cat, 'ph': 'i', 's': 't', 'ts': _now(), 'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args})
+
+
+def events():
+    return list(_events)
+
+
+def write_trace(trace_file=None):
+    """Write the events as a Chrome trace to the trace file (default the one set)."""
+    trace_file = trace_file or _trace_file
+    with open(trace_file, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events(), 'displayTimeUnit': 'ms'}, f)
+    logger.info('Trace written to %s' % (trace_file))
+
+
+class MavenOutputTracer:
+    """
+    A line handler for Maven output that records the time to first output,
+    a span per plugin goal (from "[INFO] --- plugin:version:goal (id) @ module ---")
+    and the start of the Reactor Summary (or build result), and passes the line on to a handler.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.first = True
+        self.plugin = None
+
+    def _end_plugin(self):
+        if self.plugin is not None:
+            end(self.plugin)
+            self.plugin = None
+
+    def __call__(self, line):
+        if self.first:
+            self.first = False
+            instant('time-to-first-output', cat='maven')
+        if line.startswith('[INFO] --- ') and line.endswith(' ---'):
+            self._end_plugin()
+            self.plugin = begin(line[len('[INFO] --- '):-len(' ---')], cat='maven')
+        elif line.startswith(('[INFO] Reactor Summary', '[INFO] BUILD SUCCESS', '[INFO] BUILD FAILURE')):
+            self._end_plugin()
+            instant(line[len('[INFO] '):], cat='maven')
+        self.handler(line)
+
+    def finish(self):
+        self._end_plugin()
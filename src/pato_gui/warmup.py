@@ -0,0 +1,167 @@
+"""
+Speculative warm-up of Maven while the user fills in the GUI form.
+
+As soon as the POM file and its profiles are known, a low priority (nice/ionice) Maven run resolves
+the plugins and dependencies of those profiles into the local repository (dependency:go-offline),
+with the Maven daemon when it is used, so that daemon is started too. A daemon inherits the priority
+of the client starting it and keeps it for the later builds, so it is started first by a client at
+normal priority (running the validate phase) and only the go-offline client runs at low priority.
+The state of the warm-up is kept in the cache (section warmup), so the run started from the GUI
+(a separate process) can cancel the warm-up when it is still busy and report afterwards how much it helped.
+The start time of the process is kept too, so a process that reused the process id is never stopped.
+
+Cancelling needs process groups, so there is no warm-up on Windows.
+"""
+
+# Python modules
+import os
+import time
+import shlex
+import signal
+import logging
+import threading
+import subprocess
+from shutil import which
+
+# local module(s)
+from pato_gui import cache
+
+
+__all__ = ['GOALS', 'NICENESS', 'MAX_AGE', 'command', 'start', 'cancel', 'report']
+
+
+logger = logging.getLogger(__name__)
+
+
+SECTION = 'warmup'
+
+GOALS = ['dependency:go-offline']
+
+NICENESS = 19
+
+# A warm-up that ended longer ago (seconds) is not reported anymore.
+MAX_AGE = 3600
+
+
+def _key(pom_file):
+    return cache.digest(os.path.abspath(pom_file))
+
+
+def command(pom_file, db_config_dir, profiles, mvnd=False):
+    """
+    The low priority Maven command resolving the plugins and dependencies of the profiles.
+
+    >>> command('pom.xml', None, ['db-info', 'db-install'])[-5:]
+    ['--file', 'pom.xml', '-B', '-Pdb-info,db-install', 'dependency:go-offline']
+
+    With the Maven daemon a shell first starts the daemon at normal priority:
+
+    >>> command('pom.xml', None, [], mvnd=True)[:2]
+    ['sh', '-c']
+    """
+    executable = 'mvnd' if mvnd else 'mvn'
+    cmd = []
+    if which('nice'):
+        cmd += ['nice', '-n', str(NICENESS)]
+    if which('ionice'):
+        cmd += ['ionice', '-c', '3']
+    cmd += [executable, '--file', str(pom_file), '-B']
+    if db_config_dir:
+        cmd.append('-Ddb.config.dir=' + str(db_config_dir))
+    if profiles:
+        cmd.append('-P' + ','.join(profiles))
+    cmd += GOALS
+    if not mvnd:
+        return cmd
+    start_daemon = [executable, '--file', str(pom_file), '-B', '-q', 'validate']
+    return ['sh', '-c', '%s && exec %s' % (shlex.join(start_daemon), shlex.join(cmd))]
+
+
+def _process_start(pid):
+    """The start time of a process (None when it is not running), to recognize a process whose id has been reused."""
+    try:
+        with open('/proc/%d/stat' % (pid)) as f:
+            # the fields after the command name, that may contain spaces, start with field 3: field 22 is the start time
+            return f.read().rsplit(')', 1)[1].split()[19]
+    except (OSError, IndexError):
+        pass  # not running or no /proc (macOS)
+    try:
+        return subprocess.run(['ps', '-o', 'lstart=', '-p', str(pid)], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _wait(process, pom_file, state):
+    returncode = process.wait()
+    duration = time.time() - state['start']
+    if returncode < 0 or cache.load(SECTION, _key(pom_file), count=False) is None:
+        # stopped by cancel(), which already removed the state
+        logger.debug('The speculative warm-up was stopped (return code %d)' % (returncode))
+        return
+    logger.info('The speculative warm-up finished in %.1f seconds (return code %d)' % (duration, returncode))
+    cache.store(SECTION, _key(pom_file), dict(state, end=time.time(), returncode=returncode))
+
+
+def start(pom_file, db_config_dir, profiles, mvnd=False):
+    """
+    Start the warm-up in the background and return its process (None when there is no Maven or no process groups).
+    The output is written to warmup.log in the cache directory.
+    """
+    if os.name != 'posix' or which('mvnd' if mvnd else 'mvn') is None:
+        return None
+    cmd = command(pom_file, db_config_dir, profiles, mvnd)
+    log_file = cache.cache_dir() / SECTION / 'warmup.log'
+    try:
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_file, 'w', encoding='utf-8') as log:
+            process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                                       cwd=os.path.dirname(os.path.abspath(pom_file)), start_new_session=True)
+    except OSError as e:
+        logger.warning('Could not start the speculative warm-up: %s' % (e))
+        return None
+    logger.info('Speculative warm-up started (process %d): %s' % (process.pid, ' '.join(cmd)))
+    state = {'pid': process.pid, 'process_start': _process_start(process.pid), 'mvnd': mvnd, 'start': time.time(), 'command': cmd}
+    cache.store(SECTION, _key(pom_file), state)
+    threading.Thread(target=_wait, args=(process, pom_file, state), daemon=True).start()
+    return process
+
+
+def cancel(pom_file):
+    """
+    Stop the warm-up for the POM file when it is still running and return its state (None when there is none).
+    The state is removed, so every warm-up is reported at most once. The Maven daemon client gets SIGINT,
+    since it then cancels the build in the daemon too (it would keep running after SIGTERM).
+    """
+    key = _key(pom_file)
+    state = cache.load(SECTION, key, count=False)
+    if state is None:
+        return None
+    cache.remove(SECTION, key)
+    if 'end' in state:
+        return state if time.time() - state['end'] <= MAX_AGE else None
+    try:
+        if state.get('process_start') is None or _process_start(state['pid']) != state['process_start'] or os.getpgid(state['pid']) != state['pid']:
+            logger.debug('The speculative warm-up (process %d) is not running anymore' % (state['pid']))
+            return None
+        os.killpg(state['pid'], signal.SIGINT if state.get('mvnd') else signal.SIGTERM)
+    except (OSError, AttributeError):
+        # it was not running anymore (or was killed) without recording its end
+        return None
+    state.update(end=time.time(), returncode=None)
+    logger.info('Cancelled the speculative warm-up after %.1f seconds' % (state['end'] - state['start']))
+    return state
+
+
+def report(state, duration, median=None):
+    """
+    A message about a warm-up (a state returned by cancel()) before a run that took duration seconds.
+
+    >>> report({'start': 0, 'end': 42.0, 'returncode': 0}, 10.0, 25.0)
+    'The speculative warm-up ran 42.0 seconds in the background (completed) before this run of 10.0 seconds, 15.0 seconds less than the median of the previous runs'
+    """
+    outcome = {None: 'cancelled when the run started', 0: 'completed'}.get(state['returncode'], 'failed')
+    message = 'The speculative warm-up ran %.1f seconds in the background (%s) before this run of %.1f seconds' % \
+        (state['end'] - state['start'], outcome, duration)
+    if median:
+        message += ', %.1f seconds %s than the median of the previous runs' % (abs(median - duration), 'less' if duration <= median else 'more')
+    return message
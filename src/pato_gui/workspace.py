@@ -0,0 +1,169 @@
+"""
+A workspace: several PATO projects (POM files) handled at once (pato-gui --workspace DIR_OR_POM ...).
+
+The POM files are found below the directories supplied (without target and hidden directories)
+and resolved concurrently (see pom.process_POM). Without an action the GUI shows all projects in one form.
+With an action, it runs for the projects selected (option --project, default all having that action)
+with a bounded number of Maven runs at the same time, where a parent POM in the workspace runs before its children.
+A failure only prevents the children of the project failing from running. At the end a combined summary is shown.
+"""
+
+# Python modules
+import os
+import time
+import argparse
+import logging
+import concurrent.futures
+
+# local module(s)
+from pato_gui import cache, pipeline, program
+from pato_gui.pom import db_order, pom_chain, process_POM
+
+
+__all__ = ['WORKSPACE', 'PROJECT', 'Project', 'find_POM_files', 'resolve', 'databases', 'actions', 'run', 'main']
+
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE = '--workspace'
+PROJECT = '--project'
+
+# Directories not searched for POM files.
+EXCLUDED_DIRS = {'target', 'node_modules'}
+
+RESOLVE_WORKERS = 8
+
+
+class Project:
+    """A POM file in a workspace with its name, settings (the result of process_POM) and the names of its parents in the workspace."""
+
+    def __init__(self, name, pom_file):
+        self.name = name
+        self.pom_file = pom_file
+        self.db_config_dir = None
+        self.dbs = []
+        self.profiles = []
+        self.db_proxy_username = None
+        self.db_username = None
+        self.parents = []
+
+
+def find_POM_files(paths):
+    """Return the POM files supplied and those found below the directories supplied."""
+    pom_files = []
+    for path in paths:
+        if os.path.isfile(path):
+            pom_files.append(os.path.abspath(path))
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d not in EXCLUDED_DIRS and not d.startswith('.'))
+            if 'pom.xml' in files:
+                pom_files.append(os.path.abspath(os.path.join(root, 'pom.xml')))
+    return list(dict.fromkeys(pom_files))
+
+
+def _name(pom_file, root):
+    """
+    The name of a project: the directory of its POM relative to the workspace root (or the name of the root itself).
+
+    >>> _name('/ws/db/pom.xml', '/ws'), _name('/ws/pom.xml', '/ws')
+    ('db', 'ws')
+    """
+    name = os.path.relpath(os.path.dirname(pom_file), root)
+    return os.path.basename(root) if name == '.' else name
+
+
+def resolve(pom_files, db_config_dir=None, use_cache=True, refresh=False, native=True):
+    """
+    Resolve the POM files concurrently and return the PATO projects ordered by name.
+    A POM file that is no PATO project (process_POM fails) is left out.
+    """
+    root = os.path.commonpath([os.path.dirname(pom_file) for pom_file in pom_files]) if pom_files else ''
+    projects = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=RESOLVE_WORKERS) as executor:
+        futures = {executor.submit(process_POM, pom_file, db_config_dir, use_cache, refresh, native): pom_file for pom_file in pom_files}
+        for future in concurrent.futures.as_completed(futures):
+            pom_file = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.warning('Skipping POM file %s: %s' % (pom_file, e))
+                continue
+            project = Project(_name(pom_file, root), pom_file)
+            project.db_config_dir, project.dbs, project.profiles, project.db_proxy_username, project.db_username = result
+            projects[pom_file] = project
+    # the parents in the workspace
+    for project in projects.values():
+        project.parents = [projects[str(pom)].name for pom in pom_chain(project.pom_file)[1:] if str(pom) in projects]
+    return sorted(projects.values(), key=lambda project: project.name)
+
+
+def databases(projects):
+    """The databases all projects have, ordered by db_order."""
+    dbs = set.intersection(*[set(project.dbs) for project in projects]) if projects else set()
+    return sorted(dbs, key=db_order)
+
+
+def actions(projects):
+    """The actions of the projects (in the order of the first project having it)."""
+    return list(dict.fromkeys(profile for project in projects for profile in project.profiles))
+
+
+def run(projects, action, db, args, extra_maven_command_line_options, jobs, log_dir):
+    """
+    Run an action for the projects having it and return the pipeline steps (see pipeline.report).
+    args has the passwords and the run options (see program.add_run_arguments).
+    """
+    selected = [project for project in projects if action in project.profiles]
+    for project in projects:
+        if project not in selected:
+            logger.warning('Project %s does not have action %s' % (project.name, action))
+    names = {project.name for project in selected}
+    # the project names are unique (the directories relative to the workspace root), so they name the steps
+    steps = [pipeline.PipelineStep(project.name, project.pom_file, action, db,
+                                   [parent for parent in project.parents if parent in names],
+                                   extra_maven_command_line_options)
+             for project in selected]
+    pipeline.prepare(steps, args, {project.pom_file: project.db_config_dir for project in selected})
+    return pipeline.run_pipeline(steps, jobs, log_dir, stop_on_failure=False)
+
+
+def main(argv, use_cache=True, refresh=False, native=True):
+    """The workspace mode of pato-gui."""
+    parser = argparse.ArgumentParser(prog='pato-gui ' + WORKSPACE, description='Run an action for several PATO projects')
+    parser.add_argument(WORKSPACE, nargs='+', required=True, help='Directories (searched for POM files) and/or POM files')
+    parser.add_argument(program.ACTION, help='The action to perform (without it the GUI is shown)')
+    parser.add_argument(program.DB, help='The database to log on to')
+    parser.add_argument(program.DB_PROXY_PASSWORD, default='', help='The password for database proxy account')
+    parser.add_argument(program.DB_PASSWORD, default='', help='The password for database account')
+    parser.add_argument(program.DB_CONFIG_DIR, help='The database configuration directory')
+    parser.add_argument(PROJECT, nargs='+', help='The projects to run the action for (default all)')
+    parser.add_argument(program.JOBS, type=int, default=program.DEFAULT_JOBS, help='The maximum number of projects to run the action for at the same time')
+    parser.add_argument(program.LOG_DIR, help='The directory for the log files')
+    program.add_run_arguments(parser)
+    args, extra_maven_command_line_options = parser.parse_known_args(argv)
+    if program.EXTRA_MAVEN_COMMAND_LINE_OPTIONS in extra_maven_command_line_options:
+        extra_maven_command_line_options.remove(program.EXTRA_MAVEN_COMMAND_LINE_OPTIONS)
+    if args.db_config_dir:
+        args.db_config_dir = os.path.abspath(args.db_config_dir)
+
+    projects = resolve(find_POM_files(args.workspace), args.db_config_dir, use_cache, refresh, native)
+    assert projects, f'There are no PATO projects in {args.workspace}'
+    if not args.action:
+        # only the GUI needs Gooey (and wxPython)
+        from pato_gui import gui
+
+        gui.run_workspace_gui(args.workspace, projects, args.db_config_dir)
+        return
+
+    if args.project:
+        unknown = set(args.project) - {project.name for project in projects}
+        assert not unknown, f'Unknown project(s) {sorted(unknown)}: the projects are {[project.name for project in projects]}'
+        projects = [project for project in projects if project.name in args.project]
+    assert args.db, f'Option {program.DB} is needed to run an action'
+    log_dir = args.log_dir or str(cache.cache_dir() / 'runs' / time.strftime('%Y%m%d-%H%M%S'))
+    steps = run(projects, args.action, args.db, args, extra_maven_command_line_options, args.jobs, log_dir)
+    print(pipeline.report(steps), flush=True)
+    failed = [step.name for step in steps if not step.succeeded]
+    if failed:
+        raise RuntimeError('Action {} failed for project(s) {}'.format(args.action, ', '.join(failed)))
@@ -0,0 +1,84 @@
+"""
+A benchmark fixture (in the style of pytest-benchmark, without the dependency) with tracked baselines.
+
+A benchmark runs a function a number of rounds and takes the best time. It fails when that time is more than
+PATO_GUI_BENCHMARK_TOLERANCE (default 3) times its baseline in tests/benchmarks.json plus MIN_SLACK seconds,
+so only real regressions fail on a busy machine. Run with PATO_GUI_BENCHMARK_SAVE=1 to save the times measured
+as the new baselines (for instance after an intended change or on a new build machine) and with -m benchmark
+to run only the benchmarks.
+"""
+
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+
+
+BASELINES_FILE = Path(__file__).parent / 'benchmarks.json'
+
+DEFAULT_TOLERANCE = 3.0
+# Added to the allowed time, for the benchmarks of a few milliseconds.
+MIN_SLACK = 0.1
+
+results = {}
+
+
+class Benchmark:
+    def __init__(self, name):
+        self.name = name
+        self.times = []
+
+    def __call__(self, func, *args, rounds=5, **kwargs):
+        """Run func(*args, **kwargs) rounds times and return its last result."""
+        for _ in range(rounds):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            self.times.append(time.perf_counter() - start)
+        return result
+
+    @property
+    def best(self):
+        return min(self.times)
+
+    @property
+    def median(self):
+        return statistics.median(self.times)
+
+
+def load_baselines():
+    return json.loads(BASELINES_FILE.read_text()) if BASELINES_FILE.exists() else {}
+
+
+@pytest.fixture
+def benchmark(request):
+    bench = Benchmark(request.node.name)
+    yield bench
+    if not bench.times:
+        return
+    results[bench.name] = bench
+    baseline = load_baselines().get(bench.name)
+    tolerance = float(os.environ.get('PATO_GUI_BENCHMARK_TOLERANCE', DEFAULT_TOLERANCE))
+    if baseline and not os.environ.get('PATO_GUI_BENCHMARK_SAVE'):
+        assert bench.best <= baseline * tolerance + MIN_SLACK, \
+            f'Benchmark {bench.name} took {bench.best:.4f} seconds, more than {tolerance} times its baseline of {baseline:.4f} seconds'
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if results and os.environ.get('PATO_GUI_BENCHMARK_SAVE'):
+        baselines = load_baselines()
+        baselines.update({name: round(bench.best, 4) for name, bench in results.items()})
+        BASELINES_FILE.write_text(json.dumps(dict(sorted(baselines.items())), indent=2) + '\n')
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not results:
+        return
+    baselines = load_baselines()
+    terminalreporter.section('benchmarks')
+    terminalreporter.write_line('%-40s %10s %10s %10s' % ('Benchmark', 'Best', 'Median', 'Baseline'))
+    for name, bench in sorted(results.items()):
+        baseline = baselines.get(name)
+        terminalreporter.write_line('%-40s %9.4fs %9.4fs %10s' % (name, bench.best, bench.median, '%.4fs' % baseline if baseline else '-'))
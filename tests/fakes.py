@@ -0,0 +1,187 @@
+"""
+Stand-ins for mvn, mvnd, sql, java, javac and perl, so tests and benchmarks run offline without Maven, SQLcl or a JDK.
+
+install() writes a shell script that runs this module with a JSON configuration:
+
+- output: a file with (recorded) output to replay, else synthetic Maven output is generated (see maven_output);
+- lines: the number of lines of the synthetic output;
+- rate: the number of lines per second (0 is as fast as possible);
+- delay: seconds to wait before the first line (like the start-up of a JVM);
+- returncode: the exit code;
+- stderr: text to write to the error output.
+
+The version options (like mvn -version) print a version and the Maven inquiry (help:all-profiles)
+replays tests/data/pato/mvn-inquiry.out unless an inquiry file is configured.
+Every invocation is appended (as a JSON list) to NAME.calls next to the script.
+With /nolog the fake sql runs the connect, select, disconnect and prompt commands read from its input:
+a connect succeeds with the configured password (default secret) unless the connect identifier is one
+of the unreachable ones (configured), for which it hangs (hang seconds, default 60) before failing.
+The fake mvn writes a (fake) class data archive for -XX:ArchiveClassesAtExit in MAVEN_OPTS, like the JVM.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+TOOLS = ['mvn', 'mvnd', 'sql', 'java', 'javac', 'perl']
+
+VERSIONS = {
+    'mvn': ('-version', 'Apache Maven 3.9.6 (bc0240f3c744dd6b6ec2920b3cd08dcc295161ae)'),
+    'mvnd': ('--version', 'Apache Maven Daemon (mvnd) 1.0.2 linux-amd64 native client (8ad1ff7f9a3d2dcc5d3a6e4a2e4e5a0e1f1c9f3d)'),
+    'sql': ('-V', 'SQLcl: Release 21.4.1.0 Production'),
+    'java': ('-version', 'openjdk version "17.0.9" 2023-10-17'),
+    'javac': ('-version', 'javac 17.0.9'),
+    'perl': ('--version', 'This is perl 5, version 36, subversion 0 (v5.36.0) built for x86_64-linux'),
+}
+
+FLYWAY_INFO_TABLE = """[INFO] --- flyway:10.12.0:info (default-cli) @ {module} ---
+[INFO] Database: jdbc:oracle:thin:@{db} (Oracle 19.27)
+[INFO] Schema version: 20210607094700
+[INFO]
+[INFO] +-----------+---------+-------------+------+---------------------+---------+----------+
+| Category  | Version | Description | Type | Installed On        | State   | Undoable |
++-----------+---------+-------------+------+---------------------+---------+----------+
+{rows}
++-----------+---------+-------------+------+---------------------+---------+----------+
+
+"""
+
+
+def install(bin_dir, name, **config):
+    """Install (or reconfigure) a fake tool in bin_dir and return its path."""
+    assert name in TOOLS, f'The tool must be one of {TOOLS}'
+    bin_dir = Path(bin_dir)
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    config_file = bin_dir / f'{name}.json'
+    config_file.write_text(json.dumps(config))
+    script = bin_dir / name
+    script.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{Path(__file__).resolve()}" {name} "{config_file}" "$@"\n')
+    script.chmod(0o755)
+    return script
+
+
+def install_all(bin_dir, **configs):
+    """Install all fake tools (a configuration per tool name may be supplied) and return a PATH with bin_dir first."""
+    for name in TOOLS:
+        install(bin_dir, name, **configs.get(name, {}))
+    return str(bin_dir) + os.pathsep + os.environ.get('PATH', '')
+
+
+def calls(bin_dir, name):
+    """The command line arguments of every invocation of a fake tool."""
+    calls_file = Path(bin_dir) / f'{name}.calls'
+    return [json.loads(line) for line in calls_file.read_text().splitlines()] if calls_file.exists() else []
+
+
+def maven_output(lines=1000, action='db-info', db='bc_dev', modules=2, migrations=10):
+    """
+    Generate the output of a Maven build with (for db-info) a flyway info table per module and a Reactor Summary,
+    padded with debug lines up to the number of lines wanted.
+
+    >>> output = maven_output(lines=20, modules=1, migrations=1)
+    >>> len(output), output[0], output[-1]
+    (20, '[INFO] Scanning for projects...', '[INFO] ------------------------------------------------------------------------')
+    """
+    head = ['[INFO] Scanning for projects...']
+    tail = ['[INFO] ------------------------------------------------------------------------',
+            '[INFO] Reactor Summary:',
+            '[INFO]']
+    tail += ['[INFO] MODULE_%d ........................................... SUCCESS [  1.%03d s]' % (i, i) for i in range(modules)]
+    tail += ['[INFO] ------------------------------------------------------------------------',
+             '[INFO] BUILD SUCCESS',
+             '[INFO] ------------------------------------------------------------------------']
+    body = []
+    for i in range(modules):
+        body.append(f'[INFO] ------------------------< com.paulissoft.pato:MODULE_{i} >------------------------')
+        if action == 'db-info':
+            rows = '\n'.join('| Versioned | %d       | migration %d | SQL  | 2024-01-01 10:00:00 | Success | No       |' % (v, v)
+                             for v in range(1, migrations + 1))
+            body += FLYWAY_INFO_TABLE.format(module=f'MODULE_{i}', db=db, rows=rows).splitlines()
+    # noise (as with -X) up to the number of lines wanted
+    noise = max(0, lines - len(head) - len(body) - len(tail))
+    head += ['[DEBUG]   (f) project = MavenProject: com.paulissoft.pato:MODULE_0:2025.04.25 @ /dev/pom.xml %d' % i for i in range(noise)]
+    return head + body + tail
+
+
+def _output(name, config, args):
+    """The output lines of an invocation."""
+    if name in VERSIONS and args[:1] == [VERSIONS[name][0]]:
+        return [VERSIONS[name][1]]
+    if name == 'mvnd' and args[:1] == ['--status']:
+        return ['PID Address Status']
+    if name in ('mvn', 'mvnd') and 'help:all-profiles' in args:
+        return Path(config.get('inquiry', DATA_DIR / 'pato' / 'mvn-inquiry.out')).read_text().splitlines()
+    if config.get('output'):
+        return Path(config['output']).read_text().splitlines()
+    if name in ('mvn', 'mvnd'):
+        action = next((arg[2:] for arg in args if arg.startswith('-P')), 'db-info')
+        db = next((arg[len('-Ddb='):] for arg in args if arg.startswith('-Ddb=')), 'bc_dev')
+        return maven_output(config.get('lines', 1000), action, db, config.get('modules', 2), config.get('migrations', 10))
+    return []
+
+
+def _sql_session(config):
+    """Run the commands of a SQLcl script read from stdin."""
+    connected = False
+    for command in sys.stdin.read().splitlines():
+        words = command.split(None, 1)
+        if not words:
+            continue
+        if words[0] == 'prompt':
+            print(words[1] if len(words) > 1 else '')
+        elif words[0] == 'connect':
+            login, identifier = words[1].rsplit('@', 1)
+            password = login.split('/', 1)[1].strip('"')
+            if identifier in config.get('unreachable', []):
+                sys.stdout.flush()
+                time.sleep(config.get('hang', 60))
+                print('ORA-12170: TNS:Connect timeout occurred')
+            elif password != config.get('password', 'secret'):
+                print('ORA-01017: invalid username/password; logon denied')
+            else:
+                connected = True
+        elif words[0] == 'select':
+            print('PATO_GUI_PREFLIGHT_OK' if connected else 'SP2-0640: Not connected')
+        elif words[0] == 'disconnect':
+            connected = False
+        elif words[0] == 'exit':
+            break
+    sys.stdout.flush()
+
+
+def main(name, config_file, *args):
+    config = json.loads(Path(config_file).read_text())
+    with open(Path(config_file).with_suffix('.calls'), 'a') as f:
+        f.write(json.dumps(list(args)) + '\n')
+    time.sleep(config.get('delay', 0))
+    if name == 'sql' and '/nolog' in args:
+        _sql_session(config)
+        return config.get('returncode', 0)
+    # java -version writes to the error output
+    stream = sys.stderr if name == 'java' and args[:1] == ('-version',) else sys.stdout
+    rate = config.get('rate', 0)
+    start = time.perf_counter()
+    for i, line in enumerate(_output(name, config, list(args))):
+        stream.write(line + '\n')
+        if rate:
+            stream.flush()
+            ahead = (i + 1) / rate - (time.perf_counter() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+    stream.flush()
+    if config.get('stderr'):
+        sys.stderr.write(config['stderr'])
+    # like the JVM, dump a class data archive at exit
+    for option in os.environ.get('MAVEN_OPTS', '').split() if name == 'mvn' else []:
+        if option.startswith('-XX:ArchiveClassesAtExit='):
+            Path(option.split('=', 1)[1]).write_bytes(b'CDS')
+    return config.get('returncode', 0)
+
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,96 @@
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from pato_gui import pom
+from pato_gui.filters import OutputFilterEngine
+from pato_gui.flyway import FlywayInfoParser
+
+from tests import fakes
+
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture
+def toolchain(tmp_path, monkeypatch):
+    """Fake mvn, mvnd, sql, java, javac and perl first on the PATH and a cache of our own."""
+    bin_dir = tmp_path / 'bin'
+    monkeypatch.setenv('PATH', fakes.install_all(bin_dir, mvn={'lines': 10000}))
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    return bin_dir
+
+
+@pytest.fixture
+def project(tmp_path):
+    """A PATO database project with a database configuration directory."""
+    shutil.copytree(DATA_DIR / 'pato', tmp_path / 'pato')
+    for db in ['bc_dev', 'bc_tst']:
+        (tmp_path / 'conf' / db).mkdir(parents=True)
+    return tmp_path / 'pato' / 'db' / 'pom.xml', str(tmp_path / 'conf')
+
+
+def test_fakes(tmp_path):
+    fakes.install(tmp_path, 'mvn', lines=100, returncode=3, stderr='failed\n')
+    proc = subprocess.run([str(tmp_path / 'mvn'), '-B', '-Pdb-info', '-Ddb=bc_tst'], capture_output=True, text=True)
+    assert proc.returncode == 3
+    assert proc.stderr == 'failed\n'
+    lines = proc.stdout.splitlines()
+    assert len(lines) == 100
+    assert '[INFO] Database: jdbc:oracle:thin:@bc_tst (Oracle 19.27)' in lines
+    assert fakes.calls(tmp_path, 'mvn') == [['-B', '-Pdb-info', '-Ddb=bc_tst']]
+    fakes.install(tmp_path, 'java')
+    assert subprocess.run([str(tmp_path / 'java'), '-version'], capture_output=True, text=True).stderr.startswith('openjdk version "17.0.9"')
+
+
+def test_benchmark_startup(benchmark):
+    # the import of the command line program in a fresh interpreter
+    benchmark(subprocess.run, [sys.executable, '-c', 'import pato_gui.program'], check=True, rounds=3)
+
+
+def test_benchmark_check_environment(benchmark, toolchain):
+    found = benchmark(pom.check_environment, use_cache=False, rounds=3)
+    assert found == ['mvn', 'perl', 'sql', 'java', 'javac', 'mvnd']
+
+
+def test_benchmark_inquiry_parsing(benchmark):
+    noise = ['[DEBUG]   (f) project = MavenProject: com.paulissoft.pato:bc-db:2025.04.25 @ /dev/pom.xml %d\n' % i for i in range(50000)]
+    lines = noise + (DATA_DIR / 'pato' / 'mvn-inquiry.out').read_text().splitlines(keepends=True)
+    properties, profiles = benchmark(pom.parse_POM_settings, lines)
+    assert profiles.issuperset(pom.DB_PROFILES)
+
+
+def test_benchmark_inquiry(benchmark, toolchain, project):
+    pom_file, db_config_dir = project
+    result = benchmark(pom.process_POM, pom_file, db_config_dir, use_cache=False, native=False, rounds=3)
+    assert result[1] == ['bc_dev', 'bc_tst']
+    assert len(fakes.calls(toolchain, 'mvn')) == 3
+
+
+def test_benchmark_output_filtering(benchmark):
+    lines = fakes.maven_output(lines=200000, modules=20, migrations=1000)
+    output = []
+
+    def run():
+        output.clear()
+        engine = OutputFilterEngine.for_action('db-info', info_parser=FlywayInfoParser('bc_dev'), write=output.append)
+        engine.feed_lines(lines)
+        engine.flush()
+
+    benchmark(run)
+    assert 'BUILD SUCCESS' in ''.join(output)
+
+
+def test_benchmark_cli_db_info(benchmark, toolchain, project):
+    pom_file, db_config_dir = project
+    cmd = [sys.executable, '-c', 'from pato_gui.program import main; main()',
+           '--action', 'db-info', '--db', 'bc_dev', '--db-password', 'secret', '--file', str(pom_file), '--db-config-dir', db_config_dir]
+    proc = benchmark(subprocess.run, cmd, capture_output=True, text=True, env=dict(os.environ), rounds=3)
+    assert proc.returncode == 0, proc.stderr
+    assert 'bc_dev: 20 migrations, 0 pending, 0 failed, latest version 10' in proc.stderr
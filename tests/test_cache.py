@@ -0,0 +1,84 @@
+from pato_gui import cache, pom
+
+
+PARENT_POM = """<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <modelVersion>4.0.0</modelVersion>
+  <groupId>com.paulissoft.pato</groupId>
+  <artifactId>pato-parent</artifactId>
+  <version>1.0.0</version>
+  <packaging>pom</packaging>
+</project>
+"""
+
+CHILD_POM = """<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <modelVersion>4.0.0</modelVersion>
+  <parent>
+    <groupId>com.paulissoft.pato</groupId>
+    <artifactId>pato-parent</artifactId>
+    <version>1.0.0</version>
+  </parent>
+  <artifactId>db</artifactId>
+</project>
+"""
+
+
+def make_project(tmp_path):
+    (tmp_path / 'pom.xml').write_text(PARENT_POM)
+    (tmp_path / 'db').mkdir()
+    (tmp_path / 'db' / 'pom.xml').write_text(CHILD_POM)
+    for db in ['orcl', 'bc_dev']:
+        (tmp_path / 'conf' / db).mkdir(parents=True)
+    return tmp_path / 'db' / 'pom.xml'
+
+
+def test_pom_chain(tmp_path):
+    pom_file = make_project(tmp_path)
+    assert pom.pom_chain(pom_file) == [pom_file.resolve(), (tmp_path / 'pom.xml').resolve()]
+
+
+def test_process_POM_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    pom_file = make_project(tmp_path)
+    calls = []
+
+    def determine_POM_settings(pom_file, db_config_dir, native=True):
+        calls.append(pom_file)
+        return {'db.username': 'scott'}, {'db-info', 'db-install', 'db-code-check', 'db-test', 'db-generate-ddl-full', 'db-generate-ddl-incr'}
+
+    monkeypatch.setattr(pom, 'determine_POM_settings', determine_POM_settings)
+    db_config_dir = str(tmp_path / 'conf')
+    expected = pom.process_POM(pom_file, db_config_dir)
+    assert pom.process_POM(pom_file, db_config_dir) == expected
+    assert len(calls) == 1
+    assert cache.statistics('pom') == {'hits': 1, 'misses': 1}
+
+    # a new database directory is found without a new inquiry (see the inventory module)
+    (tmp_path / 'conf' / 'bc_tst').mkdir()
+    assert pom.process_POM(pom_file, db_config_dir)[1] == ['bc_dev', 'bc_tst', 'orcl']
+    assert len(calls) == 1
+
+    # no cache and refresh both run the inquiry
+    pom.process_POM(pom_file, db_config_dir, use_cache=False)
+    pom.process_POM(pom_file, db_config_dir, refresh=True)
+    assert len(calls) == 3
+    assert cache.statistics('pom') == {'hits': 2, 'misses': 1}
+
+    # a change in the parent POM invalidates the entry
+    (tmp_path / 'pom.xml').write_text(PARENT_POM.replace('1.0.0', '1.0.1'))
+    pom.process_POM(pom_file, db_config_dir)
+    assert len(calls) == 4
+
+
+def test_last_known(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    pom_file = make_project(tmp_path)
+    monkeypatch.setattr(pom, 'determine_POM_settings', lambda pom_file, db_config_dir, native=True: ({'db.username': 'scott'}, set(pom.DB_PROFILES)))
+    db_config_dir = str(tmp_path / 'conf')
+    assert pom.last_known(pom_file, db_config_dir) is None
+    expected = pom.process_POM(pom_file, db_config_dir)
+    # still known after a change that invalidates the cache entry, with the databases of now
+    (tmp_path / 'pom.xml').write_text(PARENT_POM.replace('1.0.0', '1.0.1'))
+    (tmp_path / 'conf' / 'bc_tst').mkdir()
+    assert pom.last_known(pom_file, db_config_dir) == (expected[0], ['bc_dev', 'bc_tst', 'orcl'], *expected[2:])
@@ -0,0 +1,64 @@
+import gzip
+import sys
+import time
+
+from pato_gui import console, runner
+
+
+LINES = 300000
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_console_output(tmp_path):
+    writes = []
+    spill_file = tmp_path / 'run.log.gz'
+    # the flusher does not write within the test: the batches are flushed explicitly
+    console_output = console.ConsoleOutput(spill_file, write=writes.append, flush_interval=3600, max_lines=100)
+    for i in range(1000):
+        console_output('line %d' % i)
+    assert writes == []
+    console_output.flush()
+    # at most max_lines lines per batch
+    assert len(writes) == 1
+    assert writes[0] == '[... 900 lines not shown, see %s ...]\n' % (spill_file) + ''.join('line %d\n' % i for i in range(900, 1000))
+    assert console_output.lines == 101
+    console_output('last')
+    console_output.close()
+    assert writes[1:] == ['last\n'] and console_output.flusher is None
+    assert gzip.open(spill_file, 'rt').read().splitlines() == ['line %d' % i for i in range(1000)] + ['last']
+
+
+def test_console_output_flusher():
+    writes = []
+    console_output = console.ConsoleOutput(write=writes.append, flush_interval=0.01)
+    # one flusher thread for all batches
+    flusher = None
+    for i in range(3):
+        console_output('more %d' % i)
+        wait_for(lambda: len(writes) == i + 1)
+        flusher = flusher or console_output.flusher
+        assert console_output.flusher is flusher and flusher.is_alive()
+    assert writes == ['more 0\n', 'more 1\n', 'more 2\n']
+    console_output.close()
+    assert not flusher.is_alive() and writes[3:] == []
+
+
+def test_stress(tmp_path):
+    # a huge build: measure the lines per second delivered to stdout
+    cmd = [sys.executable, '-c', 'import sys\nfor i in range(%d):\n    sys.stdout.write("[INFO] line %%d\\n" %% i)' % (LINES)]
+    spill_file = tmp_path / 'run.log.gz'
+    console_output = console.ConsoleOutput(spill_file)
+    start = time.perf_counter()
+    runner.run(cmd, stdout_handler=console_output)
+    console_output.close()
+    elapsed = time.perf_counter() - start
+    print('%d lines in %.2f seconds: %.0f lines/sec read, %d lines delivered to stdout' % (LINES, elapsed, LINES / elapsed, console_output.lines))
+    assert console_output.lines < LINES
+    with gzip.open(spill_file, 'rt') as f:
+        assert sum(1 for _ in f) == LINES
@@ -0,0 +1,65 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from pato_gui import daemon, program
+
+from tests import fakes
+
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+
+def make_mvnd(tmp_path, returncode):
+    mvnd = tmp_path / 'bin' / 'mvnd'
+    mvnd.parent.mkdir(exist_ok=True)
+    mvnd.write_text(f'#!/bin/sh\nexit {returncode}\n')
+    mvnd.chmod(0o755)
+    return str(mvnd.parent)
+
+
+def test_use_daemon(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATH', make_mvnd(tmp_path, 0))
+    assert daemon.use_daemon('db-info', True) == daemon.DAEMON
+    assert daemon.use_daemon('db-install', True) == daemon.DAEMON_SERIAL
+    assert daemon.use_daemon('db-generate-ddl-full', True) == daemon.NO_DAEMON
+    assert daemon.use_daemon('db-info', False) == daemon.NO_DAEMON
+
+
+def test_use_daemon_unhealthy(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATH', make_mvnd(tmp_path, 1))
+    assert daemon.use_daemon('db-info', True) == daemon.NO_DAEMON
+    monkeypatch.setenv('PATH', str(tmp_path / 'nothing'))
+    assert daemon.use_daemon('db-info', True) == daemon.NO_DAEMON
+
+
+def test_daemon_monitor():
+    lines = []
+    monitor = daemon.DaemonMonitor(lines.append)
+    monitor('[ERROR] Failed to execute goal')
+    assert not monitor.failed
+    monitor('org.mvndaemon.mvnd.common.DaemonException$ConnectException: Could not connect to the daemon')
+    assert monitor.failed
+    assert len(lines) == 2
+
+
+def test_record_timing(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path))
+    assert daemon.record_timing('pom.xml', 'db-info', daemon.NO_DAEMON, 20.0).endswith('with mvn took 20.0 seconds')
+    assert daemon.record_timing('pom.xml', 'db-info', daemon.DAEMON, 5.0).endswith('(saving 15.0 seconds compared to the last run with mvn)')
+
+
+def test_daemon_failure(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'fakes'
+    monkeypatch.setenv('PATH', fakes.install_all(bin_dir, mvnd={'stderr': 'Could not connect to the daemon\n'}))
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    shutil.copytree(DATA_DIR / 'pato', tmp_path / 'pato')
+    argv = ['--db', 'bc_dev', '--db-password', 'secret', '--file', str(tmp_path / 'pato' / 'db' / 'pom.xml'), '--db-config-dir', str(tmp_path), '--mvnd']
+    # run again with Maven
+    program.run_POM_file(['--action', 'db-info'] + argv)
+    assert len(fakes.calls(bin_dir, 'mvn')) == 1
+    # not run again since the database may have changed
+    with pytest.raises(daemon.DaemonFailure):
+        program.run_POM_file(['--action', 'db-install'] + argv)
+    assert len(fakes.calls(bin_dir, 'mvn')) == 1
@@ -0,0 +1,44 @@
+import zipfile
+
+from pato_gui import cache, pom
+
+
+def make_program(path, script='exit 0'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('#!/bin/sh\n' + script + '\n')
+    path.chmod(0o755)
+
+
+def make_toolchain(tmp_path):
+    make_program(tmp_path / 'maven' / 'bin' / 'mvn', 'exit 1')
+    (tmp_path / 'maven' / 'lib').mkdir()
+    (tmp_path / 'maven' / 'lib' / 'maven-core-3.9.6.jar').write_bytes(b'')
+    make_program(tmp_path / 'jdk' / 'bin' / 'java', 'exit 1')
+    make_program(tmp_path / 'jdk' / 'bin' / 'javac', 'exit 1')
+    (tmp_path / 'jdk' / 'release').write_text('IMPLEMENTOR="Oracle Corporation"\nJAVA_VERSION="17.0.9"\n')
+    make_program(tmp_path / 'sqlcl' / 'bin' / 'sql', 'exit 1')
+    (tmp_path / 'sqlcl' / 'lib').mkdir()
+    with zipfile.ZipFile(tmp_path / 'sqlcl' / 'lib' / 'dbtools-sqlcl.jar', 'w') as zf:
+        zf.writestr('META-INF/MANIFEST.MF', 'Manifest-Version: 1.0\nImplementation-Version: 21.4.1.0\n')
+    # perl has no static version so it is run: count the runs
+    make_program(tmp_path / 'perl' / 'bin' / 'perl', f'echo run >> {tmp_path}/perl.log; echo "This is perl 5, version 36, subversion 0 (v5.36.0)"')
+    return ':'.join(str(tmp_path / d / 'bin') for d in ['maven', 'jdk', 'sqlcl', 'perl'])
+
+
+def test_static_version(tmp_path):
+    make_toolchain(tmp_path)
+    assert pom.static_version('mvn', tmp_path / 'maven' / 'bin' / 'mvn') == '3.9.6'
+    assert pom.static_version('javac', tmp_path / 'jdk' / 'bin' / 'javac') == '17.0.9'
+    assert pom.static_version('sql', tmp_path / 'sqlcl' / 'bin' / 'sql') == '21.4.1.0'
+    assert pom.static_version('perl', tmp_path / 'perl' / 'bin' / 'perl') is None
+
+
+def test_check_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATH', make_toolchain(tmp_path))
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    assert pom.check_environment() == ['mvn', 'perl', 'sql', 'java', 'javac']
+    assert pom.check_environment() == ['mvn', 'perl', 'sql', 'java', 'javac']
+    assert (tmp_path / 'perl.log').read_text().count('run') == 1
+    assert cache.statistics('environment') == {'hits': 1, 'misses': 1}
+    pom.check_environment(use_cache=False)
+    assert (tmp_path / 'perl.log').read_text().count('run') == 2
@@ -0,0 +1,91 @@
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from pato_gui import fanout, program
+
+from tests import fakes
+
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+
+SCRIPT = 'import os, sys, time; time.sleep(0.5); print(os.environ["DB_PASSWORD"]); sys.exit(int(sys.argv[1]))'
+
+
+def make_run(db, returncode=0):
+    return fanout.DatabaseRun(db, [sys.executable, '-c', SCRIPT, str(returncode)], dict(os.environ, DB_PASSWORD='pw_' + db))
+
+
+def test_fan_out(tmp_path):
+    dbs = ['bc_prd', 'bc_acc', 'bc_tst', 'bc_dev']
+    start = time.perf_counter()
+    runs = fanout.fan_out([make_run(db, 1 if db == 'bc_acc' else 0) for db in dbs], 4, tmp_path)
+    assert time.perf_counter() - start < 4 * 0.5
+    assert [run.db for run in runs] == ['bc_dev', 'bc_tst', 'bc_acc', 'bc_prd']
+    assert [run.status for run in runs] == ['OK', 'OK', 'FAILED (1)', 'OK']
+    for db in dbs:
+        assert (tmp_path / f'{db}.log').read_text() == f'pw_{db}\n'
+    table = fanout.summary(runs).splitlines()
+    assert len(table) == 2 + len(dbs)
+    assert table[4].startswith('bc_acc    FAILED (1)')
+
+
+def test_fan_out_jobs(tmp_path):
+    start = time.perf_counter()
+    runs = fanout.fan_out([make_run(db) for db in ['a', 'b', 'c']], 1, tmp_path)
+    assert time.perf_counter() - start >= 3 * 0.5
+    assert all(run.status == 'OK' for run in runs)
+
+
+def test_fan_out_error(tmp_path):
+    run = fanout.DatabaseRun('bc_dev', [str(tmp_path / 'does-not-exist')])
+    fanout.fan_out([run], 1, tmp_path)
+    assert run.status == 'ERROR'
+    assert 'FileNotFoundError' in (tmp_path / 'bc_dev.log').read_text()
+
+
+def test_fan_out_project_copy(tmp_path):
+    # like Maven: the build output goes to the target directory next to the POM file and must not exist yet
+    script = 'import pathlib, sys; target = pathlib.Path(sys.argv[1]).parent / "target"; target.mkdir(); (target / "out").write_text(sys.argv[2])'
+    project_dir = tmp_path / 'pato'
+    (project_dir / 'db').mkdir(parents=True)
+    (project_dir / 'pom.xml').write_text('<project/>')
+    (project_dir / 'db' / 'pom.xml').write_text('<project/>')
+    (project_dir / 'db' / 'target').mkdir()
+    pom_file = str(project_dir / 'db' / 'pom.xml')
+    log_dir = project_dir / 'runs'
+    runs = []
+    for db in ['bc_dev', 'bc_tst']:
+        run = fanout.DatabaseRun(db, [sys.executable, '-c', script, pom_file, db])
+        run.pom_file, run.project_dir = pom_file, str(project_dir)
+        runs.append(run)
+    runs = fanout.fan_out(runs, 2, log_dir)
+    assert [run.status for run in runs] == ['OK', 'OK']
+    assert list((project_dir / 'db' / 'target').iterdir()) == []
+    for db in ['bc_dev', 'bc_tst']:
+        copy_dir = log_dir / db / fanout.PROJECT_COPY
+        assert (copy_dir / 'db' / 'target' / 'out').read_text() == db
+        assert (copy_dir / 'pom.xml').exists()
+        assert not (copy_dir / 'runs').exists()
+
+
+def test_run_POM_file_fan_out_project_copy(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    monkeypatch.setenv('PATH', fakes.install_all(bin_dir))
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    shutil.copytree(DATA_DIR / 'pato', tmp_path / 'pato')
+    for db in ['bc_dev', 'bc_tst']:
+        (tmp_path / 'conf' / db).mkdir(parents=True)
+    pom_file = str(tmp_path / 'pato' / 'db' / 'pom.xml')
+    log_dir = tmp_path / 'runs'
+    argv = ['--action', 'db-info', '--db', 'bc_dev,bc_tst', '--db-password', 'secret', '--no-preflight', '--file', pom_file, '--db-config-dir', str(tmp_path / 'conf'), '--log-dir', str(log_dir)]
+    program.run_POM_file(argv + ['--jobs', '2'])
+    files = sorted(args[args.index('--file') + 1] for args in fakes.calls(bin_dir, 'mvn'))
+    assert len(files) == 2 and all(Path(file).name == 'pom.xml' and Path(file).is_relative_to(log_dir) for file in files)
+    assert len(set(files)) == 2
+    # one at a time: no copy needed
+    program.run_POM_file(argv + ['--jobs', '1'])
+    assert [args[args.index('--file') + 1] for args in fakes.calls(bin_dir, 'mvn')[2:]] == [pom_file, pom_file]
@@ -0,0 +1,145 @@
+import contextlib
+import io
+import re
+import time
+
+from pato_gui.filters import OutputFilterEngine
+
+
+FLYWAY_INFO = """[INFO] --- flyway:10.12.0:info (default-cli) @ ORACLE_TOOLS ---
+[INFO] 6 SQL migrations were detected but not run because they did not follow the filename convention.
+[INFO] Database: jdbc:oracle:thin:@bc_dev (Oracle 19.27)
+[INFO] Schema version: 20210607094700
+[INFO]
+[INFO] +-----------+---------+-------------+------+--------------+---------+----------+
+| Category  | Version | Description | Type | Installed On | State   | Undoable |
++-----------+---------+-------------+------+--------------+---------+----------+
+| Versioned | 1       | init        | SQL  |              | Pending | No       |
++-----------+---------+-------------+------+--------------+---------+----------+
+
+[INFO] --- flyway-maven-plugin:10.12.0:info (default-cli) @ BC_UI ---
+[INFO] Skipping Flyway execution
+[INFO] ------------------------------------------------------------------------
+[INFO] BUILD SUCCESS
+[INFO] ------------------------------------------------------------------------
+""".splitlines()
+
+NOISE = """[INFO] Scanning for projects...
+[INFO] --- resources:3.3.1:resources (default-resources) @ ORACLE_TOOLS ---
+[INFO] skip non existing resourceDirectory /dev/src/main/resources
+[WARNING] Parameter 'sql.home' is unknown
+""".splitlines()
+
+
+# the implementation before the filter engine
+parse_state = ''
+parse_info_expr = re.compile(r'\[INFO\]( (.+))?')
+parse_flyway_info_expr = re.compile(r'\[INFO\] (--- (flyway|flyway-maven-plugin):(\d+\.)*\d+:info .+ ---)')
+parse_summary_expr = re.compile(r'\[INFO\] ((Reactor Summary|BUILD SUCCESS).*)')
+
+
+def process_output_line(line):
+    global parse_state
+
+    output = None
+    if parse_state == 'summary':
+        output = line
+    elif parse_state == 'flyway_info':
+        if not line:
+            parse_state = ''
+        else:
+            m = parse_info_expr.match(line)
+            if m:
+                output = m.group(2)
+                if output is not None and output == 'Skipping Flyway execution':
+                    parse_state = 'flyway_info_skip'
+            else:
+                output = line
+    else:
+        m = parse_flyway_info_expr.match(line)
+        if m:
+            output = line  # show whole line
+            parse_state = 'flyway_info'
+        else:
+            m = parse_summary_expr.match(line)
+            if m:
+                output = line  # show whole line
+                parse_state = 'summary'
+    if output:
+        print(output, flush=True)
+
+
+def legacy_output(lines):
+    global parse_state
+
+    parse_state = ''
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        for line in lines:
+            process_output_line(line)
+    return stdout.getvalue()
+
+
+def engine_output(action, lines, summary=True):
+    stdout = io.StringIO()
+    engine = OutputFilterEngine.for_action(action, summary=summary, write=stdout.write)
+    engine.feed_lines(lines)
+    engine.flush()
+    return stdout.getvalue()
+
+
+def expected_output(lines):
+    # the legacy output where the flyway info table is replaced by a summary
+    output = legacy_output(lines)
+    table = output[output.index('+---'):output.rindex('---+\n') + len('---+\n')]
+    return output.replace(table, 'database: 1 migrations, 1 pending, 0 failed, latest version -\n')
+
+
+def test_db_info_parity():
+    lines = NOISE + FLYWAY_INFO
+    assert engine_output('db-info', lines) == expected_output(lines)
+    assert 'Skipping Flyway execution' in engine_output('db-info', lines)
+    assert '| Versioned | 1' not in engine_output('db-info', lines)
+
+
+def test_db_info_table():
+    lines = NOISE + FLYWAY_INFO
+    assert engine_output('db-info', lines, summary=False) == legacy_output(lines)
+
+
+def test_db_info_without_module():
+    lines = [line.replace(' @ ORACLE_TOOLS', '') for line in FLYWAY_INFO]
+    assert engine_output('db-info', lines) == legacy_output(lines)
+
+
+def test_db_code_check():
+    lines = ['[WARNING] finding 1', '[WARNING] finding 2', '[INFO] noise', '[INFO] BUILD SUCCESS', 'total']
+    assert engine_output('db-code-check', lines) == '[WARNING] finding 1\n[WARNING] finding 2\n[INFO] BUILD SUCCESS\ntotal\n'
+
+
+def test_batches():
+    writes = []
+    engine = OutputFilterEngine.for_action('db-code-check', write=writes.append, batch_size=10, flush_interval=3600)
+    for i in range(25):
+        engine('[WARNING] finding %d' % i)
+    engine.flush()
+    assert len(writes) == 3
+    assert ''.join(writes).count('\n') == 25
+
+
+def test_throughput():
+    # a million line Maven log with the db-info output at the end
+    lines = NOISE * (1000000 // len(NOISE)) + FLYWAY_INFO
+
+    start = time.perf_counter()
+    legacy_output(lines)
+    legacy_elapsed = time.perf_counter() - start
+    expected = expected_output(lines)
+
+    start = time.perf_counter()
+    actual = engine_output('db-info', lines)
+    elapsed = time.perf_counter() - start
+
+    # the timings depend on the machine: they are shown (pytest -s), the output is checked
+    print('filtering %d lines: legacy %.0f lines/sec, engine %.0f lines/sec' % (len(lines), len(lines) / legacy_elapsed, len(lines) / elapsed))
+    assert actual == expected
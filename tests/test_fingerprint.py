@@ -0,0 +1,77 @@
+import os
+import time
+
+from pato_gui import cache, fingerprint
+
+
+POM = """<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <modelVersion>4.0.0</modelVersion>
+  <groupId>com.paulissoft.pato</groupId>
+  <artifactId>db</artifactId>
+  <version>1.0.0</version>
+</project>
+"""
+
+FILES = 2000
+
+
+def make_project(tmp_path):
+    pom_file = tmp_path / 'db' / 'pom.xml'
+    for i in range(FILES):
+        path = tmp_path / 'db' / 'src' / 'full' / f'dir{i % 20}' / f'R__{i}.sql'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f'create or replace view v{i} as select {i} as n from dual;\n')
+    pom_file.write_text(POM)
+    (tmp_path / 'conf' / 'bc_dev').mkdir(parents=True)
+    (tmp_path / 'conf' / 'bc_dev' / 'db.properties').write_text('db.username=SCOTT\n')
+    return pom_file
+
+
+def test_fingerprint(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    pom_file = make_project(tmp_path)
+    db_config_dir = str(tmp_path / 'conf')
+    hashed = []
+    file_digest = cache.file_digest
+    monkeypatch.setattr(cache, 'file_digest', lambda path: hashed.append(path) or file_digest(path))
+
+    def fp(*options):
+        hashed.clear()
+        start = time.perf_counter()
+        result = fingerprint.fingerprint(pom_file, db_config_dir, 'bc_dev', 'db-install', options)
+        return result, time.perf_counter() - start
+
+    cold, cold_elapsed = fp()
+    assert len(hashed) == FILES + 1 + 1 + 1  # the sources, the POM twice (tree and chain) and db.properties
+    warm, warm_elapsed = fp()
+    print('fingerprint of %d files: cold %.3f seconds, warm %.3f seconds' % (FILES, cold_elapsed, warm_elapsed))
+    assert warm == cold
+    assert [os.path.basename(path) for path in hashed] == ['pom.xml']  # only the POM chain
+
+    # the build output does not matter, the sources, options and database configuration do
+    (tmp_path / 'db' / 'target').mkdir()
+    (tmp_path / 'db' / 'target' / 'output.txt').write_text('output')
+    assert fp()[0] == cold
+    source = tmp_path / 'db' / 'src' / 'full' / 'dir0' / 'R__0.sql'
+    source.write_text(source.read_text().replace('0 as n', '1 as n'))
+    changed = fp()[0]
+    assert changed != cold
+    assert str(source) in hashed and len(hashed) == 2
+    assert fp('-Dflyway.cleanDisabled=false')[0] != changed
+    (tmp_path / 'conf' / 'bc_dev' / 'db.properties').write_text('db.username=BC\n')
+    changed = fp()[0]
+    assert changed != cold
+    # the Maven configuration of the project is an input too, although it is in a hidden directory
+    (tmp_path / '.mvn').mkdir()
+    (tmp_path / '.mvn' / 'maven.config').write_text('-T4\n')
+    assert fp()[0] != changed
+
+
+def test_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    assert fingerprint.unchanged('pom.xml', 'bc_dev', 'db-install', 'abc') is None
+    fingerprint.record('pom.xml', 'bc_dev', 'db-install', 'abc')
+    assert fingerprint.unchanged('pom.xml', 'bc_dev', 'db-install', 'abc') <= time.time()
+    assert fingerprint.unchanged('pom.xml', 'bc_dev', 'db-install', 'def') is None
+    assert fingerprint.unchanged('pom.xml', 'bc_tst', 'db-install', 'abc') is None
@@ -0,0 +1,76 @@
+import io
+import csv
+import json
+import time
+
+from pato_gui import flyway
+
+
+HEADER = """[INFO] --- flyway-maven-plugin:10.12.0:info (default-cli) @ ORACLE_TOOLS ---
+[INFO] Database: jdbc:oracle:thin:@bc_dev (Oracle 19.27)
+[INFO]
+[INFO] +-----------+----------------+-------------+------+---------------------+---------+----------+
+| Category  | Version        | Description | Type | Installed On        | State   | Undoable |
++-----------+----------------+-------------+------+---------------------+---------+----------+
+""".splitlines()
+
+FOOTER = """+-----------+----------------+-------------+------+---------------------+---------+----------+
+
+[INFO] BUILD SUCCESS
+""".splitlines()
+
+
+def row(version, state, description='init'):
+    return f'| Versioned | {version} | {description} | SQL | 2024-01-01 10:00:00 | {state} | No |'
+
+
+def test_parser():
+    migrations = []
+    parser = flyway.FlywayInfoParser('bc_dev', migrations.append)
+    lines = HEADER + [row('1.9', 'Success'), row('1.10', 'Success', 'a | b'), row('1.11', 'Failed'), row('2', 'Pending')] + FOOTER
+    table_lines = [line for line in lines if parser.feed(line)]
+    assert len(table_lines) == 8
+    assert migrations[1] == flyway.Migration('bc_dev', 'ORACLE_TOOLS', 'Versioned', '1.10', 'a | b', 'SQL', '2024-01-01 10:00:00', 'Success')
+    assert str(parser.summary) == 'bc_dev: 4 migrations, 1 pending, 1 failed, latest version 1.10'
+
+
+def test_parser_other_goals():
+    parser = flyway.FlywayInfoParser('bc_dev')
+    assert not parser.feed('| not | a | flyway | table |')
+    assert not parser.feed('[INFO] --- flyway:10.12.0:migrate (default-cli) @ ORACLE_TOOLS ---')
+    assert not parser.feed('+-----+')
+    assert parser.summary.migrations == 0
+
+
+def test_writers():
+    migrations = []
+    parser = flyway.FlywayInfoParser('bc_dev', migrations.append)
+    for line in HEADER + [row(i, 'Success') for i in range(1, 4)] + FOOTER:
+        parser.feed(line)
+    for format in flyway.FORMATS:
+        stream = io.StringIO()
+        writer = flyway.writer(format, stream)
+        for migration in migrations:
+            writer.write(migration)
+        writer.close()
+        if format == 'json':
+            records = json.loads(stream.getvalue())
+        else:
+            records = list(csv.DictReader(io.StringIO(stream.getvalue())))
+        assert [record['version'] for record in records] == ['1', '2', '3']
+        assert records[0]['installed_on'] == '2024-01-01 10:00:00'
+    stream = io.StringIO()
+    flyway.writer('json', stream).close()
+    assert json.loads(stream.getvalue()) == []
+
+
+def test_throughput():
+    # a schema with 100,000 migrations
+    lines = HEADER + [row(i, 'Success') for i in range(100000)] + FOOTER
+    parser = flyway.FlywayInfoParser('bc_dev')
+    start = time.perf_counter()
+    for line in lines:
+        parser.feed(line)
+    elapsed = time.perf_counter() - start
+    assert parser.summary.latest_version == '99999'
+    assert elapsed < 5
@@ -0,0 +1,82 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from pato_gui import inventory, program
+
+from tests import fakes
+
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+
+def make_db(db_config_dir, db, **properties):
+    (db_config_dir / db).mkdir(parents=True)
+    (db_config_dir / db / 'db.properties').write_text(''.join(f'{key}={value}\n' for key, value in properties.items()))
+
+
+def test_inventory(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    db_config_dir = tmp_path / 'conf'
+    make_db(db_config_dir, 'orcl', **{'db.url': 'jdbc:oracle:thin:@//localhost:1521/orcl'})
+    make_db(db_config_dir, 'bc_prd', **{'db.connect.identifier': 'bc_prd_tns', 'db.proxy.username': 'BC_PROXY'})
+    make_db(db_config_dir, 'bc_dev', **{'db.username': 'SCOTT'})
+    (db_config_dir / 'README.md').write_text('not a database')
+
+    dbs = inventory.inventory(db_config_dir)
+    assert [db['name'] for db in dbs] == ['bc_dev', 'bc_prd', 'orcl']
+    assert dbs[0]['db_username'] == 'SCOTT'
+    assert dbs[1]['connect_identifier'] == 'bc_prd_tns' and dbs[1]['db_proxy_username'] == 'BC_PROXY'
+    assert dbs[2]['connect_identifier'] == '//localhost:1521/orcl'
+    assert dbs[0]['last_used'] is None
+
+    # an unchanged directory is not scanned again
+    scans = []
+    scan = inventory._scan
+    monkeypatch.setattr(inventory, '_scan', lambda *args: scans.append(args) or scan(*args))
+    assert inventory.databases(db_config_dir) == ['bc_dev', 'bc_prd', 'orcl']
+    assert scans == []
+
+    # a new database is found and only its properties are read
+    make_db(db_config_dir, 'bc_tst')
+    os.utime(db_config_dir, ns=(0, os.stat(db_config_dir).st_mtime_ns + 1))
+    read = []
+    database = inventory._database
+    monkeypatch.setattr(inventory, '_database', lambda entry: read.append(entry.name) or database(entry))
+    assert inventory.databases(db_config_dir) == ['bc_dev', 'bc_tst', 'bc_prd', 'orcl']
+    assert len(scans) == 1 and read == ['bc_tst']
+
+    inventory.record_use(db_config_dir, ['orcl'])
+    assert inventory.inventory(db_config_dir)[-1]['last_used'] is not None
+
+
+def test_main(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    make_db(tmp_path / 'conf', 'bc_acc', **{'db.username': 'SCOTT'})
+    make_db(tmp_path / 'conf', 'bc_dev')
+    inventory.main([str(tmp_path / 'conf')])
+    assert capsys.readouterr().out == 'bc_dev\nbc_acc\n'
+    inventory.main([str(tmp_path / 'conf'), '--long'])
+    assert capsys.readouterr().out.splitlines()[1] == 'bc_acc\t-\tSCOTT\t-\t-'
+
+
+def test_run_POM_file_all(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    monkeypatch.setenv('PATH', fakes.install_all(bin_dir))
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    shutil.copytree(DATA_DIR / 'pato', tmp_path / 'pato')
+    db_config_dir = tmp_path / 'conf'
+    db_config_dir.mkdir()
+    argv = ['--action', 'db-info', '--db', 'all', '--db-password', 'secret', '--file', str(tmp_path / 'pato' / 'db' / 'pom.xml'),
+            '--db-config-dir', str(db_config_dir), '--no-preflight']
+    with pytest.raises(RuntimeError, match='There are no databases'):
+        program.run_POM_file(argv)
+
+    # a single database is run like --db bc_dev
+    make_db(db_config_dir, 'bc_dev')
+    os.utime(db_config_dir, ns=(0, os.stat(db_config_dir).st_mtime_ns + 1))
+    program.run_POM_file(argv)
+    (mvn_args,) = fakes.calls(bin_dir, 'mvn')
+    assert '-Ddb=bc_dev' in mvn_args and '-Ddb=all' not in mvn_args
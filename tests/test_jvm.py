@@ -0,0 +1,62 @@
+import asyncio
+import os
+import shlex
+
+import pytest
+
+from pato_gui import jvm, program
+
+from tests import fakes
+
+
+@pytest.fixture
+def toolchain(tmp_path, monkeypatch):
+    """Fake tools in an installation of Maven 3.9.6 and Java 17.0.9 (versions read from its files)."""
+    bin_dir = tmp_path / 'bin'
+    monkeypatch.setenv('PATH', fakes.install_all(bin_dir, mvn={'lines': 10}))
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.delenv('JAVA_HOME', raising=False)
+    monkeypatch.delenv('MAVEN_OPTS', raising=False)
+    (tmp_path / 'lib').mkdir()
+    (tmp_path / 'lib' / 'maven-core-3.9.6.jar').touch()
+    (tmp_path / 'release').write_text('JAVA_VERSION="17.0.9"\n')
+    return tmp_path
+
+
+def test_options(toolchain, monkeypatch):
+    archive = jvm.archive_file('3.9.6', '17.0.9')
+    options, dump = jvm.options('db-info')
+    assert options[:len(jvm.SHORT_ACTION_PRESET)] == jvm.SHORT_ACTION_PRESET
+    assert options[-1] == '-XX:ArchiveClassesAtExit=%s' % (dump)
+    # a long action gets the archive only
+    options, dump = jvm.options('db-install')
+    assert options == jvm.CDS_OPTIONS + ['-XX:ArchiveClassesAtExit=%s' % (dump)]
+    monkeypatch.setenv('MAVEN_OPTS', '-Xmx2g')
+    with jvm.tuned_environment('db-info') as env:
+        assert env['MAVEN_OPTS'].endswith(' -Xmx2g')
+        assert env['MAVEN_OPTS'].startswith(' '.join(jvm.SHORT_ACTION_PRESET))
+    # a new Java version invalidates the archive
+    archive.write_bytes(b'CDS')
+    assert jvm.options('db-info')[0][-1] == '-XX:SharedArchiveFile=%s' % (archive)
+    (toolchain / 'release').write_text('JAVA_VERSION="21.0.1"\n')
+    assert jvm.options('db-info')[0][-2:] == ['-XX:+AutoCreateSharedArchive', '-XX:SharedArchiveFile=%s' % (jvm.archive_file('3.9.6', '21.0.1'))]
+    assert not archive.exists()
+    monkeypatch.setenv('PATO_GUI_JVM_TUNING', '0')
+    assert jvm.options('db-info') == ([], None)
+
+
+def test_run_creates_archive(toolchain):
+    args, extra = program.parse_run_POM_file_arguments(['--action', 'db-info', '--db', 'bc_dev', '--file', str(toolchain / 'pom.xml'), '--db-config-dir', str(toolchain)])
+    asyncio.run(program.run_maven_async(shlex.split(program.maven_command(args, 'bc_dev', extra)), None, program.daemon.NO_DAEMON, action='db-info'))
+    assert jvm.archive_file('3.9.6', '17.0.9').read_bytes() == b'CDS'
+    assert jvm.options('db-info')[1] is None
+
+
+def test_benchmark(toolchain, capsys):
+    jvm.main(['benchmark', '--rounds', '2', '--action', 'db-info', '--db', 'bc_dev', '--file', str(toolchain / 'pom.xml'), '--db-config-dir', str(toolchain)])
+    out = capsys.readouterr().out.splitlines()
+    assert [line.split()[0] for line in out[:3]] == ['Variant', 'tuned', 'untuned']
+    assert out[3].startswith('The tuning saves')
+    # an untimed run first and then two rounds of two variants
+    assert len(fakes.calls(toolchain / 'bin', 'mvn')) == 5
+    assert os.path.exists(jvm.archive_file('3.9.6', '17.0.9'))
@@ -0,0 +1,71 @@
+import gzip
+
+from pato_gui import logview
+
+
+LOG = """[INFO] Scanning for projects...
+[INFO] --- maven-antrun-plugin:3.1.0:run (ddl) @ db ---
+[WARNING] Parameter 'sql.home' is unknown
+[INFO] ORA-00942: table or view does not exist
+[ERROR] Failed to execute goal
+[INFO] Reactor Summary for db 1.0:
+"""
+
+
+def test_index(tmp_path):
+    log_file = tmp_path / 'run.log'
+    log_file.write_text(LOG)
+    with logview.LogIndex(log_file) as log:
+        assert len(log) == 6
+        assert {mark: list(numbers) for mark, numbers in log.marks.items()} == \
+            {'errors': [3, 4], 'warnings': [2], 'plugins': [1], 'summary': [5]}
+        assert log.line(4) == '[ERROR] Failed to execute goal'
+        assert list(log.search('ORA-|goal')) == [3, 4]
+        assert list(log.search('scanning', ignore_case=True)) == [0]
+    assert (tmp_path / 'run.log.idx').exists()
+
+
+def test_index_grows(tmp_path, monkeypatch):
+    log_file = tmp_path / 'run.log'
+    # an incomplete last line is not indexed
+    log_file.write_text(LOG + '[ERROR] not yet')
+    logview.LogIndex(log_file).close()
+    with open(log_file, 'a') as f:
+        f.write(' complete\n[INFO] BUILD FAILURE\n')
+
+    indexed = []
+    index = logview.LogIndex._index
+    monkeypatch.setattr(logview.LogIndex, '_index', lambda self, start: indexed.append(start) or index(self, start))
+    with logview.LogIndex(log_file) as log:
+        assert indexed == [len(LOG)]
+        assert len(log) == 8
+        assert list(log.marks['errors']) == [3, 4, 6]
+        assert list(log.marks['summary']) == [5, 7]
+
+    # a new log with the same name is indexed again from the start
+    log_file.write_text(LOG.replace('Scanning', 'Looking'))
+    with logview.LogIndex(log_file) as log:
+        assert indexed[-1] == 0 and len(log) == 6
+
+    # also when only a part after the head differs (rewritten in place, so the same inode)
+    log_file.write_text(LOG * 100)
+    logview.LogIndex(log_file).close()
+    with open(log_file, 'r+') as f:
+        f.seek(len(LOG) * 100 - len('1.0:\n'))
+        f.write('2.0:\n[INFO] BUILD SUCCESS\n')
+    with logview.LogIndex(log_file) as log:
+        assert indexed[-1] == 0 and len(log) == 601
+        assert list(log.marks['summary'])[-2:] == [599, 600]
+
+
+def test_compressed(tmp_path, capsys):
+    log_file = tmp_path / 'run.log.gz'
+    with gzip.open(log_file, 'wt') as f:
+        f.write(LOG)
+    logview.main([str(log_file), '--errors', '-C', '1'])
+    assert capsys.readouterr().out.splitlines() == [
+        "3-[WARNING] Parameter 'sql.home' is unknown",
+        '4:[INFO] ORA-00942: table or view does not exist',
+        '5:[ERROR] Failed to execute goal',
+        '6-[INFO] Reactor Summary for db 1.0:',
+    ]
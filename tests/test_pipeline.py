@@ -0,0 +1,100 @@
+import shutil
+import sys
+import time
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
+from pato_gui import pipeline, stats
+
+from tests import fakes
+
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+
+PIPELINE = """
+[pipeline]
+db = "bc_dev"
+jobs = 2
+
+[[step]]
+name = "install"
+pom = "db/pom.xml"
+action = "db-install"
+
+[[step]]
+name = "test"
+pom = "db/pom.xml"
+action = "db-test"
+needs = ["install"]
+
+[[step]]
+name = "apex"
+pom = "apex/pom.xml"
+action = "apex-import"
+db = "bc_tst"
+needs = ["install"]
+options = ["-Dapex.application=138"]
+"""
+
+
+def make_step(name, needs=(), returncode=0, sleep=0.5):
+    step = pipeline.PipelineStep(name, 'pom.xml', 'db-info', 'bc_dev', needs)
+    step.cmd = [sys.executable, '-c', f'import sys, time; time.sleep({sleep}); sys.exit({returncode})']
+    return step
+
+
+def test_load(tmp_path):
+    (tmp_path / 'pipeline.toml').write_text(PIPELINE)
+    settings, steps = pipeline.load(tmp_path / 'pipeline.toml')
+    assert settings['jobs'] == 2
+    assert [(step.name, step.db, step.needs) for step in steps] == [('install', 'bc_dev', []), ('test', 'bc_dev', ['install']), ('apex', 'bc_tst', ['install'])]
+    assert steps[2].pom_file == str(tmp_path / 'apex' / 'pom.xml')
+    assert steps[2].options == ['-Dapex.application=138']
+    assert pipeline.load(tmp_path / 'pipeline.toml', 'bc_acc')[1][0].db == 'bc_acc'
+
+    (tmp_path / 'pipeline.toml').write_text(PIPELINE.replace('needs = ["install"]', 'needs = ["unknown"]', 1))
+    with pytest.raises(AssertionError, match='needs unknown step'):
+        pipeline.load(tmp_path / 'pipeline.toml')
+
+
+def test_run_pipeline(tmp_path):
+    steps = [make_step('install'), make_step('test', ['install']), make_step('apex', ['install']), make_step('export', ['test', 'apex'])]
+    start = time.perf_counter()
+    pipeline.run_pipeline(steps, 2, tmp_path)
+    elapsed = time.perf_counter() - start
+    assert [step.status for step in steps] == ['OK'] * 4
+    # test and apex run at the same time
+    assert 3 * 0.5 <= elapsed < 4 * 0.5
+    assert abs(steps[1].start - steps[2].start) < 0.25
+    assert steps[3].start >= steps[1].start + steps[1].duration
+    assert 'install' in pipeline.report(steps).splitlines()[2]
+
+
+def test_run_pipeline_failure(tmp_path):
+    steps = [make_step('install', returncode=1), make_step('test', ['install']), make_step('other', sleep=1)]
+    pipeline.run_pipeline(steps, 2, tmp_path)
+    # the independent step already running finishes
+    assert [step.status for step in steps] == ['FAILED (1)', 'NOT RUN', 'OK']
+
+
+def test_main(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    monkeypatch.setenv('PATH', fakes.install_all(bin_dir))
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    shutil.copytree(DATA_DIR / 'pato', tmp_path / 'pato')
+    (tmp_path / 'conf' / 'bc_dev').mkdir(parents=True)
+    (tmp_path / 'pipeline.toml').write_text(PIPELINE.split('[[step]]\nname = "apex"')[0].replace('db/pom.xml', 'pato/db/pom.xml'))
+    argv = [str(tmp_path / 'pipeline.toml'), '--db-config-dir', str(tmp_path / 'conf'), '--db-password', 'secret', '--mvnd', '--log-dir', str(tmp_path / 'logs')]
+    pipeline.main(argv, native=False)
+    # like a single run: with the Maven daemon (serial for these actions), recorded for the tool used
+    assert [args[:1] for args in fakes.calls(bin_dir, 'mvnd') if '-B' in args] == [['-T1'], ['-T1']]
+    with closing(stats._connect()) as connection:
+        assert [run['tool'] for run in stats.runs(connection, str(tmp_path / 'pato' / 'db' / 'pom.xml'), 'bc_dev', 'db-install')] == ['mvnd']
+
+    # nothing changed: the install is skipped and the test (needing it) still runs
+    pipeline.main(argv, native=False)
+    assert sum('-Pdb-install' in args for args in fakes.calls(bin_dir, 'mvnd')) == 1
+    assert sum('-Pdb-test' in args for args in fakes.calls(bin_dir, 'mvnd')) == 2
@@ -0,0 +1,182 @@
+import io
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from pato_gui import pom
+
+
+DATA_DIR = Path(__file__).parent / 'data' / 'pato'
+
+
+def copy_project(tmp_path):
+    shutil.copytree(DATA_DIR, tmp_path / 'pato')
+    return tmp_path / 'pato' / 'db' / 'pom.xml'
+
+
+def recorded_POM_settings(pom_file):
+    """The POM settings as parsed from the recorded Maven inquiry output (db.* properties only)."""
+    stdout = (DATA_DIR / 'mvn-inquiry.out').read_text().replace('@basedir@', pom._escape_property_value(str(pom_file.parent)))
+    properties, profiles = pom.parse_POM_settings(stdout)
+    return {k: v for k, v in properties.items() if k.startswith(pom.INQUIRY_PROPERTY_PREFIX)}, profiles
+
+
+def test_resolve_POM_settings_parity(tmp_path):
+    pom_file = copy_project(tmp_path)
+    assert pom.resolve_POM_settings(pom_file, None) == recorded_POM_settings(pom_file)
+
+
+def test_resolve_POM_settings_db_config_dir(tmp_path):
+    pom_file = copy_project(tmp_path)
+    properties, _ = pom.resolve_POM_settings(pom_file, tmp_path / 'conf')
+    assert properties['db.config.dir'] == str(tmp_path / 'conf')
+
+
+def test_resolve_POM_settings_activation(tmp_path):
+    pom_file = copy_project(tmp_path)
+    (pom_file.parent / 'src' / 'full').mkdir(parents=True)
+    properties, _ = pom.resolve_POM_settings(pom_file, None)
+    assert properties['db.full'] == 'true'
+    # the file activated profile deactivates the one active by default
+    assert properties['db.test.enabled'] == 'true'
+
+
+def test_resolve_POM_settings_local_repository(tmp_path, monkeypatch):
+    pom_file = copy_project(tmp_path)
+    repository = tmp_path / 'repository'
+    parent_dir = repository / 'com' / 'paulissoft' / 'pato' / 'pato-db-parent' / '2025.04.25'
+    parent_dir.mkdir(parents=True)
+    shutil.move(pom_file.parent.parent / 'pom.xml', parent_dir / 'pato-db-parent-2025.04.25.pom')
+    monkeypatch.setenv('MAVEN_REPO_LOCAL', str(repository))
+    assert pom.pom_chain(pom_file)[1] == parent_dir / 'pato-db-parent-2025.04.25.pom'
+    assert pom.resolve_POM_settings(pom_file, None)[1] == recorded_POM_settings(pom_file)[1]
+
+
+def test_resolve_POM_settings_unresolvable(tmp_path):
+    pom_file = copy_project(tmp_path)
+    pom_file.write_text(pom_file.read_text().replace('<name>db</name>', '<name>db</name></property><jdk>17</jdk><property><name>x</name>'))
+    with pytest.raises(pom.UnresolvablePOM):
+        pom.resolve_POM_settings(pom_file, None)
+
+
+def test_resolve_POM_settings_build_configuration(tmp_path, monkeypatch):
+    pom_file = copy_project(tmp_path)
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    monkeypatch.delenv('MAVEN_ARGS', raising=False)
+    (tmp_path / 'home' / '.m2').mkdir(parents=True)
+    (pom_file.parent / '.mvn').mkdir()
+    (pom_file.parent / '.mvn' / 'maven.config').write_text('-B -T1C\n')
+    pom.resolve_POM_settings(pom_file, None)
+    (pom_file.parent / '.mvn' / 'maven.config').write_text('-B\n-Ddb.username=SCOTT\n')
+    with pytest.raises(pom.UnresolvablePOM, match='maven.config has option -Ddb.username=SCOTT'):
+        pom.resolve_POM_settings(pom_file, None)
+    (pom_file.parent / '.mvn' / 'maven.config').unlink()
+    (tmp_path / 'home' / '.m2' / 'settings.xml').write_text(
+        '<settings><profiles><profile><id>oracle</id><properties><db.config.dir>/conf</db.config.dir></properties></profile></profiles></settings>')
+    with pytest.raises(pom.UnresolvablePOM, match='profile oracle with properties'):
+        pom.resolve_POM_settings(pom_file, None)
+
+
+def test_determine_POM_settings_fallback(tmp_path, monkeypatch):
+    pom_file = copy_project(tmp_path)
+    (pom_file.parent.parent / 'pom.xml').unlink()
+    monkeypatch.setenv('MAVEN_REPO_LOCAL', str(tmp_path / 'repository'))
+    monkeypatch.setattr(pom, 'inquire_POM_settings', lambda pom_file, db_config_dir: ({}, {'maven'}))
+    assert pom.determine_POM_settings(pom_file, None) == ({}, {'maven'})
+
+
+def test_resolve_POM_settings_performance(tmp_path):
+    pom_file = copy_project(tmp_path)
+    start = time.perf_counter()
+    for _ in range(10):
+        pom.resolve_POM_settings(pom_file, None)
+    assert (time.perf_counter() - start) / 10 < 0.1
+
+
+def make_mvn(tmp_path, script):
+    mvn = tmp_path / 'bin' / 'mvn'
+    mvn.parent.mkdir()
+    mvn.write_text('#!/bin/sh\n' + script + '\n')
+    mvn.chmod(0o755)
+    return str(mvn.parent)
+
+
+def test_inquire_POM_settings_early_stop(tmp_path, monkeypatch):
+    recorded = DATA_DIR / 'mvn-inquiry.out'
+    # after the inquiry output Maven "hangs": the inquiry must stop it
+    monkeypatch.setenv('PATH', make_mvn(tmp_path, f'cat {recorded}; sleep 60') + ':' + os.environ['PATH'])
+    start = time.perf_counter()
+    properties, profiles = pom.inquire_POM_settings(tmp_path / 'pom.xml', None)
+    assert time.perf_counter() - start < 30
+    assert properties['db.proxy.username'] == 'BC_PROXY'
+    assert profiles.issuperset(pom.DB_PROFILES)
+
+
+def test_inquire_POM_settings_error(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATH', make_mvn(tmp_path, 'for i in $(seq 1 1000); do echo "error $i" 1>&2; done; exit 1') + ':' + os.environ['PATH'])
+    with pytest.raises(Exception) as excinfo:
+        pom.inquire_POM_settings(tmp_path / 'pom.xml', None)
+    assert 'return code 1' in str(excinfo.value)
+    assert 'error 1000' in str(excinfo.value)
+    assert 'error 900\n' not in str(excinfo.value)
+
+
+def legacy_parse_POM_settings(stdout):
+    """The parser before it was made streaming: one character at a time and regular expressions for every line."""
+    properties = {}
+    profiles = set()
+    line = ''
+    for ch in stdout:
+        if ch != "\n":
+            line += ch
+        else:
+            m = re.search(r"Profile Id: ([a-zA-Z0-9_.-]+) \(Active: .*, Source: pom\)", line)
+            if m:
+                profiles.add(m.group(1))
+            else:
+                m = re.search(r'\[echoproperties\] ([a-zA-Z0-9_.-]+)=(.+)$', line)
+                if m:
+                    properties[m.group(1)] = m.group(2)
+            line = ''
+    return properties, profiles
+
+
+def test_parse_POM_settings_benchmark():
+    # a multi-MB synthetic debug (-X) log with the inquiry output at the end
+    noise = ''.join('[DEBUG]   (f) project = MavenProject: com.paulissoft.pato:bc-db:2025.04.25 @ /dev/pom.xml %d\n' % i for i in range(50000))
+    stdout = noise + (DATA_DIR / 'mvn-inquiry.out').read_text()
+    assert len(stdout) > 4 * 1024 * 1024
+
+    start = time.perf_counter()
+    expected = legacy_parse_POM_settings(stdout)
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = pom.parse_POM_settings(io.StringIO(stdout))
+    elapsed = time.perf_counter() - start
+
+    print('parsing %d bytes: legacy %.3f seconds, streaming %.3f seconds' % (len(stdout), legacy_elapsed, elapsed))
+    assert actual == expected
+    assert elapsed < legacy_elapsed
+
+
+def test_restart_command(tmp_path, monkeypatch):
+    pom_file = str(copy_project(tmp_path))
+    python = [pom.sys.executable, '-m', 'pato_gui']
+
+    # the POM file and database configuration directory chosen in the GUI
+    monkeypatch.setattr(pom.sys, 'argv', ['pato-gui', '--ignore-gooey', '-d'])
+    assert pom.restart_command(pom_file, '/conf') == python + ['-d', '--db-config-dir', '/conf', pom_file]
+    assert pom.restart_command(pom_file, None) == python + ['-d', pom_file]
+
+    # the POM file supplied on the command line
+    monkeypatch.chdir(Path(pom_file).parent)
+    monkeypatch.setattr(pom.sys, 'argv', ['pato-gui', '--db-config-dir', '/conf', 'pom.xml'])
+    assert pom.restart_command(pom_file, '/conf') == python + ['--db-config-dir', '/conf', 'pom.xml']
+
+    monkeypatch.setattr(pom.sys, 'frozen', True, raising=False)
+    assert pom.restart_command(pom_file, '/conf') == [pom.sys.executable, '--db-config-dir', '/conf', 'pom.xml']
@@ -0,0 +1,97 @@
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from pato_gui import inventory, preflight, program
+
+from tests import fakes
+
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """Fake tools (a database on host tst is unreachable) and a database configuration directory."""
+    bin_dir = tmp_path / 'bin'
+    monkeypatch.setenv('PATH', fakes.install_all(bin_dir, sql={'unreachable': ['tst:1521/orcl'], 'hang': 30}))
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    for db in ['bc_dev', 'bc_tst', 'bc_acc']:
+        (tmp_path / 'conf' / db).mkdir(parents=True)
+        (tmp_path / 'conf' / db / 'env.properties').write_text('db.connect.identifier=%s:1521/orcl\ndb.username=BC_APP\n' % (db[3:]))
+    return bin_dir, str(tmp_path / 'conf')
+
+
+def test_check(databases):
+    bin_dir, db_config_dir = databases
+    probes = preflight.probes(db_config_dir, ['bc_dev', 'bc_tst', 'bc_acc', 'bc_prd'], lambda db: 'wrong' if db == 'bc_acc' else 'secret')
+    start = time.perf_counter()
+    preflight.check(probes, timeout=2)
+    assert time.perf_counter() - start < 10
+    assert preflight.summary(probes).splitlines() == [
+        'bc_dev: OK',
+        'bc_tst: TIMEOUT (no answer in time)',
+        'bc_acc: FAILED (ORA-01017: invalid username/password; logon denied)',
+        'bc_prd: SKIPPED (the connect identifier, username or password is not known)']
+    # one session for two databases
+    probes = preflight.probes(db_config_dir, ['bc_dev', 'bc_acc'], lambda db: 'secret')
+    assert [probe.status for probe in preflight.check(probes, sessions=1)] == ['OK', 'OK']
+    assert fakes.calls(bin_dir, 'sql').count(['-S', '/nolog']) == 4
+
+
+def test_check_unquotable_password(databases):
+    bin_dir, db_config_dir = databases
+    probes = preflight.probes(db_config_dir, ['bc_dev', 'bc_acc'], lambda db: 'secret"@orcl' if db == 'bc_dev' else 'x\nhost rm -rf /')
+    assert [probe.status for probe in preflight.check(probes)] == ['FAILED', 'FAILED']
+    assert probes[0].error == 'the password contains a double quote or the connect details a line break'
+    # not even started
+    assert fakes.calls(bin_dir, 'sql') == []
+
+
+def test_run_POM_file_fails_before_maven(databases, tmp_path):
+    bin_dir, db_config_dir = databases
+    shutil.copytree(DATA_DIR / 'pato', tmp_path / 'pato')
+    argv = ['--action', 'db-info', '--db', 'bc_dev,bc_acc', '--db-password', 'wrong', '--file', str(tmp_path / 'pato' / 'db' / 'pom.xml'), '--db-config-dir', db_config_dir]
+    with pytest.raises(RuntimeError, match='Can not connect to database.s. bc_dev, bc_acc'):
+        program.run_POM_file(argv)
+    assert fakes.calls(bin_dir, 'mvn') == []
+    # the use is only recorded once the check passed
+    assert [db['last_used'] for db in inventory.inventory(db_config_dir)] == [None, None, None]
+
+
+def test_run_POM_file_skipped_before_check(databases, tmp_path):
+    bin_dir, db_config_dir = databases
+    shutil.copytree(DATA_DIR / 'pato', tmp_path / 'pato')
+    argv = ['--action', 'db-install', '--db', 'bc_dev', '--file', str(tmp_path / 'pato' / 'db' / 'pom.xml'), '--db-config-dir', db_config_dir]
+    program.run_POM_file(argv + ['--db-password', 'secret'])
+    assert len(fakes.calls(bin_dir, 'sql')) == 1 and len(fakes.calls(bin_dir, 'mvn')) == 1
+    # nothing changed, so no check (that would fail) and no Maven run
+    program.run_POM_file(argv + ['--db-password', 'wrong'])
+    assert len(fakes.calls(bin_dir, 'sql')) == 1 and len(fakes.calls(bin_dir, 'mvn')) == 1
+
+
+def test_run_POM_file_usernames_of_POM(databases, tmp_path, monkeypatch, caplog):
+    bin_dir, db_config_dir = databases
+    shutil.copytree(DATA_DIR / 'pato', tmp_path / 'pato')
+    logins = []
+    check = preflight.check
+
+    def checking(probes, *args):
+        logins.extend(probe.login for probe in probes)
+        return check(probes, *args)
+
+    monkeypatch.setattr(preflight, 'check', checking)
+    # no username in the inventory and no result of the GUI in the cache: the usernames of the POM file
+    (Path(db_config_dir) / 'bc_acc' / 'env.properties').write_text('db.connect.identifier=acc:1521/orcl\n')
+    argv = ['--action', 'db-info', '--file', str(tmp_path / 'pato' / 'db' / 'pom.xml'), '--db-config-dir', db_config_dir, '--db-password', 'wrong']
+    with pytest.raises(RuntimeError, match='Can not connect to database.s. bc_acc'):
+        program.run_POM_file(argv + ['--db', 'bc_acc'])
+    assert logins == ['BC_PROXY[bc-db]']
+    assert fakes.calls(bin_dir, 'mvn') == []
+    # a warning when no connection can be checked
+    (Path(db_config_dir) / 'bc_prd').mkdir()
+    program.run_POM_file(argv + ['--db', 'bc_prd'])
+    assert 'None of the database connections could be checked' in caplog.text
+    assert len(fakes.calls(bin_dir, 'mvn')) == 1
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from pato_gui import runner
+
+
+def test_run_handlers():
+    stdout, stderr = [], []
+    cmd = [sys.executable, '-c', 'import sys\nfor i in range(3):\n    print("out", i)\n    print("err", i, file=sys.stderr)']
+    assert runner.run(cmd, stdout.append, stderr.append) == 0
+    assert stdout == ['out 0', 'out 1', 'out 2']
+    assert stderr == ['err 0', 'err 1', 'err 2']
+
+
+def test_run_exit_code():
+    cmd = [sys.executable, '-c', 'import sys; sys.exit(3)']
+    assert runner.run(cmd, check=False) == 3
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        runner.run(cmd)
+    assert excinfo.value.returncode == 3
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='process groups are POSIX only')
+def test_run_cancel():
+    pids = []
+
+    async def run():
+        # the shell starts a child in the same process group: both must be stopped
+        await asyncio.wait_for(runner.run_async(['sh', '-c', 'sleep 60 & echo $$; wait'], pids.append), 1)
+
+    start = time.perf_counter()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+    assert time.perf_counter() - start < 10
+    for _ in range(50):
+        try:
+            os.killpg(int(pids[0]), 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.1)
+    else:
+        pytest.fail('process group %s still exists' % pids[0])
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='process groups are POSIX only')
+def test_run_stopped_by_signal():
+    # a SIGTERM of the program (the Stop button of the GUI) stops the process group of the command too
+    script = 'from pato_gui import runner\nrunner.run(["sh", "-c", "sleep 60 & echo $$; wait"], lambda line: print(line, flush=True))'
+    program = subprocess.Popen([sys.executable, '-c', script], stdout=subprocess.PIPE, text=True)
+    pid = int(program.stdout.readline())
+    program.terminate()
+    assert program.wait(10) == -15
+    for _ in range(50):
+        try:
+            os.killpg(pid, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.1)
+    else:
+        pytest.fail('process group %s still exists' % pid)
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import shutil
+import stat
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
+from pato_gui import fingerprint, service, stats
+
+from tests import fakes
+
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+
+@pytest.fixture
+def running_service(tmp_path, monkeypatch):
+    """A service (at most one job at a time) on a socket in tmp_path with fake tools and a project."""
+    monkeypatch.setenv('PATH', fakes.install_all(tmp_path / 'bin', mvn={'lines': 200, 'rate': 1000}))
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setenv('PATO_GUI_SOCKET', str(tmp_path / 'service.sock'))
+    shutil.copytree(DATA_DIR / 'pato', tmp_path / 'pato')
+    (tmp_path / 'conf' / 'bc_dev').mkdir(parents=True)
+    svc = service.Service(jobs=1, native=False)
+    thread = threading.Thread(target=asyncio.run, args=(svc.serve(str(tmp_path / 'service.sock')),))
+    thread.start()
+    for _ in range(100):
+        if service.available():
+            break
+        time.sleep(0.05)
+    yield svc, tmp_path
+    service.main(['stop'])
+    thread.join(10)
+    assert not thread.is_alive()
+
+
+def argv(tmp_path, db='bc_dev'):
+    return ['--action', 'db-info', '--db', db, '--db-password', 'secret', '--file', str(tmp_path / 'pato' / 'db' / 'pom.xml'), '--db-config-dir', str(tmp_path / 'conf')]
+
+
+def test_run(running_service):
+    svc, tmp_path = running_service
+    messages = list(service._request({'request': 'run', 'argv': argv(tmp_path)}))
+    assert messages[0] == {'job': 1, 'status': 'queued'}
+    assert messages[-1] == {'job': 1, 'status': 'OK', 'returncode': 0}
+    assert 'bc_dev: 20 migrations, 0 pending, 0 failed, latest version 10\n' in [message.get('output') for message in messages]
+    assert service.submit(argv(tmp_path)) == {'job': 2, 'status': 'OK', 'returncode': 0}
+    # several databases are run by the client itself
+    assert service.submit(argv(tmp_path, 'bc_dev,bc_tst')) is None
+
+
+def test_other_users(running_service, monkeypatch):
+    svc, tmp_path = running_service
+    # only the user of the service may connect
+    assert stat.S_IMODE(os.stat(tmp_path / 'service.sock').st_mode) & 0o077 == 0
+    with closing(service._connect()) as client:
+        assert service._peer_uid(client) == os.getuid()
+    with monkeypatch.context() as patch:
+        patch.setattr(service, '_peer_uid', lambda sock: os.getuid() + 1)
+        with pytest.raises(RuntimeError, match='PermissionError'):
+            service._answer({'request': 'status'})
+
+
+def test_run_like_run_POM_file(running_service):
+    svc, tmp_path = running_service
+    install = [arg.replace('db-info', 'db-install') for arg in argv(tmp_path)]
+    assert service.submit(install)['status'] == 'OK'
+    # nothing changed since
+    assert service.submit(install) == {'job': 2, 'status': 'skipped', 'returncode': 0}
+    with closing(stats._connect()) as connection:
+        assert [(run['action'], run['tool']) for run in stats.runs(connection)] == [('db-install', 'mvn')]
+
+
+def test_password_of_client(running_service):
+    svc, tmp_path = running_service
+    (tmp_path / 'conf' / 'bc_dev' / 'db.properties').write_text('db.connect.identifier=orcl\ndb.username=SCOTT\n')
+    # the password exported by the client (DB_PASSWORD_<DB>) wins over the one supplied, like in run_POM_file
+    env = dict(os.environ, DB_PASSWORD_BC_DEV='wrong')
+    messages = list(service._request({'request': 'run', 'argv': argv(tmp_path), 'env': env}))
+    assert 'Can not connect to database(s) bc_dev' in messages[-2]['error']
+    assert messages[-1]['status'] == 'error'
+    env['DB_PASSWORD_BC_DEV'] = 'secret'
+    messages = list(service._request({'request': 'run', 'argv': [arg for arg in argv(tmp_path) if arg not in ('--db-password', 'secret')], 'env': env}))
+    assert messages[-1] == {'job': 2, 'status': 'OK', 'returncode': 0}
+
+
+def test_record_off_the_event_loop(running_service, monkeypatch):
+    svc, tmp_path = running_service
+    threads = []
+
+    def recording(record):
+        def wrapper(*args):
+            threads.append(threading.current_thread())
+            return record(*args)
+        return wrapper
+
+    for module in (stats, fingerprint):
+        monkeypatch.setattr(module, 'record', recording(module.record))
+    install = [arg.replace('db-info', 'db-install') for arg in argv(tmp_path)]
+    assert service.submit(install)['status'] == 'OK'
+    # the thread of the service runs the event loop: the other clients must not wait for the database of the statistics
+    assert len(threads) == 2 and all(thread.name.startswith('asyncio_') for thread in threads)
+
+
+def test_resolve_in_memory(running_service, monkeypatch):
+    svc, tmp_path = running_service
+    monkeypatch.setenv('PATO_GUI_SERVICE', '1')
+    pom_file = tmp_path / 'pato' / 'db' / 'pom.xml'
+    first = service.resolve(pom_file, str(tmp_path / 'conf'))
+    assert first[1] == ['bc_dev']
+    # from memory now, but with the databases from the inventory
+    monkeypatch.setattr(service, 'process_POM', None)
+    (tmp_path / 'conf' / 'bc_tst').mkdir()
+    assert service.resolve(pom_file, str(tmp_path / 'conf'))[1] == ['bc_dev', 'bc_tst']
+
+
+def test_queue_and_cancel(running_service):
+    svc, tmp_path = running_service
+    fakes.install(tmp_path / 'bin', 'mvn', lines=100, delay=30)
+    results = []
+    clients = [threading.Thread(target=lambda: results.append(service.submit(argv(tmp_path)))) for _ in range(2)]
+    for client in clients:
+        client.start()
+    time.sleep(1)
+    assert sorted(job['status'] for job in service._answer({'request': 'status'})['jobs']) == ['queued', 'running']
+    start = time.perf_counter()
+    for job in [1, 2]:
+        assert service._answer({'request': 'cancel', 'job': job})['cancelled']
+    for client in clients:
+        client.join(10)
+    assert time.perf_counter() - start < 10
+    assert [result['status'] for result in results] == ['cancelled', 'cancelled']
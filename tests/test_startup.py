@@ -0,0 +1,71 @@
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from pato_gui import program
+
+from tests import fakes
+
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+
+# The maximum time (in seconds) to import the command line program (pato-gui --action ...).
+STARTUP_BUDGET = 0.5
+
+GUI_MODULES = ('gooey', 'wx', 'pato_gui.gui')
+
+
+def import_times(module):
+    """Return the cumulative import time (in seconds) per module when importing a module in a fresh interpreter."""
+    return parse_import_times(subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output=True, text=True, check=True).stderr)
+
+
+def parse_import_times(stderr):
+    times = {}
+    # import time: self [us] | cumulative | imported package
+    for line in stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_command_line_imports_no_gui():
+    times = import_times('pato_gui.program')
+    assert not [name for name in times if name.split('.')[0] in GUI_MODULES or name in GUI_MODULES]
+
+
+def test_command_line_startup_budget():
+    # take the best of a few runs to be less sensitive to a busy machine
+    elapsed = min(import_times('pato_gui.program')['pato_gui.program'] for _ in range(3))
+    assert elapsed < STARTUP_BUDGET, f'Importing pato_gui.program took {elapsed:.3f} seconds, more than the budget of {STARTUP_BUDGET} seconds'
+
+
+def test_main_startup():
+    # main() in a fresh interpreter up to the parsing of the arguments of a run started by the GUI form
+    code = 'from pato_gui import program; program.run_POM_file = lambda argv: print(program.parse_run_POM_file_arguments(argv)[1]); program.main()'
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code, '--ignore-gooey', '--action', 'db-info', '--db', 'bc_dev', '--file', 'pom.xml'],
+                          capture_output=True, text=True, check=True)
+    assert proc.stdout.strip() == '[]'
+    assert not [name for name in parse_import_times(proc.stderr) if name.split('.')[0] in GUI_MODULES or name in GUI_MODULES]
+
+
+def test_main_ignore_gooey(tmp_path, monkeypatch):
+    # the run started by the GUI form: Gooey is not imported, so the program must drop --ignore-gooey itself
+    bin_dir = tmp_path / 'bin'
+    monkeypatch.setenv('PATH', fakes.install_all(bin_dir))
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    shutil.copytree(DATA_DIR / 'pato', tmp_path / 'pato')
+    (tmp_path / 'conf' / 'bc_dev').mkdir(parents=True)
+    pom_file = tmp_path / 'pato' / 'db' / 'pom.xml'
+    monkeypatch.setattr(sys, 'argv', ['pato-gui', '--ignore-gooey', '--action', 'db-info', '--db', 'bc_dev', '--db-password', 'secret',
+                                      '--file', str(pom_file), '--db-config-dir', str(tmp_path / 'conf'), '--no-preflight'])
+    program.main()
+    assert 'pato_gui.gui' not in sys.modules
+    (mvn_args,) = fakes.calls(bin_dir, 'mvn')
+    assert '--ignore-gooey' not in mvn_args
+    assert mvn_args[:4] == ['--file', str(pom_file), '-Pdb-info', '-B']
+    assert sys.argv[1] == '--ignore-gooey'
@@ -0,0 +1,32 @@
+from contextlib import closing
+
+from pato_gui import stats
+
+from tests import fakes
+
+
+def test_record_and_report(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    log_file = tmp_path / 'bc_dev.log'
+    log_file.write_text('\n'.join(fakes.maven_output(lines=100, modules=3)) + '\n')
+    pom_file = str(tmp_path / 'db' / 'pom.xml')
+    for wall_time in [10, 11, 9, 10, 10, 10, 12]:
+        assert stats.record_log(pom_file, 'bc_dev', 'db-info', 'mvn', 0, wall_time, log_file) is None
+    assert stats.record_log(pom_file, 'bc_dev', 'db-info', 'mvn', 1, 30, log_file) is None
+    # a regression
+    assert 'took 16.0 seconds, 1.6 times the median of 10.0 seconds' in stats.record_log(pom_file, 'bc_dev', 'db-info', 'mvn', 0, 16, log_file)
+    # another tool has its own baseline
+    assert stats.record_log(pom_file, 'bc_dev', 'db-info', 'mvnd', 0, 30, log_file) is None
+
+    with closing(stats._connect()) as connection:
+        runs = stats.runs(connection, pom_file, 'bc_dev', 'db-info')
+        assert len(runs) == 10
+        assert runs[0]['maven_time'] is None
+        modules = connection.execute('select module, status, duration from modules where run_id = ? order by seq', (runs[0]['id'],)).fetchall()
+        assert modules == [('MODULE_0', 'SUCCESS', 1.0), ('MODULE_1', 'SUCCESS', 1.001), ('MODULE_2', 'SUCCESS', 1.002)]
+        report = stats.report(connection).splitlines()
+        assert report[0].split() == ['Project', 'Database', 'Action', 'Tool', 'Runs', 'Failed', 'Last', 'P50', 'P90', 'P95', 'Trend', 'Slow']
+        assert report[2].split() == ['db', 'bc_dev', 'db-info', 'mvn', '9', '1', '16.0', 's', '10.0', 's', '16.0', 's', '16.0', 's', '1']
+        slow = stats.slow_report(connection).splitlines()
+        assert len(slow) == 3 and slow[2].split()[-3:] == ['10.0', 's', '1.6']
+        assert stats.module_report(connection, db='bc_dev').splitlines()[2].split()[:2] == ['MODULE_0', '10']
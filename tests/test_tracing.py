@@ -0,0 +1,46 @@
+import json
+
+from pato_gui import tracing
+
+
+MAVEN_OUTPUT = '''[INFO] Scanning for projects...
+[INFO] --- flyway-maven-plugin:9.22.3:info (default-cli) @ db ---
+[INFO] Database: jdbc:oracle:thin:@//localhost:1521/orcl
+[INFO] --- maven-antrun-plugin:3.1.0:run (db-info) @ db ---
+[INFO] ------------------------------------------------------------------------
+[INFO] BUILD SUCCESS
+'''
+
+
+def test_maven_output_tracer(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, '_trace_file', str(tmp_path / 'trace.json'))
+    lines = []
+    tracer = tracing.MavenOutputTracer(lines.append)
+    for line in MAVEN_OUTPUT.splitlines():
+        tracer(line)
+    tracer.finish()
+    assert lines == MAVEN_OUTPUT.splitlines()
+    names = [event['name'] for event in tracing.events() if event['cat'] == 'maven'][-4:]
+    assert names == ['time-to-first-output',
+                     'flyway-maven-plugin:9.22.3:info (default-cli) @ db',
+                     'maven-antrun-plugin:3.1.0:run (db-info) @ db',
+                     'BUILD SUCCESS']
+
+
+def test_write_trace(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, '_events', [])
+    # nothing is recorded without a trace file
+    tracing.instant('not recorded')
+    assert tracing.events() == []
+    monkeypatch.setattr(tracing, '_trace_file', str(tmp_path / 'trace.json'))
+    with tracing.span('check_environment'):
+        with tracing.span('mvn', cat='check_environment', version='3.9.6'):
+            pass
+    tracing.instant('done')
+    trace_file = tmp_path / 'trace.json'
+    tracing.write_trace(trace_file)
+    trace = json.loads(trace_file.read_text())
+    assert [event['name'] for event in trace['traceEvents']] == ['mvn', 'check_environment', 'done']
+    outer, inner = trace['traceEvents'][1], trace['traceEvents'][0]
+    assert outer['ph'] == 'X' and outer['ts'] <= inner['ts'] and inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+    assert inner['args'] == {'version': '3.9.6'}
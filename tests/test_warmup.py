@@ -0,0 +1,67 @@
+import os
+import signal
+import time
+
+import pytest
+
+from pato_gui import cache, warmup
+
+from tests import fakes
+
+
+@pytest.fixture
+def toolchain(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    monkeypatch.setenv('PATH', fakes.install_all(bin_dir, mvn={'lines': 10}))
+    monkeypatch.setenv('PATO_GUI_CACHE_DIR', str(tmp_path / 'cache'))
+    return bin_dir
+
+
+def test_completed(toolchain, tmp_path):
+    pom_file = tmp_path / 'pom.xml'
+    process = warmup.start(pom_file, str(tmp_path / 'conf'), ['db-info', 'db-install'])
+    assert process.wait(10) == 0
+    for _ in range(100):
+        state = warmup.cancel(pom_file)
+        if state:
+            break
+        time.sleep(0.05)
+    assert state['returncode'] == 0
+    assert fakes.calls(toolchain, 'mvn') == [['--file', str(pom_file), '-B', '-Ddb.config.dir=' + str(tmp_path / 'conf'), '-Pdb-info,db-install', 'dependency:go-offline']]
+    # reported once
+    assert warmup.cancel(pom_file) is None
+    assert '(completed)' in warmup.report(state, 1.0)
+
+
+def test_cancel(toolchain, tmp_path):
+    fakes.install(toolchain, 'mvn', lines=10, delay=30)
+    pom_file = tmp_path / 'pom.xml'
+    process = warmup.start(pom_file, None, ['db-info'])
+    time.sleep(0.5)
+    start = time.perf_counter()
+    state = warmup.cancel(pom_file)
+    assert state['returncode'] is None
+    assert process.wait(10) < 0
+    assert time.perf_counter() - start < 10
+    assert 'cancelled when the run started' in warmup.report(state, 1.0, 2.0)
+
+
+def test_daemon(toolchain, tmp_path):
+    pom_file = tmp_path / 'pom.xml'
+    assert warmup.start(pom_file, None, ['db-info'], mvnd=True).wait(10) == 0
+    # the daemon is started at normal priority first
+    assert fakes.calls(toolchain, 'mvnd') == [['--file', str(pom_file), '-B', '-q', 'validate'],
+                                              ['--file', str(pom_file), '-B', '-Pdb-info', 'dependency:go-offline']]
+
+
+def test_cancel_other_process(toolchain, tmp_path):
+    fakes.install(toolchain, 'mvn', lines=10, delay=30)
+    pom_file = tmp_path / 'pom.xml'
+    process = warmup.start(pom_file, None, ['db-info'])
+    # as if the process id has been reused by another process
+    key = warmup._key(pom_file)
+    cache.store(warmup.SECTION, key, dict(cache.load(warmup.SECTION, key, count=False), process_start='0'))
+    assert warmup.cancel(pom_file) is None
+    assert process.poll() is None
+    os.killpg(process.pid, signal.SIGKILL)
+    process.wait(10)
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import threading
+
+from pato_gui import pipeline, program, workspace
+
+
+POM = """<project xmlns="http://maven.apache.org/POM/4.0.0">
+  {parent}
+  <artifactId>{artifact_id}</artifactId>
+</project>
+"""
+
+PARENT = '<parent><groupId>com.paulissoft</groupId><artifactId>ws</artifactId><version>1</version></parent>'
+
+
+def make_workspace(tmp_path):
+    (tmp_path / 'pom.xml').write_text(POM.format(parent='', artifact_id='ws'))
+    for name in ['db', 'apex', 'target', '.git']:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / 'pom.xml').write_text(POM.format(parent=PARENT, artifact_id=name))
+    (tmp_path / 'README.md').write_text('not a project')
+    return tmp_path
+
+
+def test_find_POM_files(tmp_path):
+    make_workspace(tmp_path)
+    assert workspace.find_POM_files([str(tmp_path)]) == [str(tmp_path / name) for name in ['pom.xml', 'apex/pom.xml', 'db/pom.xml']]
+    assert workspace.find_POM_files([str(tmp_path / 'db' / 'pom.xml'), str(tmp_path / 'db')]) == [str(tmp_path / 'db' / 'pom.xml')]
+
+
+def test_resolve(tmp_path, monkeypatch):
+    make_workspace(tmp_path)
+    active = []
+    lock = threading.Lock()
+
+    def process_POM(pom_file, db_config_dir, use_cache, refresh, native):
+        with lock:
+            active.append(pom_file)
+        time.sleep(0.3)
+        if pom_file.endswith('apex/pom.xml'):
+            return 'conf', ['bc_tst', 'bc_dev'], ['apex-import'], None, 'APEX'
+        if pom_file.endswith('db/pom.xml'):
+            return 'conf', ['bc_dev', 'bc_acc', 'bc_tst'], ['db-info', 'db-install'], 'PROXY', 'BC'
+        raise RuntimeError('No PATO project')
+
+    monkeypatch.setattr(workspace, 'process_POM', process_POM)
+    start = time.perf_counter()
+    projects = workspace.resolve(workspace.find_POM_files([str(tmp_path)]))
+    # concurrently
+    assert time.perf_counter() - start < 0.8
+    assert len(active) == 3
+    # the parent is no PATO project, so it is left out (and no parent in the workspace)
+    assert [(project.name, project.parents) for project in projects] == [('apex', []), ('db', [])]
+    assert workspace.databases(projects) == ['bc_dev', 'bc_tst']
+    assert workspace.actions(projects) == ['apex-import', 'db-info', 'db-install']
+
+
+def test_run(tmp_path, monkeypatch):
+    make_workspace(tmp_path)
+
+    def process_POM(pom_file, db_config_dir, use_cache, refresh, native):
+        return 'conf', ['bc_dev'], ['db-info'], None, 'BC'
+
+    def maven_command(args, db, extra_maven_command_line_options, policy):
+        # the parent takes longer, so the children would finish first without ordering
+        sleep = 0.5 if args.file == str(tmp_path / 'pom.xml') else 0
+        fail = 'sys.exit(1); ' if args.file.endswith('apex/pom.xml') else ''
+        return f'"{sys.executable}" -c "import sys, time; time.sleep({sleep}); {fail}print(time.time())"'
+
+    monkeypatch.setattr(workspace, 'process_POM', process_POM)
+    monkeypatch.setattr(program, 'maven_command', maven_command)
+    projects = workspace.resolve(workspace.find_POM_files([str(tmp_path)]))
+    root = tmp_path.name
+    assert [(project.name, project.parents) for project in projects] == [('apex', [root]), ('db', [root]), (root, [])]
+
+    args = program.argparse.Namespace(db_proxy_password='', db_password='secret', mvnd=False, force=False, preflight=False, preflight_timeout=1)
+    steps = workspace.run(projects, 'db-info', 'bc_dev', args, [], 4, tmp_path / 'logs')
+    # a failure does not stop the other projects
+    assert [step.status for step in steps] == ['FAILED (1)', 'OK', 'OK']
+    finished = {step.name: float(step.log_file.read_text().split()[-1]) for step in steps if step.status == 'OK'}
+    assert finished[root] < finished['db']
+    assert steps[1].start >= steps[2].duration
+    assert 'FAILED' in pipeline.report(steps)
+
+
+def test_run_nested_projects(tmp_path, monkeypatch):
+    # a project in a subdirectory and one with the same name, but with an underscore
+    for name in ['a_b', 'a/b']:
+        (tmp_path / name).mkdir(parents=True)
+        (tmp_path / name / 'pom.xml').write_text(POM.format(parent='', artifact_id=name.replace('/', '-')))
+
+    def process_POM(pom_file, db_config_dir, use_cache, refresh, native):
+        return 'conf', ['bc_dev'], ['db-info'], None, 'BC'
+
+    def maven_command(args, db, extra_maven_command_line_options, policy):
+        return f'"{sys.executable}" -c "print({args.file!r})"'
+
+    monkeypatch.setattr(workspace, 'process_POM', process_POM)
+    monkeypatch.setattr(program, 'maven_command', maven_command)
+    projects = workspace.resolve(workspace.find_POM_files([str(tmp_path)]))
+    assert [project.name for project in projects] == [os.path.join('a', 'b'), 'a_b']
+
+    args = program.argparse.Namespace(db_proxy_password='', db_password='secret', mvnd=False, force=False, preflight=False, preflight_timeout=1)
+    steps = workspace.run(projects, 'db-info', 'bc_dev', args, [], 2, tmp_path / 'logs')
+    assert [(step.name, step.status) for step in steps] == [(project.name, 'OK') for project in projects]
+    for step, project in zip(steps, projects):
+        assert step.log_file.read_text() == project.pom_file + '\n'